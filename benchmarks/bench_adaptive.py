@@ -0,0 +1,128 @@
+"""
+Benchmark: adaptive batch size / concurrency against fixed settings.
+
+Fans one 400-block document out to 8 pages through a simulated Notion API
+(in-process, latency scaled down) under different conditions: a healthy
+server, a server that throttles above 2 requests in flight, one that rejects
+requests over 40 blocks, and one where large requests time out. Reports wall
+time, request counts and the settings the controller converged to. A second
+adaptive run starts warm from the settings the first one would save. No
+network access.
+
+Usage:
+    python benchmarks/bench_adaptive.py
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adaptive import AdaptiveController
+from src.client import NotionSync
+from src.fanout import fan_out
+
+BLOCKS = [{"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": f"line {i}"}}]}}
+          for i in range(400)]
+TARGETS = [f"{n:032x}" for n in range(8)]
+WORKERS = 8
+
+
+class SimulatedError(Exception):
+    def __init__(self, status, code=""):
+        super().__init__(f"HTTP {status} {code}")
+        self.status = status
+        self.code = code
+        self.headers = {"retry-after": "0.05"}
+
+
+class SimulatedNotion:
+    """
+    blocks.children.append with a latency of base + per_block * children,
+    a 429 above `capacity` requests in flight, a 413 above `max_payload`
+    children and a timeout once the latency would exceed `timeout`.
+    """
+    def __init__(self, base=0.02, per_block=0.0005, capacity=100, max_payload=100, timeout=None):
+        self.base, self.per_block = base, per_block
+        self.capacity, self.max_payload, self.timeout = capacity, max_payload, timeout
+        self.lock = threading.Lock()
+        self.active = 0
+        self.counts = {"ok": 0, "429": 0, "413": 0, "timeout": 0}
+        self.blocks = type("Blocks", (), {})()
+        self.blocks.children = type("Children", (), {})()
+        self.blocks.children.append = self.append
+
+    def _count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    def append(self, block_id, children):
+        with self.lock:
+            self.active += 1
+            busy = self.active > self.capacity
+        try:
+            if busy:
+                time.sleep(self.base / 4)
+                self._count("429")
+                raise SimulatedError(429, "rate_limited")
+            if len(children) > self.max_payload:
+                time.sleep(self.base / 4)
+                self._count("413")
+                raise SimulatedError(413)
+            latency = self.base + self.per_block * len(children)
+            if self.timeout and latency > self.timeout:
+                time.sleep(self.timeout)
+                self._count("timeout")
+                raise SimulatedError(504, "gateway_timeout")
+            time.sleep(latency)
+            self._count("ok")
+            return {"results": [{"id": f"{block_id}-{i}"} for i in range(len(children))]}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+CONDITIONS = {
+    "healthy": dict(),
+    "throttles above 2 in flight": dict(capacity=2),
+    "rejects over 40 blocks": dict(max_payload=40),
+    "times out over 60 blocks": dict(per_block=0.002, timeout=0.14),
+}
+
+
+def run(condition, controller=None):
+    notion = SimulatedNotion(**condition)
+    syncer = NotionSync("token", None, rate_limit=0, max_retries=4, client=notion, controller=controller)
+    start = time.perf_counter()
+    results = fan_out(syncer, TARGETS, BLOCKS, "T", max_workers=WORKERS)
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for r in results if r.ok)
+    return elapsed, ok, notion.counts
+
+
+def main():
+    print(f"{'Condition':<28} {'mode':<9} {'time s':>7} {'pages':>6} {'ok':>5} {'429':>5} {'413':>5} "
+          f"{'t/o':>5}  settings")
+    for name, condition in CONDITIONS.items():
+        elapsed, ok, counts = run(condition)
+        print(f"{name:<28} {'fixed':<9} {elapsed:>7.2f} {ok:>4}/{len(TARGETS)} {counts['ok']:>5} "
+              f"{counts['429']:>5} {counts['413']:>5} {counts['timeout']:>5}  batch 100, {WORKERS} in flight")
+        settings = None
+        for mode in ("adaptive", "warm"):
+            controller = AdaptiveController(max_concurrency=WORKERS)
+            if settings:
+                controller.restore(settings)
+            elapsed, ok, counts = run(condition, controller)
+            final = controller.settings()
+            # What np saves for the next run
+            settings = controller.confirmed_settings()
+            print(f"{'':<28} {mode:<9} {elapsed:>7.2f} {ok:>4}/{len(TARGETS)} {counts['ok']:>5} "
+                  f"{counts['429']:>5} {counts['413']:>5} {counts['timeout']:>5}  "
+                  f"batch {final['batch_size']}, {final['concurrency']} in flight")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.ERROR)
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: parsing and pushing large Markdown tables (e.g. experiment logs).
+
+Measures parse time, peak memory and the number of API requests needed for
+tables of 1k and 10k rows, in both overflow modes. No network access: requests
+go to a counting stub.
+
+Usage:
+    python benchmarks/bench_large_table.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parser import parse_markdown_text, split_large_tables
+from src.client import NotionSync, chunk_blocks
+
+
+class CountingChildren:
+    def __init__(self):
+        self.requests = 0
+        self.created = 0
+
+    def append(self, block_id, children):
+        assert len(children) <= 100, "request exceeds Notion's children limit"
+        self.requests += 1
+        results = []
+        for block in children:
+            self.created += 1
+            results.append({"id": f"block-{self.created}"})
+            nested = block.get(block["type"], {}).get("children", [])
+            assert len(nested) <= 100, "nested children exceed Notion's limit"
+        return {"results": results}
+
+
+class CountingClient:
+    def __init__(self):
+        self.blocks = type("Blocks", (), {})()
+        self.blocks.children = CountingChildren()
+
+
+def make_table(rows: int, cols: int = 6) -> str:
+    lines = ["| run | " + " | ".join(f"metric_{c}" for c in range(cols - 1)) + " |",
+             "|" + "---|" * cols]
+    for r in range(rows):
+        cells = [f"exp-{r:05d}"] + [f"{(r * 7 + c) % 1000 / 10:.1f}" for c in range(cols - 1)]
+        if r % 50 == 0:
+            cells[1] = f"**{cells[1]}**"  # Some formatted cells
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def bench(rows: int):
+    text = make_table(rows)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    blocks = parse_markdown_text(text)
+    parse_time = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    for mode in ("append", "split"):
+        client = CountingClient()
+        syncer = NotionSync(token="bench", root_page_id="page", rate_limit=0, client=client)
+        payload = split_large_tables(blocks) if mode == "split" else blocks
+        start = time.perf_counter()
+        syncer.push_batches("page", chunk_blocks(payload))
+        push_time = time.perf_counter() - start
+        print(f"{rows:>6} rows  {mode:<6}  parse {parse_time * 1000:7.1f} ms  "
+              f"peak {peak / 1e6:6.1f} MB  requests {client.blocks.children.requests:4d}  "
+              f"prepare {push_time * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    for n in (1_000, 10_000):
+        bench(n)
@@ -0,0 +1,80 @@
+"""
+Benchmark: request payload savings of rich_text coalescing and minification.
+
+Parses each document of the corpus (the repository's own Markdown files, a
+formatting-heavy note and a 1k-row table) with and without the minify pass,
+then reports the rich_text elements and JSON bytes of the
+blocks.children.append requests, plus the time the pass adds. No network access.
+
+Usage:
+    python benchmarks/bench_minify.py
+"""
+import os
+import sys
+import glob
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bench_large_table import make_table
+from src.normalize import DEFAULT_NORMALIZER
+from src.parser import parse_markdown_lines
+from src.client import chunk_blocks
+from src.planner import payload_size
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def make_formatted_note(paragraphs: int = 200) -> str:
+    line = ("Results for **model _A_ and model _B_** on `dataset-1` (see ![fig. 2](fig2.png)), "
+            "[the paper](https://example.com) and *the appendix*; scores: **91.2** / **88.7** with $\\alpha = 0.1$.")
+    return "\n\n".join(f"- {line}" if n % 3 == 0 else line for n in range(paragraphs)) + "\n"
+
+
+def corpus():
+    for path in sorted(glob.glob(os.path.join(ROOT, "**", "*.md"), recursive=True)):
+        if "/test/" not in path.replace(os.sep, "/"):
+            with open(path, "r", encoding="utf-8") as f:
+                yield os.path.relpath(path, ROOT), f.read()
+    yield "<formatted note, 200 paragraphs>", make_formatted_note()
+    yield "<table, 1000 rows>", make_table(1000)
+
+
+def count_runs(blocks) -> int:
+    runs = 0
+    for block in blocks:
+        body = block.get(block.get("type"), {})
+        runs += len(body.get("rich_text", [])) + sum(len(cell) for cell in body.get("cells", []))
+        runs += count_runs(body.get("children", []))
+    return runs
+
+
+def measure(lines, minify: bool, repeat: int = 5):
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        blocks = parse_markdown_lines(lines, minify=minify)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    batches = chunk_blocks(blocks)
+    size = sum(payload_size({"children": batch}) for batch in batches)
+    return count_runs(blocks), size, elapsed
+
+
+def main():
+    totals = [0, 0, 0, 0]
+    print(f"{'Document':<44} {'runs':>13} {'bytes':>19} {'saved':>7} {'parse ms':>16}")
+    for name, text in corpus():
+        lines = DEFAULT_NORMALIZER.normalize(text).splitlines(keepends=True)
+        runs_before, bytes_before, t_before = measure(lines, minify=False)
+        runs_after, bytes_after, t_after = measure(lines, minify=True)
+        totals = [totals[0] + runs_before, totals[1] + runs_after, totals[2] + bytes_before, totals[3] + bytes_after]
+        print(f"{name[:44]:<44} {runs_before:>6}->{runs_after:<6} {bytes_before:>9}->{bytes_after:<9} "
+              f"{1 - bytes_after / max(1, bytes_before):>6.1%} {t_before * 1000:>7.2f}->{t_after * 1000:<7.2f}")
+    print(f"{'Total':<44} {totals[0]:>6}->{totals[1]:<6} {totals[2]:>9}->{totals[3]:<9} "
+          f"{1 - totals[3] / max(1, totals[2]):>6.1%}")
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    main()
@@ -3,21 +3,412 @@ import sys
 import re
 import argparse
 from datetime import datetime
-from src.utils import setup_logging, ConfigLoader, extract_page_id
-from src.client import NotionSync
-from src.parser import parse_markdown_to_blocks
+from src.utils import setup_logging, ConfigLoader, load_targets_file, get_root_page_id, get_tokens
+from src.parser import parse_markdown_to_blocks, parse_markdown_text, make_title_block, split_large_tables
 
 # Initialize logging globally for the main entry point
 logger = setup_logging()
 
+# NOTE: src.client (and with it notion_client) is imported lazily, so that
+# paths which never touch the network (e.g. --enqueue) start up fast.
+
+def resolve_tokens(config):
+    """
+    Returns the Notion token(s) from config, exiting with a hint if there are none.
+    """
+    try:
+        tokens = get_tokens(config)
+    except ValueError as e:
+        logger.error(f"❌ Invalid 'notion_tokens' in config.yaml: {e}")
+        sys.exit(1)
+    if not tokens:
+        logger.error("❌ Missing valid 'notion_token' (or 'notion_tokens') in config.yaml.")
+        sys.exit(1)
+    return tokens
+
+def build_syncer(config, root_page_id=None):
+    """
+    Creates a NotionSync from config (token or token pool, rate limit).
+    """
+    from src.client import NotionSync, DEFAULT_RATE_LIMIT
+    tokens = resolve_tokens(config)
+    rate_limit = float(config.get("rate_limit", DEFAULT_RATE_LIMIT))
+    pool = None
+    if config.get("notion_tokens"):
+        from src.tokens import build_pool
+        pool = build_pool(tokens, rate_limit)
+    # Dependency Injection: Pass token and ID explicitly
+    return NotionSync(token=tokens[0]["token"], root_page_id=root_page_id, rate_limit=rate_limit, pool=pool)
+
+def enable_tuning(config, syncer, target, max_concurrency):
+    """
+    Lets an adaptive controller pick batch size and in-flight requests (up
+    to `max_concurrency`) for this run, starting from the settings last used
+    for `target`; the last healthy settings are saved again when the process
+    exits. Opt-in: set `adaptive: true` in config.yaml (default: fixed
+    100-block batches).
+    """
+    if not config.get("adaptive", False):
+        return
+    import atexit
+    from src.adaptive import TuningStore, attach_controller
+
+    store = TuningStore()
+    controller = attach_controller(syncer, target, store, max_concurrency=max_concurrency)
+
+    def save_settings():
+        settings = controller.confirmed_settings()
+        if settings:
+            store.put(target, settings)
+            store.save()
+    atexit.register(save_settings)
+
+def record_sync(record, description):
+    """
+    Keeps what a sync created in the local sync log, so `np undo` can roll it back.
+    """
+    if not len(record):
+        return
+    from src.undo import SyncLog
+
+    record.description = description
+    sync_log = SyncLog()
+    sync_log.put(record)
+    sync_log.save()
+    logger.info(f"↩️  Recorded as sync {record.sync_id} ({len(record)} item(s)); roll back with 'np undo {record.sync_id}'")
+
+def drain_main(argv):
+    """
+    `np drain`: delivers jobs queued with `np --enqueue`.
+    """
+    from src.spool import Spool, drain, DEFAULT_MAX_ATTEMPTS, DEFAULT_POLL_INTERVAL
+
+    parser = argparse.ArgumentParser(prog="np drain", description="Deliver spooled sync jobs to Notion",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="Exit when no job is ready instead of polling forever")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_INTERVAL, help="Seconds between polls of an empty queue")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="Attempts before a job is dead-lettered")
+    parser.add_argument("--stats", action="store_true", help="Show queue counts and dead letters, then exit")
+    parser.add_argument("--retry-dead", action="store_true", help="Move dead-lettered jobs back to the queue, then exit")
+    args = parser.parse_args(argv)
+
+    spool = Spool()
+    if args.stats:
+        logger.info(f"📬 Spool status: {spool.stats() or 'empty'}")
+        for job in spool.dead_letters():
+            logger.info(f"   💀 #{job['id']} -> {job['target']} ({job['attempts']} attempts): {job['error']}")
+        return
+    if args.retry_dead:
+        logger.info(f"♻️  Re-queued {spool.retry_dead()} dead-lettered job(s)")
+        return
+
+    syncer = build_syncer(ConfigLoader.load_config())
+    logger.info("🚚 Draining spool..." + (" (until empty)" if args.once else " (Ctrl+C to stop)"))
+    try:
+        handled = drain(syncer, spool, once=args.once, poll_interval=args.poll, max_attempts=args.max_attempts)
+        logger.info(f"✨ Drain finished: {handled} delivery group(s). Queue: {spool.stats() or 'empty'}")
+    except KeyboardInterrupt:
+        logger.info("🛑 Drainer stopped.")
+    finally:
+        spool.close()
+
+def serve_main(argv):
+    """
+    `np serve`: keeps a warm NotionSync behind a local Unix socket.
+    """
+    from src.daemon import SyncDaemon, serve, default_socket_path
+    from src.fanout import DEFAULT_FANOUT_WORKERS
+
+    parser = argparse.ArgumentParser(prog="np serve", description="Run the np sync daemon",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--socket", default=None, help="Unix socket path (default: per-user, e.g. $XDG_RUNTIME_DIR/notion_pusher/np.sock)")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_FANOUT_WORKERS, help="Targets pushed concurrently per job")
+    args = parser.parse_args(argv)
+
+    config = ConfigLoader.load_config()
+    sync_daemon = SyncDaemon(config, build_syncer(config, get_root_page_id(config)), workers=args.workers)
+    try:
+        serve(sync_daemon, args.socket or default_socket_path())
+    except RuntimeError as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.info("🛑 Daemon stopped.")
+
+def undo_main(argv):
+    """
+    `np undo`: archives the blocks and pages created by a recorded sync.
+    """
+    from src.undo import SyncLog, undo_sync, format_records, DEFAULT_UNDO_WORKERS
+
+    parser = argparse.ArgumentParser(prog="np undo", description="Roll back a sync by archiving the blocks it created",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("sync_id", nargs="?", help="Sync ID or unique prefix (default: the latest sync)", metavar="SYNC_ID")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_UNDO_WORKERS, help="Archive requests in flight at once")
+    parser.add_argument("--list", action="store_true", help="Show the recorded syncs, newest first, then exit")
+    args = parser.parse_args(argv)
+
+    sync_log = SyncLog()
+    if args.list:
+        logger.info("🧾 Recorded syncs:\n" + format_records(sync_log.recent()))
+        return
+    try:
+        record = sync_log.get(args.sync_id)
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+
+    syncer = build_syncer(ConfigLoader.load_config())
+    start = datetime.now()
+    archived, failed = undo_sync(syncer, record, workers=args.workers)
+    # Whatever could not be archived stays recorded for another attempt
+    if len(record):
+        sync_log.put(record)
+    else:
+        sync_log.remove(record.sync_id)
+    sync_log.save()
+    elapsed = (datetime.now() - start).total_seconds()
+    if failed:
+        logger.error(f"❌ Archived {len(archived)} item(s), {len(failed)} failed. Run 'np undo {record.sync_id}' again to retry.")
+        sys.exit(1)
+    logger.info(f"✨ Undo complete! Archived {len(archived)} item(s) of sync {record.sync_id} in {elapsed:.1f}s.")
+
+def export_main(argv):
+    """
+    `np export`: renders a Notion page back to Markdown.
+    """
+    from src.export import ExportCache, export_page, DEFAULT_EXPORT_WORKERS
+    from src.resolver import TitleIndex, resolve_targets, DEFAULT_TITLE_TTL
+
+    parser = argparse.ArgumentParser(prog="np export", description="Export a Notion page to Markdown",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("target", help="Page ID, URL or title to export", metavar="ID_URL_OR_TITLE")
+    parser.add_argument("--output", "-o", help="Write to this file instead of stdout", metavar="FILE")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_EXPORT_WORKERS, help="Concurrent children.list requests")
+    parser.add_argument("--no-cache", action="store_true", help="Fetch every block instead of reusing unchanged subtrees")
+    args = parser.parse_args(argv)
+
+    config = ConfigLoader.load_config()
+    syncer = build_syncer(config)
+    title_index = TitleIndex(ttl=float(config.get("title_cache_ttl", DEFAULT_TITLE_TTL)))
+    try:
+        page_id = resolve_targets([args.target], title_index, lambda: syncer)[0]
+        markdown = export_page(syncer, page_id, cache=None if args.no_cache else ExportCache(),
+                               max_workers=args.workers)
+    except Exception as e:
+        logger.error(f"❌ Export failed: {e}")
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(markdown)
+        logger.info(f"✨ Exported to {args.output}")
+    else:
+        sys.stdout.write(markdown)
+
+def sync_main(argv):
+    """
+    `np sync`: mirrors a folder (or glob) of notes as child pages.
+    """
+    import time
+    from src.dirsync import SyncManifest, sync_directory, format_report, DEFAULT_UPLOAD_WORKERS
+    from src.resolver import TitleIndex, resolve_targets, DEFAULT_TITLE_TTL
+
+    parser = argparse.ArgumentParser(prog="np sync", description="Sync a folder of Markdown notes to Notion",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("source", help="Directory (all *.md, recursively) or glob pattern, e.g. 'notes/**/*.md'", metavar="DIR_OR_GLOB")
+    parser.add_argument("--target", "-p", help="Parent page ID, URL or title (default: root_page_id from config.yaml)", metavar="ID_URL_OR_TITLE")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_UPLOAD_WORKERS, help="Files uploaded concurrently")
+    parser.add_argument("--parse-workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--prune", action="store_true", help="Archive pages of files that were deleted since the last sync")
+    parser.add_argument("--force", action="store_true", help="Re-send every file, even if unchanged")
+    parser.add_argument("--links", action="store_true", help="Turn [[wikilinks]] and relative .md links between the notes into page mentions")
+    args = parser.parse_args(argv)
+
+    config = ConfigLoader.load_config()
+    syncer = build_syncer(config)
+    if args.target:
+        title_index = TitleIndex(ttl=float(config.get("title_cache_ttl", DEFAULT_TITLE_TTL)))
+        try:
+            parent_id = resolve_targets([args.target], title_index, lambda: syncer)[0]
+        except ValueError as e:
+            logger.error(f"❌ Invalid --target argument: {e}")
+            sys.exit(1)
+    else:
+        parent_id = get_root_page_id(config)
+        if not parent_id:
+            logger.error("❌ No parent page. Provide --target <id_or_url> or set 'root_page_id' in config.yaml")
+            sys.exit(1)
+
+    syncer.root_page_id = parent_id
+    enable_tuning(config, syncer, parent_id, args.workers)
+    start = time.monotonic()
+    try:
+        results = sync_directory(syncer, args.source, parent_id, SyncManifest(), workers=args.workers,
+                                 parse_workers=args.parse_workers, split_tables=config.get("table_overflow") == "split",
+                                 prune=args.prune, force=args.force, resolve_links=args.links)
+    except KeyboardInterrupt:
+        logger.info("🛑 Sync interrupted; finished files are recorded and will be skipped next time.")
+        sys.exit(1)
+    logger.info("📋 Sync report: " + format_report(results, time.monotonic() - start))
+    if any(r.status == "failed" for r in results):
+        sys.exit(1)
+
+def import_main(argv):
+    """
+    `np import`: imports notes with YAML front matter as database rows.
+    """
+    import time
+    from src.utils import extract_page_id
+    from src.dirsync import SyncManifest, format_report
+    from src.dbimport import SchemaCache, import_notes, DEFAULT_IMPORT_WORKERS, DEFAULT_SCHEMA_TTL
+
+    parser = argparse.ArgumentParser(prog="np import", description="Import Markdown notes into a Notion database",
+                                     formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("source", help="Directory (all *.md, recursively) or glob pattern, e.g. 'notes/**/*.md'", metavar="DIR_OR_GLOB")
+    parser.add_argument("--database", "-d", help="Database ID or URL (default: database_id from config.yaml)", metavar="ID_OR_URL")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_IMPORT_WORKERS, help="Rows created concurrently")
+    parser.add_argument("--prune", action="store_true", help="Archive rows of notes that were deleted since the last import")
+    parser.add_argument("--force", action="store_true", help="Re-send every note, even if unchanged")
+    args = parser.parse_args(argv)
+
+    config = ConfigLoader.load_config()
+    database = args.database or config.get("database_id")
+    if not database:
+        logger.error("❌ No database. Provide --database <id_or_url> or set 'database_id' in config.yaml")
+        sys.exit(1)
+    try:
+        database_id = extract_page_id(database)
+    except ValueError as e:
+        logger.error(f"❌ Invalid database: {e}")
+        sys.exit(1)
+
+    syncer = build_syncer(config)
+    schema_cache = SchemaCache(ttl=float(config.get("schema_cache_ttl", DEFAULT_SCHEMA_TTL)))
+    syncer.root_page_id = database_id
+    enable_tuning(config, syncer, database_id, args.workers)
+    start = time.monotonic()
+    try:
+        results = import_notes(syncer, args.source, database_id, SyncManifest(), schema_cache, workers=args.workers,
+                               split_tables=config.get("table_overflow") == "split", prune=args.prune, force=args.force)
+    except KeyboardInterrupt:
+        logger.info("🛑 Import interrupted; finished notes are recorded and will be skipped next time.")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"❌ Import failed: {e}")
+        sys.exit(1)
+    logger.info("📋 Import report: " + format_report(results, time.monotonic() - start))
+    if any(r.status == "failed" for r in results):
+        sys.exit(1)
+
+def run_stream(args, syncer, page_ids, page_title, record=None):
+    """
+    Streams stdin into a single page, appending blocks as they close.
+    """
+    from src.stream import StreamPublisher, stream_to_page
+
+    if len(page_ids) > 1:
+        logger.error("❌ Streaming from stdin supports a single target.")
+        sys.exit(1)
+
+    prefix = []
+    if args.new:
+        page_id, page_url = syncer.create_child_page(page_title, parent_id=page_ids[0], record=record)
+    else:
+        page_id, page_url = page_ids[0], None
+        prefix.append(make_title_block(page_title))
+
+    logger.info(f"📡 Streaming stdin to page {page_id} (flush every {args.flush_interval}s or {args.flush_blocks} blocks)...")
+    publisher = StreamPublisher(syncer, page_id, max_latency=args.flush_interval, max_blocks=args.flush_blocks,
+                                record=record)
+    count = stream_to_page(sys.stdin, publisher, prefix_blocks=prefix)
+    logger.info(f"✨ Stream complete! {count} blocks in {publisher.requests} request(s)"
+                + (f". View your page here: {page_url}" if page_url else f" to page {page_id}."))
+
+def run_plan(args, config, blocks, targets, page_title, text_splits=None):
+    """
+    Prints the request plan for the parsed document (see src/planner.py).
+    """
+    import json
+    from src.planner import plan_push, format_plan
+    from src.client import DEFAULT_RATE_LIMIT
+
+    rate_limit = float(config.get("rate_limit", DEFAULT_RATE_LIMIT))
+    plan = plan_push(blocks, targets=len(set(targets)) or 1, new_page=args.new, title=page_title,
+                     rate_limit=rate_limit, workers=args.workers, text_splits=text_splits)
+    if args.plan == "json":
+        print(json.dumps(plan.to_dict(), indent=2))
+    else:
+        logger.info("🗺️  Push plan (nothing was sent):\n" + format_plan(plan, rate_limit))
+
+def run_via_daemon(args, targets, page_title):
+    """
+    Sends the job to a running daemon and exits with its outcome.
+    Returns (so the caller runs in-process) only if no daemon is listening.
+    """
+    from src.daemon import send_request
+
+    request = {"op": "sync", "file": os.path.abspath(args.file), "targets": targets,
+               "title": page_title, "new": args.new, "workers": args.workers}
+    try:
+        response = send_request(request)
+    except OSError as e:
+        # The job may already be partially pushed; running it again could duplicate content
+        logger.error(f"Sync failed: lost connection to daemon ({e})")
+        sys.exit(1)
+    if response is None:
+        return
+
+    logger.info("🛰️  Handled by np daemon.")
+    if response.get("undo"):
+        from src.undo import SyncRecord
+        record_sync(SyncRecord.from_dict(response["undo"]),
+                    f"{args.file} -> {', '.join(targets) or 'root page'}" + (" (new page)" if args.new else ""))
+    if response.get("blocks") == 0:
+        logger.warning(f"No content found in {args.file}. Exiting.")
+    if response.get("error"):
+        logger.error(f"Sync failed: {response['error']}")
+        sys.exit(1)
+    for result in response.get("results", []):
+        if result["ok"]:
+            logger.info(f"✨ Sync complete! {result['url'] or 'Appended to page ' + result['page_id']}")
+        else:
+            logger.error(f"❌ Target {result['target']} failed: {result['error']}")
+    sys.exit(0 if response.get("ok") else 1)
+
+SUBCOMMANDS = {
+    "drain": drain_main,
+    "serve": serve_main,
+    "export": export_main,
+    "undo": undo_main,
+    "sync": sync_main,
+    "import": import_main,
+}
+
 def main():
+    # Subcommands (e.g. "np drain"), unless a file with that name exists
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS and not os.path.exists(sys.argv[1]):
+        return SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+
+    from src.fanout import DEFAULT_FANOUT_WORKERS
+    from src.stream import DEFAULT_FLUSH_INTERVAL, DEFAULT_FLUSH_BLOCKS
+
     parser = argparse.ArgumentParser(description="Notion Researcher - Sync Markdown to Notion",
     formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
-    parser.add_argument("file", nargs="?", default="notes/tmp.md",help="Path to the Markdown file", metavar="FILE_PATH")
+    parser.add_argument("file", nargs="?", default="notes/tmp.md",help="Path to the Markdown file ('-' streams stdin)", metavar="FILE_PATH")
     parser.add_argument("--title", "-t", help="Title for the new Notion page", metavar="PAGE_TITLE")
-    parser.add_argument("--target", "-p", help="Target Notion Page ID or URL (overrides config.yaml)", metavar="ID_OR_URL")
+    parser.add_argument("--target", "-p", nargs="+", help="Target Notion Page ID(s), URL(s) or page title(s) (overrides config.yaml)", metavar="ID_URL_OR_TITLE")
+    parser.add_argument("--targets-file", help="File with one target Page ID or URL per line (combined with --target)", metavar="LIST_FILE")
+    parser.add_argument("--workers", "-w", type=int, default=DEFAULT_FANOUT_WORKERS, help="Number of targets pushed concurrently when fanning out")
     parser.add_argument("--new", "-n", action="store_true", help="Force create a new child page instead of appending to the target (Default is Append mode)")
+    parser.add_argument("--enqueue", "-q", action="store_true", help="Parse now and queue the push in the local spool; deliver later with 'np drain'")
+    parser.add_argument("--priority", type=int, default=0, help="Spool priority for --enqueue (higher is delivered first)")
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL, help="With '-': max seconds a finished block waits before it is appended")
+    parser.add_argument("--flush-blocks", type=int, default=DEFAULT_FLUSH_BLOCKS, help="With '-': finished blocks that trigger an immediate append")
+    parser.add_argument("--no-daemon", action="store_true", help="Run in-process even if an 'np serve' daemon is running")
+    parser.add_argument("--plan", nargs="?", const="text", choices=["text", "json"], help="Report the requests the push would send (offline) instead of pushing")
+    parser.add_argument("--under", help="Insert at the end of the section under this heading instead of at the end of the page", metavar="HEADING")
     
     args = parser.parse_args()
 
@@ -41,67 +432,116 @@ def main():
             logger.info(f"   -> Treating it as the TARGET page.")
             logger.info(f"   -> Processing default file: 'notes/tmp.md'")
             
-            args.target = potential_target
+            args.target = [potential_target]
             args.file = "notes/tmp.md"
 
+    # "np -" reads Markdown from stdin (streamed live unless queued)
+    from_stdin = args.file == "-"
+    streaming = from_stdin and not args.enqueue and not args.plan
+
+    if args.under and (args.new or args.enqueue or streaming):
+        logger.error("❌ --under inserts into an existing page; it cannot be combined with --new, --enqueue or streaming.")
+        sys.exit(1)
+
     # Step 1: Validate File Existence
-    if not os.path.exists(args.file):
+    if not from_stdin and not os.path.exists(args.file):
         logger.error(f"File not found: {args.file}")
         sys.exit(1)
     
-    # Step 2: Fail Fast - Parse Markdown Immediately
-    logger.info(f"Parsing file: {args.file}")
-    try:
-        blocks = parse_markdown_to_blocks(args.file)
-    except Exception as e:
-        logger.error(f"Failed to parse markdown: {e}")
-        sys.exit(1)
-
-    if not blocks:
-        logger.warning(f"No content found in {args.file}. Exiting.")
-        sys.exit(0)
+    targets = list(args.target or [])
+    if args.targets_file:
+        try:
+            targets.extend(load_targets_file(args.targets_file))
+        except OSError as e:
+            logger.error(f"❌ Cannot read targets file: {e}")
+            sys.exit(1)
 
     # Prepare Title
     page_title = args.title
     if not page_title:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
         page_title = f"{timestamp} Log"
-        
+
+    # Thin client: hand the job to a running `np serve` daemon if there is one
+    if not args.no_daemon and not args.enqueue and not args.plan and not from_stdin and not args.under:
+        run_via_daemon(args, targets, page_title)
+    
+    # Step 2: Fail Fast - Parse Markdown Immediately
+    # (A live stream is parsed incrementally while it is pushed, see Step 4)
+    blocks = []
+    if not streaming:
+        logger.info(f"Parsing file: {args.file}")
+        try:
+            if from_stdin:
+                blocks = parse_markdown_text(sys.stdin.read())
+            else:
+                blocks = parse_markdown_to_blocks(args.file)
+        except Exception as e:
+            logger.error(f"Failed to parse markdown: {e}")
+            sys.exit(1)
+
+    if not blocks and not streaming:
+        logger.warning(f"No content found in {args.file}. Exiting.")
+        sys.exit(0)
+
     # Optimization: Inject Title as H1 if Appending (Default behavior)
-    if not args.new:
-        title_block = {
-            "object": "block",
-            "type": "heading_1",
-            "heading_1": {
-                "rich_text": [{"type": "text", "text": {"content": page_title}}]
-            }
-        }
-        blocks.insert(0, title_block)
+    # (content inserted into a section goes in as-is)
+    if not args.new and not streaming and not args.under:
+        blocks.insert(0, make_title_block(page_title))
     
     # Step 3: Load Configuration (Only if parsing succeeded)
     config = ConfigLoader.load_config()
+    if config.get("table_overflow") == "split":
+        blocks = split_large_tables(blocks)
+
+    # The validator splits long rich_text runs in place; count them first for the plan
+    text_splits = None
+    if args.plan:
+        from src.planner import count_text_splits
+        text_splits = count_text_splits(blocks)
+
+    # Pre-flight: repair or report API violations before the first request
+    if blocks:
+        from src.validate import validate_blocks
+        report = validate_blocks(blocks)
+        report.log(args.file)
+        if report.errors:
+            logger.error("❌ Nothing was sent. Fix the problems above and try again.")
+            sys.exit(1)
+
+    # Dry run: report the requests without resolving targets or touching the network
+    if args.plan:
+        run_plan(args, config, blocks, targets, page_title, text_splits)
+        return
     
-    # Resolve Notion Token
-    token = config.get("notion_token")
-    if not token or "YOUR_TOKEN_HERE" in token:
-        logger.error("❌ Missing valid 'notion_token' in config.yaml.")
-        sys.exit(1)
-        
-    # Resolve Root Page ID
+    # Resolve Root Page ID(s)
     root_page_id = None
     
     # Priority 1: CLI Argument
-    if args.target:
+    from src.resolver import TitleIndex, resolve_targets, invalidate_missing, DEFAULT_TITLE_TTL
+    title_index = TitleIndex(ttl=float(config.get("title_cache_ttl", DEFAULT_TITLE_TTL)))
+    syncer = None
+
+    def get_syncer():
+        # Only page titles missing from the cache need the network
+        nonlocal syncer
+        if syncer is None:
+            syncer = build_syncer(config)
+        return syncer
+
+    if targets:
         try:
-            root_page_id = extract_page_id(args.target)
-            logger.info(f"🎯 Using Target Page ID from CLI: {root_page_id}")
+            page_ids = resolve_targets(targets, title_index, get_syncer)
+            root_page_id = page_ids[0]
+            logger.info(f"🎯 Using Target Page ID(s) from CLI: {', '.join(page_ids)}")
         except ValueError as e:
             logger.error(f"❌ Invalid --target argument: {e}")
             sys.exit(1)
             
     # Priority 2: Config File
-    elif config.get("root_page_id") and "YOUR_ROOT_PAGE_ID_HERE" not in config.get("root_page_id"):
-        root_page_id = config.get("root_page_id")
+    elif get_root_page_id(config):
+        root_page_id = get_root_page_id(config)
+        page_ids = [root_page_id]
         logger.info(f"📂 Using Root Page ID from config.yaml: {root_page_id}")
         
     # Cold Start / Failure
@@ -111,29 +551,77 @@ def main():
                      "   2. Set 'root_page_id' in config.yaml")
         sys.exit(1)
         
+    # Offline mode: persist the parsed job and return without touching the network
+    if args.enqueue:
+        from src.spool import Spool
+        spool = Spool()
+        job_ids = [spool.enqueue(page_id, blocks, title=page_title, new_page=args.new, priority=args.priority)
+                   for page_id in page_ids]
+        spool.close()
+        logger.info(f"📥 Queued job(s) {', '.join(map(str, job_ids))}. Run 'np drain' to deliver.")
+        return
+    
     # Step 4: Initialize Client and Sync
+    resolve_tokens(config)
+    # Everything created below is recorded (even if the push fails halfway) for `np undo`
+    from src.undo import SyncRecord
+    record = SyncRecord()
+    description = f"{args.file} -> {', '.join(page_ids)}"
+    if args.new:
+        description += " (new page)"
+    elif args.under:
+        description += f" (under '{args.under}')"
     try:
-        # Dependency Injection: Pass token and ID explicitly
-        syncer = NotionSync(token=token, root_page_id=root_page_id)
+        syncer = get_syncer()
+        syncer.root_page_id = root_page_id
+        enable_tuning(config, syncer, root_page_id, args.workers)
+        
+        if streaming:
+            run_stream(args, syncer, page_ids, page_title, record=record)
+            return
+
+        if args.under:
+            if len(page_ids) > 1:
+                logger.error("❌ --under supports a single target.")
+                sys.exit(1)
+            from src.sections import insert_under
+            try:
+                created = insert_under(syncer, root_page_id, args.under, blocks, record=record)
+            except ValueError as e:
+                logger.error(f"❌ {e}. Nothing was sent.")
+                sys.exit(1)
+            logger.info(f"✨ Sync complete! Inserted {len(created)} blocks under '{args.under}' in page {root_page_id}.")
+            return
+
+        # Fan-out: parse once, push the shared batches to every target concurrently
+        if len(page_ids) > 1:
+            from src.fanout import fan_out, format_summary
+            results = fan_out(syncer, page_ids, blocks, page_title, new_page=args.new, max_workers=args.workers,
+                              record=record)
+            logger.info("📋 Fan-out summary:\n" + format_summary(results))
+            invalidate_missing(title_index, targets, [r.target for r in results if r.status == 404])
+            if not all(r.ok for r in results):
+                sys.exit(1)
+            return
         
         target_page_id = None
         target_page_url = None # URL is not readily available if we append, unless we query, but we can skip showing it or assume user knows
         
         if args.new:
             logger.info(f"🆕 Creating a new child page '{page_title}' under {root_page_id}...")
-            new_page_id, new_page_url = syncer.create_child_page(page_title)
+            new_page_id, new_page_url = syncer.create_child_page(page_title, record=record)
             target_page_id = new_page_id
             target_page_url = new_page_url
         else:
             logger.info(f"🔄 Appending content directly to page {root_page_id} (Default Mode)...")
             target_page_id = root_page_id
         
-        syncer.push_blocks(target_page_id, blocks)
+        syncer.push_blocks(target_page_id, blocks, record=record)
         
         # Logging optimization
         final_url = target_page_url
-        if not final_url and args.target and args.target.startswith("http"):
-             final_url = args.target
+        if not final_url and len(targets) == 1 and targets[0].startswith("http"):
+             final_url = targets[0]
         
         if final_url:
              logger.info(f"✨ Sync complete! View your page here: {final_url}")
@@ -142,7 +630,11 @@ def main():
              
     except Exception as e:
         logger.error(f"Sync failed: {e}")
+        if getattr(e, "status", None) == 404:
+            invalidate_missing(title_index, targets, [root_page_id])
         sys.exit(1)
+    finally:
+        record_sync(record, description)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,227 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+from src.utils import state_path, JsonStateFile
+
+logger = logging.getLogger(__name__)
+
+TUNING_FILE = "tuning.json"
+MAX_BATCH_SIZE = 100            # Notion's limit on children per request
+DEFAULT_CONCURRENCY = 2         # In-flight requests of a cold start
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_LATENCY_TARGET = 2.0    # Seconds; slower responses stop further increases
+BATCH_STEP = 10                 # Additive increase of the batch size per healthy round
+PROBE_ROUNDS = 20               # Healthy rounds before a rejected batch size is tried again
+LATENCY_SMOOTHING = 0.2         # Weight of the newest sample in the latency average
+
+# Request outcomes, as reported to AdaptiveController.record
+OK = "ok"
+THROTTLED = "throttled"   # 429 rate limited, 503 overloaded
+TIMEOUT = "timeout"       # Client timeouts and 504 gateway timeouts
+TOO_LARGE = "too_large"   # Payload rejected for its size
+FAILED = "error"          # Anything else (not a load signal)
+
+
+def classify(error: Exception) -> str:
+    """
+    Maps a failed request to the load signal it carries.
+    """
+    status = getattr(error, "status", None)
+    code = str(getattr(error, "code", "")).lower()
+    if status in (429, 503) or code == "rate_limited":
+        return THROTTLED
+    if status == 413 or "too_large" in code or "too large" in str(error).lower():
+        return TOO_LARGE
+    if status == 504 or "timeout" in code or "timeout" in type(error).__name__.lower():
+        return TIMEOUT
+    return FAILED
+
+
+class AdaptiveController:
+    """
+    AIMD controller for the batch size and the number of in-flight requests
+    of one NotionSync.
+
+    After every healthy round (as many successful responses as requests
+    allowed in flight, none slower than the latency target) concurrency
+    grows by one and the batch size by BATCH_STEP. A 429 halves concurrency;
+    a timeout halves concurrency and the batch size; a payload rejection
+    drops the batch size to the largest size accepted since (or to half the
+    rejected request if none was smaller). Requests that were
+    already in flight when a decrease happened, or that are larger than the
+    current batch size, were sent under the old settings and cannot decrease
+    them again, so one burst of 429s counts as a single congestion signal.
+
+    The smallest rejected batch size is remembered as a ceiling: growth
+    then halves the distance to it instead of overshooting again. After
+    PROBE_ROUNDS healthy rounds the ceiling itself is tried once more, and
+    growth resumes if it is accepted.
+    """
+    def __init__(self, batch_size: int = MAX_BATCH_SIZE, concurrency: int = DEFAULT_CONCURRENCY,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 latency_target: float = DEFAULT_LATENCY_TARGET):
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_size = min(max(1, batch_size), MAX_BATCH_SIZE)
+        self.concurrency = min(max(1, concurrency), self.max_concurrency)
+        self.latency_target = latency_target
+        self.latency: Optional[float] = None  # Smoothed response time of successful requests
+        self._ceiling: Optional[int] = None  # Smallest batch size rejected as too large
+        self._probe = 0     # Healthy rounds since the ceiling was set
+        self._accepted = 0  # Largest batch size accepted below the ceiling
+        self._clean = 0     # Healthy responses since the last change
+        self._holdoff = 0   # Responses still due from before the last decrease
+        self._healthy: Optional[Tuple[int, int]] = None  # (concurrency, batch size) of the last healthy round
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """
+        Holds one of the `concurrency` request slots for the duration of a request.
+        """
+        with self._cond:
+            while self._in_flight >= self.concurrency:
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def record(self, outcome: str, latency: Optional[float] = None, size: Optional[int] = None):
+        """
+        Feeds back the outcome of one request (called while its slot is held).
+
+        Args:
+            outcome: OK, THROTTLED, TIMEOUT, TOO_LARGE or FAILED.
+            latency: Seconds the request took.
+            size: Children sent with the request, if any.
+        """
+        with self._cond:
+            if outcome == OK:
+                self._on_success(latency, size)
+                return
+            if outcome == FAILED:
+                return
+            self._clean = 0
+            if outcome == TOO_LARGE and size:
+                self._ceiling = min(self._ceiling or size, size)
+                self._probe = 0
+                if self._accepted >= size:
+                    self._accepted = 0  # Heavier blocks than before: start over
+                self.batch_size = max(1, min(self.batch_size, max(size // 2, self._accepted)))
+                logger.info(f"📉 Payload rejected: batch size -> {self.batch_size}")
+                return
+            if self._holdoff or (size and size > self.batch_size):
+                # Sent before the last decrease: not a new signal
+                self._holdoff = max(0, self._holdoff - 1)
+                return
+            self.concurrency = max(1, self.concurrency // 2)
+            if outcome == TIMEOUT:
+                self.batch_size = max(1, self.batch_size // 2)
+            # The other requests in flight were sent under the old setting
+            self._holdoff = self._in_flight - 1
+            logger.info(f"📉 {outcome.capitalize()}: concurrency -> {self.concurrency}, batch size -> {self.batch_size}")
+
+    def _on_success(self, latency: Optional[float], size: Optional[int]):
+        if size and self._accepted < size < (self._ceiling or MAX_BATCH_SIZE + 1):
+            self._accepted = size
+        if latency is not None:
+            self.latency = latency if self.latency is None else (
+                LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.latency)
+        if self._holdoff:
+            self._holdoff -= 1
+            return
+        if latency is not None and latency > self.latency_target:
+            self._clean = 0
+            return
+        self._clean += 1
+        if self._clean < self.concurrency:
+            return
+        self._clean = 0
+        self._healthy = (self.concurrency, self.batch_size)
+        concurrency = min(self.max_concurrency, self.concurrency + 1)
+        batch_size = min(MAX_BATCH_SIZE, self.batch_size + BATCH_STEP)
+        if self._ceiling:
+            batch_size = min(batch_size, max(self.batch_size, (self.batch_size + self._ceiling) // 2))
+            self._probe += 1
+            if self._probe >= PROBE_ROUNDS:
+                # Limits depend on the content; a rejection puts the ceiling back
+                batch_size = min(MAX_BATCH_SIZE, self._ceiling)
+                self._ceiling, self._probe = None, 0
+        if (concurrency, batch_size) != (self.concurrency, self.batch_size):
+            self.concurrency, self.batch_size = concurrency, batch_size
+            self._cond.notify_all()
+            logger.debug(f"📈 Healthy round: concurrency -> {concurrency}, batch size -> {batch_size}")
+
+    def settings(self) -> Dict[str, Any]:
+        with self._cond:
+            return {"batch_size": self.batch_size, "concurrency": self.concurrency,
+                    "ceiling": self._ceiling, "latency": self.latency}
+
+    def confirmed_settings(self) -> Optional[Dict[str, Any]]:
+        """
+        The settings of the last healthy round (or the restored ones), to be
+        saved for the next run: a run that ends in a string of failures does
+        not hand its collapsed settings on. None if nothing was confirmed.
+        """
+        with self._cond:
+            if self._healthy is None:
+                return None
+            concurrency, batch_size = self._healthy
+            return {"batch_size": batch_size, "concurrency": concurrency,
+                    "ceiling": self._ceiling, "latency": self.latency}
+
+    def restore(self, settings: Dict[str, Any]):
+        """
+        Starts from settings saved by an earlier run (see TuningStore).
+        """
+        with self._cond:
+            self.batch_size = min(max(1, int(settings.get("batch_size", self.batch_size))), MAX_BATCH_SIZE)
+            self.concurrency = min(max(1, int(settings.get("concurrency", self.concurrency))), self.max_concurrency)
+            self.latency = settings.get("latency")
+            if settings.get("ceiling"):
+                self._ceiling = int(settings["ceiling"])
+                self._accepted = min(self.batch_size, self._ceiling - 1)
+            self._healthy = (self.concurrency, self.batch_size)
+            self._cond.notify_all()
+
+
+class TuningStore(JsonStateFile):
+    """
+    Local record of the controller settings last used per target (JSON file),
+    so the next run against the same page or database starts warm. Safe to
+    share between threads.
+    """
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path or state_path(TUNING_FILE), "tuning state")
+
+    def get(self, target: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            return self.entries.get(target)
+
+    def put(self, target: str, settings: Dict[str, Any]):
+        with self.lock:
+            self.entries[target] = dict(settings, ts=time.time())
+            self.dirty = True
+
+
+def attach_controller(syncer, target: str, store: TuningStore,
+                      max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> AdaptiveController:
+    """
+    Gives the syncer an AdaptiveController, warm-started from the settings
+    saved for `target` if there are any.
+    """
+    controller = AdaptiveController(max_concurrency=max_concurrency)
+    saved = store.get(target)
+    if saved:
+        controller.restore(saved)
+        logger.info(f"🎛️  Warm start for {target}: batch size {controller.batch_size}, "
+                    f"concurrency {controller.concurrency}")
+    syncer.controller = controller
+    return controller
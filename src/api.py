@@ -0,0 +1,189 @@
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Union, IO, Iterable
+
+from src.parser import parse_markdown, make_title_block, split_large_tables
+from src.resolver import TitleIndex, resolve_targets, invalidate_missing, DEFAULT_TITLE_TTL
+from src.utils import ConfigLoader, get_root_page_id, get_tokens
+from src.validate import validate_blocks
+
+logger = logging.getLogger(__name__)
+
+Markdown = Union[str, bytes, IO, Iterable[str]]
+
+
+@dataclass
+class PublishResult:
+    """Outcome of one SyncSession.publish call."""
+    page_id: str
+    url: Optional[str] = None
+    blocks: int = 0      # Top-level blocks sent
+    requests: int = 0    # Append requests, continuations excluded
+
+
+class SyncSession:
+    """
+    Reusable, thread-safe publishing session for embedding in other programs.
+
+    One session is meant to serve a whole process. Configuration is loaded
+    once, and the NotionSync (one Notion client with its HTTPS connection
+    pool, one rate limiter for every thread) is created on first use and
+    shared by all later calls, so publish() can be called from many threads.
+
+        with SyncSession() as session:
+            session.publish(markdown, "Lab Notebook", under="Results")
+    """
+    def __init__(self, config: Optional[Dict[str, Any]] = None, token: Optional[str] = None,
+                 client: Optional[Any] = None):
+        """
+        Args:
+            config: Settings as in config.yaml (default: read config.yaml once).
+            token: Notion token, overriding `notion_token` (and `notion_tokens`) from the config.
+            client: Pre-built Notion client (mainly for tests).
+        """
+        self.config = dict(ConfigLoader.load_config() if config is None else config)
+        if token:
+            self.config["notion_token"] = token
+            self.config.pop("notion_tokens", None)
+        self._client = client
+        self._syncer = None
+        self._lock = threading.Lock()
+        self._title_lock = threading.Lock()
+        self._insert_lock = threading.Lock()
+        self.title_index = TitleIndex(ttl=float(self.config.get("title_cache_ttl", DEFAULT_TITLE_TTL)))
+        self._page_index = None
+
+    @property
+    def syncer(self):
+        """
+        The shared NotionSync, created on first use.
+
+        Raises:
+            ValueError: If no valid notion_token (or notion_tokens pool) is configured.
+        """
+        with self._lock:
+            if self._syncer is None:
+                from src.client import NotionSync, DEFAULT_RATE_LIMIT
+                tokens = get_tokens(self.config)
+                if self._client is None and not tokens:
+                    raise ValueError("Missing valid 'notion_token' (config.yaml or token=...)")
+                rate_limit = float(self.config.get("rate_limit", DEFAULT_RATE_LIMIT))
+                pool = None
+                if self._client is None and self.config.get("notion_tokens"):
+                    from src.tokens import build_pool
+                    pool = build_pool(tokens, rate_limit)
+                self._syncer = NotionSync(token=tokens[0]["token"] if tokens else None,
+                                          root_page_id=get_root_page_id(self.config),
+                                          rate_limit=rate_limit, client=self._client, pool=pool)
+            return self._syncer
+
+    def resolve(self, target: Optional[str] = None) -> str:
+        """
+        Turns a page ID, URL or title into a page ID (titles are cached);
+        without a target, returns root_page_id from the config.
+
+        Raises:
+            ValueError: If the target can't be resolved or none is configured.
+        """
+        if not target:
+            page_id = get_root_page_id(self.config)
+            if not page_id:
+                raise ValueError("No target given and no 'root_page_id' in config.yaml")
+            return page_id
+        # Title lookups share one index file; resolve one at a time
+        with self._title_lock:
+            return resolve_targets([target], self.title_index, lambda: self.syncer)[0]
+
+    def prepare(self, markdown: Markdown) -> List[Dict[str, Any]]:
+        """
+        Parses, splits (if `table_overflow: split`) and pre-flight checks
+        Markdown without sending anything.
+
+        Raises:
+            ValueError: If the blocks violate API limits that can't be repaired.
+        """
+        blocks = parse_markdown(markdown)
+        if self.config.get("table_overflow") == "split":
+            blocks = split_large_tables(blocks)
+        report = validate_blocks(blocks)
+        report.log("publish")
+        if report.errors:
+            raise ValueError(f"Pre-flight check failed: {report.summary()}: "
+                             + "; ".join(f"{e.location}: {e.message}" for e in report.errors))
+        return blocks
+
+    def publish(self, markdown: Markdown, target: Optional[str] = None, title: Optional[str] = None,
+                new_page: bool = False, under: Optional[str] = None) -> PublishResult:
+        """
+        Publishes Markdown to a page, like `np` does for a file.
+
+        Args:
+            markdown: Markdown text, bytes, a file-like object or an iterable of lines.
+            target: Page ID, URL or title (default: root_page_id from the config).
+            title: Page title with `new_page`, otherwise the H1 put above the
+                appended content (default: a timestamped "Log" title).
+            new_page: Create a child page under the target instead of appending.
+            under: Insert at the end of the section under this heading (no H1 title).
+
+        Returns:
+            A PublishResult for the page that received the content.
+
+        Raises:
+            ValueError: Bad target, missing heading or unrepairable content (nothing sent).
+            Exception: API errors after retries, as raised by notion_client.
+        """
+        from src.client import chunk_blocks
+
+        blocks = self.prepare(markdown)
+        page_id = parent_id = self.resolve(target)
+        if not blocks:
+            logger.warning(f"No content to publish to {page_id}")
+            return PublishResult(page_id)
+        title = title or f"{datetime.now().strftime('%Y-%m-%d %H:%M')} Log"
+        syncer = self.syncer
+        try:
+            if under:
+                from src.sections import insert_under, PageIndex
+                with self._insert_lock:
+                    # One writer per process keeps the shared page index consistent
+                    if self._page_index is None:
+                        self._page_index = PageIndex()
+                    with syncer.lane(page_id):
+                        insert_under(syncer, page_id, under, blocks, self._page_index)
+                return PublishResult(page_id, blocks=len(blocks), requests=len(chunk_blocks(blocks)))
+
+            url = None
+            # Concurrent publishes to different pages spread over a token pool
+            with syncer.lane(parent_id):
+                if new_page:
+                    page_id, url = syncer.create_child_page(title, parent_id=parent_id)
+                else:
+                    blocks.insert(0, make_title_block(title))
+                batches = chunk_blocks(blocks)
+                syncer.push_batches(page_id, batches)
+            return PublishResult(page_id, url=url, blocks=len(blocks), requests=len(batches))
+        except Exception as e:
+            if getattr(e, "status", None) == 404 and target:
+                with self._title_lock:
+                    invalidate_missing(self.title_index, [target], [parent_id])
+            raise
+
+    def close(self):
+        """
+        Closes the pooled HTTPS connections. The session can't publish afterwards.
+        """
+        with self._lock:
+            if self._syncer is None:
+                return
+            pool = self._syncer.pool
+            for client in [lane.client for lane in pool.lanes] if pool else [self._syncer.client]:
+                if hasattr(client, "close"):
+                    client.close()
+
+    def __enter__(self) -> "SyncSession":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
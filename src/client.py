@@ -1,22 +1,191 @@
+import time
 import logging
-from typing import List, Dict, Any, Tuple
+import threading
+from contextlib import nullcontext
+from operator import attrgetter
+from typing import List, Dict, Any, Tuple, Optional, Callable
 from notion_client import Client
 from src.parser import parse_markdown_to_blocks
+from src.adaptive import classify, OK, TOO_LARGE
 
 logger = logging.getLogger(__name__)
 
+# Notion API limits
+MAX_BLOCKS_PER_REQUEST = 100     # Entries in any one children array
+MAX_ELEMENTS_PER_REQUEST = 1000  # Blocks in one request, nested children included
+DEFAULT_RATE_LIMIT = 3.0  # Average requests per second allowed per integration
+DEFAULT_MAX_RETRIES = 3
+
+# HTTP statuses that guarantee the request was not carried out: conflict,
+# rate limited and overloaded. Safe to resend any request.
+RETRYABLE_STATUSES = {409, 429, 503}
+# Server errors and gateway timeouts: the request may have been carried out
+# anyway, so only requests that are safe to repeat are resent
+TRANSIENT_STATUSES = {500, 502, 504}
+# Endpoints that create content: resending one after an ambiguous failure
+# could duplicate it
+CREATING_ENDPOINTS = {"blocks.children.append", "pages.create", "databases.create", "comments.create"}
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every worker of a NotionSync instance.
+    Keeps concurrent uploads under the integration's request rate.
+    """
+    def __init__(self, rate: float = DEFAULT_RATE_LIMIT, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a request slot is available.
+        """
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_retryable(error: Exception, idempotent: bool = False) -> bool:
+    """
+    Returns True if a failed request may be sent again.
+
+    Args:
+        error: The exception raised by the request.
+        idempotent: The request is safe to repeat (a read, an archive). Only
+            then are server errors and timeouts retried, since the first
+            attempt may have been carried out.
+    """
+    status = getattr(error, "status", None)
+    if status is not None:
+        return status in RETRYABLE_STATUSES or (idempotent and status in TRANSIENT_STATUSES)
+    if isinstance(error, ConnectionRefusedError) or type(error).__name__ in ("ConnectError", "ConnectTimeout"):
+        return True  # The server never saw the request
+    # Client-side timeouts and dropped connections carry no HTTP status
+    code = str(getattr(error, "code", ""))
+    timed_out = "timeout" in code or "timeout" in type(error).__name__.lower()
+    return idempotent and (timed_out or isinstance(error, ConnectionError))
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based).
+    Honors the Retry-After header sent with 429 responses.
+    """
+    headers = getattr(error, "headers", None)
+    if headers:
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+    return 0.5 * (2 ** attempt)
+
+
+def count_elements(block: Dict[str, Any], limit: int = MAX_BLOCKS_PER_REQUEST) -> int:
+    """
+    Number of blocks a block contributes to a request: itself plus the nested
+    children that are sent with it (at most `limit` per level, see split_overflow).
+    """
+    body = block.get(block.get("type"), {})
+    children = body.get("children") if isinstance(body, dict) else None
+    if not children:
+        return 1
+    return 1 + sum(count_elements(child, limit) for child in children[:limit])
+
+
+def chunk_blocks(blocks: List[Dict[str, Any]], size: int = MAX_BLOCKS_PER_REQUEST,
+                 max_elements: int = MAX_ELEMENTS_PER_REQUEST) -> List[List[Dict[str, Any]]]:
+    """
+    Splits blocks into request-sized batches: at most `size` top-level blocks
+    and `max_elements` blocks in total, nested children included.
+    The returned batches can be shared read-only between several uploads.
+    """
+    batches = []
+    batch = []
+    elements = 0
+    for block in blocks:
+        weight = count_elements(block, size)
+        if batch and (len(batch) >= size or elements + weight > max_elements):
+            batches.append(batch)
+            batch, elements = [], 0
+        batch.append(block)
+        elements += weight
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def split_overflow(batch: List[Dict[str, Any]], limit: int = MAX_BLOCKS_PER_REQUEST
+                   ) -> Tuple[List[Dict[str, Any]], Dict[int, List[Dict[str, Any]]]]:
+    """
+    Trims blocks whose own children exceed the per-request limit (e.g. tables
+    with more than 100 rows). Returns the request-ready batch and, per batch
+    index, the children that must be appended to that block once it exists.
+    Input blocks are never mutated, so batches can be shared between uploads.
+    """
+    request = []
+    overflow = {}
+    for index, block in enumerate(batch):
+        body = block.get(block.get("type"), {})
+        children = body.get("children") if isinstance(body, dict) else None
+        if children and len(children) > limit:
+            block = dict(block)
+            block[block["type"]] = dict(body, children=children[:limit])
+            overflow[index] = children[limit:]
+        request.append(block)
+    if not overflow:
+        return batch, overflow
+    return request, overflow
+
+
 class NotionSync:
-    def __init__(self, token: str, root_page_id: str):
+    def __init__(self, token: str, root_page_id: str,
+                 rate_limit: float = DEFAULT_RATE_LIMIT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 client: Optional[Any] = None,
+                 controller: Optional[Any] = None,
+                 pool: Optional[Any] = None):
         """
         Initialize Notion Client.
-        
+
         Args:
             token: Notion API Integration Token.
             root_page_id: The ID of the parent page to create children under.
+            rate_limit: Maximum average requests per second across all threads.
+            max_retries: Retries per request for rate limits and transient errors.
+            client: Pre-built client (mainly for tests). Created from token if omitted.
+            controller: AdaptiveController tuning batch size and in-flight requests
+                (see src.adaptive); fixed 100-block batches and no cap if omitted.
+            pool: TokenPool spreading requests over several integrations, each
+                with its own client and rate limit (see src.tokens). Replaces
+                token, client and rate_limit when given.
         """
         self.token = token
         self.root_page_id = root_page_id
-        
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(rate_limit)
+        self.controller = controller
+        self.pool = pool
+        if pool is not None and client is None:
+            client = pool.lanes[0].client
+
+        if client is not None:
+            self.client = client
+            return
+
         try:
             self.client = Client(auth=self.token)
             logger.info("Notion Client initialized successfully")
@@ -24,14 +193,73 @@ class NotionSync:
             logger.error(f"Failed to initialize Notion Client: {e}")
             raise
 
-    def create_child_page(self, title: str) -> Tuple[str, str]:
+    def _call(self, endpoint: str,
+              prepare: Optional[Callable[[Optional[int]], Dict[str, Any]]] = None, **kwargs) -> Any:
+        """
+        Calls a Notion endpoint (dotted path, e.g. "blocks.children.append")
+        under the shared rate limit, retrying transient failures with backoff.
+        Requests that create content are only resent when the failure
+        guarantees nothing was written (see is_retryable).
+        With a token pool, the request goes out with the current lane's token
+        and rate limit, and moves to another token after a 401 or 403.
+
+        `prepare`, if given, is called with the controller's batch size (None
+        without a controller) once each attempt holds its in-flight slot, and
+        returns further keyword arguments, so requests that waited for a slot
+        are sized by the latest settings.
+        """
+        lane = self.pool.current(self.root_page_id) if self.pool else None
+        controller = self.controller
+        idempotent = endpoint not in CREATING_ENDPOINTS
+        attempt = 0
+        while True:
+            method = attrgetter(endpoint)(lane.client if lane else self.client)
+            # With a controller, each attempt holds one of its in-flight slots
+            with controller.slot() if controller else nullcontext():
+                if prepare:
+                    kwargs.update(prepare(controller.batch_size if controller else None))
+                size = len(kwargs.get("children") or ()) or None
+                (lane.limiter if lane else self.limiter).acquire()
+                start = time.monotonic()
+                try:
+                    response = method(**kwargs)
+                    if controller:
+                        controller.record(OK, time.monotonic() - start, size)
+                    return response
+                except Exception as e:
+                    if controller:
+                        controller.record(classify(e), time.monotonic() - start, size)
+                    error = e
+            if lane and getattr(error, "status", None) in (401, 403):
+                lane = self.pool.fail_over(lane, error, self.root_page_id)
+                if lane:
+                    continue
+                raise error
+            if attempt >= self.max_retries or not is_retryable(error, idempotent):
+                raise error
+            delay = retry_delay(error, attempt)
+            attempt += 1
+            logger.warning(f"⏳ {endpoint} failed ({error}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def lane(self, target: Optional[str]):
+        """
+        Pins one token of the pool to the calling thread for a job on
+        `target`, spreading independent jobs over the pool (no-op without one).
         """
-        Creates a new child page under the root page.
+        return self.pool.lane_for(target) if self.pool else nullcontext()
+
+    def create_child_page(self, title: str, parent_id: Optional[str] = None,
+                          record: Optional[Any] = None) -> Tuple[str, str]:
+        """
+        Creates a new child page under the root page (or `parent_id` if given),
+        noting it in `record` (a SyncRecord, see src.undo) if given.
         Returns: (new_page_id, new_page_url)
         """
-        logger.info(f"Creating new child page: '{title}' under {self.root_page_id}...")
+        parent_id = parent_id or self.root_page_id
+        logger.info(f"Creating new child page: '{title}' under {parent_id}...")
         try:
-            parent = {"page_id": self.root_page_id}
+            parent = {"page_id": parent_id}
             properties = {
                 "title": [
                     {
@@ -41,32 +269,119 @@ class NotionSync:
                     }
                 ]
             }
-            response = self.client.pages.create(parent=parent, properties=properties)
+            response = self._call("pages.create", parent=parent, properties=properties)
             new_page_id = response["id"]
             new_page_url = response["url"]
+            if record is not None:
+                record.add_page(new_page_id, parent_id)
             logger.info(f"✅ Child page created! ID: {new_page_id}")
             return new_page_id, new_page_url
         except Exception as e:
             logger.error(f"Failed to create child page: {e}")
             raise
 
-    def push_blocks(self, page_id: str, blocks: List[Dict[str, Any]]):
+    def append_children(self, block_id: str, children: List[Dict[str, Any]],
+                        after: Optional[str] = None,
+                        written: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Sends one blocks.children.append request (at most 100 children).
+        Nested children beyond the limit (long tables, long lists) are sent
+        afterwards in follow-up requests to the newly created blocks.
+
+        With an adaptive controller, the children go out in consecutive
+        requests of its batch size, read once each request holds its
+        in-flight slot, and a request rejected as too
+        large is sent again in smaller pieces. A timed-out request is not
+        resent (it may have been written); the controller only shrinks the
+        requests that follow.
+
+        Args:
+            block_id: Parent block or page.
+            children: Blocks to append.
+            after: Insert after this child of the parent instead of at the end.
+            written: Filled with the created top-level blocks as each request
+                succeeds, so a caller can tell how far a failed call got.
+        
+        Returns:
+            The API response (results of all pieces when split).
+        """
+        responses = []
+        start = 0
+        while start < len(children):
+            taken = {}
+
+            def take(batch_size: Optional[int]) -> Dict[str, Any]:
+                # The piece is cut once the request holds its slot
+                end = len(children) if batch_size is None else min(len(children), start + batch_size)
+                piece = children if (start, end) == (0, len(children)) else children[start:end]
+                request, taken["overflow"] = split_overflow(piece)
+                taken["piece"] = piece
+                return {"children": request}
+
+            kwargs = {"after": after} if after else {}
+            try:
+                response = self._call("blocks.children.append", prepare=take, block_id=block_id, **kwargs)
+            except Exception as e:
+                piece = taken.get("piece", ())
+                if self.controller and len(piece) > self.controller.batch_size and classify(e) == TOO_LARGE:
+                    # The controller has shrunk the batch size below this piece
+                    logger.warning(f"📦 {len(piece)} blocks rejected as too large, "
+                                   f"resending in pieces of {self.controller.batch_size}")
+                    continue
+                raise
+            piece, overflow = taken["piece"], taken["overflow"]
+            if written is not None:
+                written.extend(response.get("results", []))
+            for index, extra in overflow.items():
+                parent_id = response["results"][index]["id"]
+                for n, chunk in enumerate(chunk_blocks(extra), start=1):
+                    self.append_children(parent_id, chunk)
+                    logger.info(f"     · Continuation {n} appended to {parent_id} ({len(chunk)} children)")
+            responses.append(response)
+            start += len(piece)
+            if after and response.get("results"):
+                after = response["results"][-1]["id"]
+        if len(responses) == 1:
+            return responses[0]
+        return {"results": [block for response in responses for block in response.get("results", [])]}
+
+    def push_blocks(self, page_id: str, blocks: List[Dict[str, Any]],
+                    after: Optional[str] = None, record: Optional[Any] = None) -> List[Dict[str, Any]]:
         """
         Appends blocks to the specified page in batches of 100 (Notion API limit).
+        Returns the created top-level blocks.
+        """
+        return self.push_batches(page_id, chunk_blocks(blocks), after=after, record=record)
+
+    def push_batches(self, page_id: str, batches: List[List[Dict[str, Any]]],
+                     after: Optional[str] = None, record: Optional[Any] = None) -> List[Dict[str, Any]]:
         """
-        BATCH_SIZE = 100
-        total_blocks = len(blocks)
+        Appends pre-chunked batches to the specified page, in order.
+        With `after`, the first batch is inserted after that block and each
+        following batch after the last block of the previous one.
+        The created blocks are noted in `record` (a SyncRecord, see src.undo)
+        batch by batch, so a push that fails halfway can still be undone.
+
+        Returns:
+            The created top-level blocks, as returned by the API.
+        """
+        total_blocks = sum(len(batch) for batch in batches)
         logger.info(f"Pushing {total_blocks} blocks to page {page_id}...")
-        
-        for i in range(0, total_blocks, BATCH_SIZE):
-            batch = blocks[i : i + BATCH_SIZE]
+
+        created = []
+        for n, batch in enumerate(batches, start=1):
             try:
-                self.client.blocks.children.append(block_id=page_id, children=batch)
-                logger.info(f"   - Batch {i//BATCH_SIZE + 1} pushed ({len(batch)} blocks)")
+                results = self.append_children(page_id, batch, after=after).get("results", [])
+                created.extend(results)
+                if record is not None:
+                    record.add_blocks(page_id, results)
+                if after and results:
+                    after = results[-1]["id"]
+                logger.info(f"   - Batch {n} pushed ({len(batch)} blocks)")
             except Exception as e:
-                logger.error(f"❌ Failed to push batch starting at index {i}: {e}")
-                # We continue trying other batches or raise? 
-                # Usually better to stop to maintain order.
+                logger.error(f"❌ Failed to push batch {n} to {page_id}: {e}")
+                # Stop here to maintain order; later batches would land out of place.
                 raise
-        
+
         logger.info("Push completed successfully!")
+        return created
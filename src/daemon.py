@@ -0,0 +1,222 @@
+import os
+import json
+import socket
+import getpass
+import logging
+import tempfile
+import threading
+import socketserver
+from dataclasses import asdict
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from src.utils import get_root_page_id
+from src.resolver import TitleIndex, resolve_targets, DEFAULT_TITLE_TTL
+from src.parser import parse_markdown_to_blocks, parse_markdown_text, make_title_block, split_large_tables
+from src.validate import validate_blocks
+from src.fanout import DEFAULT_FANOUT_WORKERS
+
+logger = logging.getLogger(__name__)
+
+SOCKET_FILE = "np.sock"
+CONNECT_TIMEOUT = 0.5  # Seconds; a live daemon accepts immediately
+
+
+def default_socket_path() -> str:
+    """
+    Per-user socket path, the same from every working directory:
+    $XDG_RUNTIME_DIR/notion_pusher/np.sock, else a notion_pusher-<user>
+    directory in the system temp directory.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(os.path.abspath(runtime_dir), "notion_pusher", SOCKET_FILE)
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    return os.path.join(tempfile.gettempdir(), f"notion_pusher-{user}", SOCKET_FILE)
+
+
+def _owned_by_us(path: str) -> bool:
+    # A directory another user created could hold their socket in place of ours
+    return not hasattr(os, "getuid") or os.stat(path).st_uid == os.getuid()
+
+
+class SyncDaemon:
+    """
+    Handles sync jobs for `np serve`.
+    Config and the NotionSync (with its pooled HTTPS connections) are created
+    once and reused by every job.
+    """
+    def __init__(self, config: Dict[str, Any], syncer, workers: int = DEFAULT_FANOUT_WORKERS):
+        self.config = config
+        self.syncer = syncer
+        self.workers = workers
+        self.title_index = TitleIndex(ttl=float(config.get("title_cache_ttl", DEFAULT_TITLE_TTL)))
+        self._title_lock = threading.Lock()
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "sync":
+            return self._sync(request)
+        return {"ok": False, "error": f"Unknown op: {op!r}"}
+
+    def _sync(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from src.fanout import fan_out
+        from src.undo import SyncRecord
+
+        # Parse: inline markdown or a file path (resolved by the client)
+        if "markdown" in request:
+            blocks = parse_markdown_text(request["markdown"])
+        elif request.get("file"):
+            if not os.path.exists(request["file"]):
+                return {"ok": False, "error": f"File not found: {request['file']}"}
+            blocks = parse_markdown_to_blocks(request["file"])
+        else:
+            return {"ok": False, "error": "Sync job needs 'markdown' or 'file'"}
+
+        if not blocks:
+            return {"ok": True, "blocks": 0, "results": []}
+        if self.config.get("table_overflow") == "split":
+            blocks = split_large_tables(blocks)
+        report = validate_blocks(blocks)
+        report.log(request.get("file") or "request")
+        if report.errors:
+            return {"ok": False, "error": f"Pre-flight check failed: {report.summary()}: "
+                                          + "; ".join(f"{e.location}: {e.message}" for e in report.errors)}
+
+        new_page = bool(request.get("new"))
+        title = request.get("title") or f"{datetime.now().strftime('%Y-%m-%d %H:%M')} Log"
+        if not new_page:
+            blocks.insert(0, make_title_block(title))
+
+        targets = request.get("targets") or []
+        try:
+            if targets:
+                # Jobs run on concurrent threads but share one index file; resolve one job at a time
+                with self._title_lock:
+                    page_ids = resolve_targets(targets, self.title_index, lambda: self.syncer)
+            else:
+                page_ids = [get_root_page_id(self.config)]
+        except ValueError as e:
+            return {"ok": False, "error": f"Invalid target: {e}"}
+        if page_ids == [None]:
+            return {"ok": False, "error": "No target given and no 'root_page_id' in config.yaml"}
+
+        logger.info(f"📨 Job: {len(blocks)} blocks -> {', '.join(page_ids)}")
+        # What this job created goes back to the client, which keeps it for `np undo`
+        record = SyncRecord()
+        results = fan_out(self.syncer, page_ids, blocks, title, new_page=new_page,
+                          max_workers=request.get("workers") or self.workers, record=record)
+        return {"ok": all(r.ok for r in results), "blocks": len(blocks),
+                "results": [asdict(r) for r in results], "undo": record.to_dict()}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line; each gets one JSON response line."""
+    def handle(self):
+        for raw in self.rfile:
+            try:
+                request = json.loads(raw)
+            except ValueError as e:
+                response = {"ok": False, "error": f"Malformed request: {e}"}
+            else:
+                try:
+                    response = self.server.sync_daemon.handle(request)
+                except Exception as e:
+                    logger.error(f"❌ Job failed: {e}")
+                    response = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(sync_daemon: SyncDaemon, socket_path: Optional[str] = None) -> socketserver.BaseServer:
+    """
+    Binds the daemon to a Unix socket, replacing a stale socket file if needed.
+    The socket is only accessible to the current user: anyone who can connect
+    can make the daemon read files and push them with its token.
+
+    Raises:
+        RuntimeError: If another daemon is already listening on the socket, or
+            the default socket directory belongs to another user.
+    """
+    socket_path = os.path.abspath(socket_path or default_socket_path())
+    directory = os.path.dirname(socket_path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700)
+    elif directory == os.path.dirname(default_socket_path()) and not _owned_by_us(directory):
+        raise RuntimeError(f"{directory} belongs to another user")
+    if os.path.exists(socket_path):
+        if send_request({"op": "ping"}, socket_path) is not None:
+            raise RuntimeError(f"A daemon is already listening on {socket_path}")
+        os.unlink(socket_path)  # Stale socket from a crashed daemon
+
+    server = _ThreadingUnixServer(socket_path, _RequestHandler, bind_and_activate=False)
+    try:
+        server.server_bind()
+        # Nobody can connect before listen(), so there is no window with the umask's mode
+        os.chmod(socket_path, 0o600)
+        server.server_activate()
+    except Exception:
+        server.server_close()
+        raise
+    server.sync_daemon = sync_daemon
+    return server
+
+
+def serve(sync_daemon: SyncDaemon, socket_path: Optional[str] = None):
+    """
+    Serves sync jobs on a Unix socket until interrupted.
+    """
+    server = make_server(sync_daemon, socket_path)
+    socket_path = server.server_address
+    logger.info(f"🛰️  np daemon listening on {socket_path} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def send_request(payload: Dict[str, Any], socket_path: Optional[str] = None,
+                 timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Sends one request to a running daemon.
+
+    Returns:
+        The daemon's response, or None if no daemon is listening.
+
+    Raises:
+        OSError: If the connection breaks after the job was handed over.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    if socket_path is None:
+        socket_path = default_socket_path()
+        if os.path.exists(socket_path) and not _owned_by_us(os.path.dirname(socket_path)):
+            logger.warning(f"⚠️ Ignoring daemon socket {socket_path}: its directory belongs to another user")
+            return None
+    if not os.path.exists(socket_path):
+        return None
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+            return None
+        sock.settimeout(timeout)
+        sock.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("Daemon closed the connection before replying")
+            data += chunk
+    return json.loads(data)
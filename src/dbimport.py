@@ -0,0 +1,334 @@
+import os
+import re
+import time
+import logging
+import datetime
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
+
+import yaml
+
+from src.utils import state_path, JsonStateFile
+from src.parser import parse_markdown_text, split_large_tables
+from src.dirsync import FileResult, SyncManifest, collect_files, detect_changes, archive_page, preflight
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_CACHE_FILE = "db_schema.json"
+DEFAULT_SCHEMA_TTL = 3600  # Seconds a cached database schema stays valid
+DEFAULT_IMPORT_WORKERS = 4
+SAVE_EVERY = 20  # Imported rows between manifest saves
+MAX_TEXT_LENGTH = 2000  # Characters per rich_text content
+
+FRONT_MATTER_PATTERN = re.compile(r"\A---[ \t]*\r?\n(.*?)^---[ \t]*(?:\r?\n|\Z)", re.DOTALL | re.MULTILINE)
+
+
+def split_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Splits a leading YAML front matter block (between two '---' lines)
+    from the Markdown body.
+
+    Returns:
+        (front matter fields, body); fields are empty if there is no front matter.
+
+    Raises:
+        ValueError: If the front matter is not a valid YAML mapping.
+    """
+    match = FRONT_MATTER_PATTERN.match(text)
+    if not match:
+        return {}, text
+    try:
+        meta = yaml.safe_load(match.group(1))
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid front matter: {e}") from e
+    if meta is None:
+        meta = {}
+    if not isinstance(meta, dict):
+        raise ValueError("Front matter must be a mapping of field: value")
+    return meta, text[match.end():]
+
+
+class SchemaCache(JsonStateFile):
+    """
+    Local cache of database schemas (JSON file) with a TTL per entry: the
+    parent to create rows under and the type of each property. Safe to
+    share between threads.
+    """
+    def __init__(self, path: Optional[str] = None, ttl: float = DEFAULT_SCHEMA_TTL):
+        super().__init__(path or state_path(SCHEMA_CACHE_FILE), "schema cache")
+        self.ttl = ttl
+
+    def get(self, database_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.entries.get(database_id)
+            if entry is None:
+                return None
+            if time.time() - entry["ts"] > self.ttl:
+                self.invalidate(database_id)
+                return None
+            return entry
+
+    def put(self, database_id: str, parent: Dict[str, str], properties: Dict[str, str]):
+        with self.lock:
+            self.entries[database_id] = {"parent": parent, "properties": properties, "ts": time.time()}
+            self.dirty = True
+
+    def invalidate(self, database_id: str):
+        with self.lock:
+            if self.entries.pop(database_id, None) is not None:
+                self.dirty = True
+
+
+def fetch_schema(syncer, database_id: str, cache: Optional[SchemaCache] = None) -> Dict[str, Any]:
+    """
+    Returns the row parent and property types of a database, from the cache
+    if possible. Databases with data sources (Notion-Version 2025-09-03 and
+    later) take rows in their first data source.
+
+    Returns:
+        {"parent": pages.create parent, "properties": {name: type}}
+    """
+    cached = cache.get(database_id) if cache else None
+    if cached:
+        return cached
+
+    database = syncer._call("databases.retrieve", database_id=database_id)
+    sources = database.get("data_sources")
+    if sources:
+        source_id = sources[0]["id"]
+        if len(sources) > 1:
+            logger.warning(f"⚠️ Database {database_id} has {len(sources)} data sources; importing into the first")
+        source = syncer._call("data_sources.retrieve", data_source_id=source_id)
+        parent = {"type": "data_source_id", "data_source_id": source_id}
+        properties = source.get("properties", {})
+    else:
+        parent = {"database_id": database_id}
+        properties = database.get("properties", {})
+
+    schema = {"parent": parent, "properties": {name: prop["type"] for name, prop in properties.items()}}
+    logger.info(f"🗂️  Fetched schema of database {database_id}: {len(schema['properties'])} properties")
+    if cache:
+        cache.put(database_id, parent, schema["properties"])
+        cache.save()
+    return schema
+
+
+def _text(value: Any) -> List[Dict[str, Any]]:
+    if isinstance(value, (list, tuple)):
+        value = ", ".join(str(v) for v in value)
+    return [{"text": {"content": str(value)[:MAX_TEXT_LENGTH]}}]
+
+
+def _date(value: Any) -> Dict[str, str]:
+    # YAML already turns 2024-01-05 into a date object
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return {"start": value.isoformat()}
+    return {"start": str(value)}
+
+
+def property_value(kind: str, value: Any) -> Dict[str, Any]:
+    """
+    Converts a front matter value to a Notion property value of type `kind`.
+
+    Raises:
+        ValueError: If the type is not supported or the value doesn't fit it.
+    """
+    if kind in ("title", "rich_text"):
+        return {kind: _text(value)}
+    if kind == "number":
+        if isinstance(value, bool):
+            raise ValueError(f"{value!r} is not a number")
+        try:
+            return {"number": value if isinstance(value, (int, float)) else float(value)}
+        except (TypeError, ValueError):
+            raise ValueError(f"{value!r} is not a number")
+    if kind == "checkbox":
+        checked = value if isinstance(value, bool) else str(value).strip().lower() in ("true", "yes", "y", "1", "x")
+        return {"checkbox": checked}
+    if kind in ("select", "status"):
+        return {kind: {"name": str(value)}}
+    if kind == "multi_select":
+        names = value if isinstance(value, (list, tuple)) else str(value).split(",")
+        return {"multi_select": [{"name": str(name).strip()} for name in names if str(name).strip()]}
+    if kind == "date":
+        return {"date": _date(value)}
+    if kind in ("url", "email", "phone_number"):
+        return {kind: str(value)}
+    raise ValueError(f"property type '{kind}' can't be set from front matter")
+
+
+def build_properties(meta: Dict[str, Any], schema: Dict[str, str],
+                     default_title: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Maps front matter fields to database properties. Field names match
+    property names case-insensitively; the title property falls back to a
+    `title` field, then to `default_title`.
+
+    Returns:
+        (properties for pages.create, fields that were not mapped)
+    """
+    by_key = {name.casefold(): name for name in schema}
+    title_name = next((name for name, kind in schema.items() if kind == "title"), None)
+    properties: Dict[str, Any] = {}
+    skipped = []
+
+    for key, value in meta.items():
+        name = by_key.get(str(key).casefold())
+        if name is None and str(key).casefold() == "title" and title_name:
+            name = title_name
+        if name is None or value is None:
+            skipped.append(str(key))
+            continue
+        try:
+            properties[name] = property_value(schema[name], value)
+        except ValueError as e:
+            logger.debug(f"Skipping field '{key}': {e}")
+            skipped.append(str(key))
+
+    if title_name and title_name not in properties:
+        properties[title_name] = property_value("title", default_title)
+    return properties, skipped
+
+
+def create_row(syncer, parent: Dict[str, str], properties: Dict[str, Any],
+               blocks: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """
+    Creates a database row with its body. The first batch of blocks is sent
+    with pages.create, so most notes take a single request; the rest is
+    appended afterwards. If an append fails, the half-filled row is archived
+    so the next import doesn't leave a duplicate next to it.
+
+    Returns:
+        (page_id, page_url)
+    """
+    from src.client import chunk_blocks, split_overflow
+
+    batches = chunk_blocks(blocks)
+    first = batches[0] if batches and not split_overflow(batches[0])[1] else None
+    kwargs = {"parent": parent, "properties": properties}
+    if first:
+        # Blocks sent with pages.create get no IDs back, so batches with
+        # continuations (long tables) go through append_children instead
+        kwargs["children"] = first
+        batches = batches[1:]
+    response = syncer._call("pages.create", **kwargs)
+    if batches:
+        try:
+            syncer.push_batches(response["id"], batches)
+        except Exception:
+            archive_page(syncer, response["id"])
+            raise
+    return response["id"], response.get("url")
+
+
+def read_note(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Reads a note: its front matter fields and the blocks of its body.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        meta, body = split_front_matter(f.read())
+    return meta, parse_markdown_text(body)
+
+
+def _import_note(syncer, schema: Dict[str, Any], record: Dict[str, Any], previous: Optional[str],
+                 split_tables: bool, unmapped: Counter, lock: threading.Lock) -> FileResult:
+    result = FileResult(path=record["rel"], status="failed")
+    start = time.monotonic()
+    try:
+        meta, blocks = read_note(record["path"])
+        if split_tables:
+            blocks = split_large_tables(blocks)
+        error = preflight(record["rel"], blocks)
+        if error:
+            raise ValueError(error)
+        default_title = os.path.splitext(os.path.basename(record["rel"]))[0]
+        properties, skipped = build_properties(meta, schema["properties"], default_title)
+        with lock:
+            unmapped.update(skipped)
+        result.blocks = len(blocks)
+        with syncer.lane(syncer.root_page_id):
+            result.page_id, result.url = create_row(syncer, schema["parent"], properties, blocks)
+            if previous:
+                archive_page(syncer, previous)
+        result.status = "uploaded"
+    except Exception as e:
+        result.error = str(e)
+        if result.page_id:
+            archive_page(syncer, result.page_id)
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+def import_notes(syncer, source: str, database_id: str, manifest: SyncManifest,
+                 schema_cache: Optional[SchemaCache] = None, workers: int = DEFAULT_IMPORT_WORKERS,
+                 split_tables: bool = False, prune: bool = False, force: bool = False) -> List[FileResult]:
+    """
+    Imports a folder (or glob) of notes as rows of a Notion database.
+    Front matter fields become row properties and the body becomes the row's
+    content. Rows are created concurrently under the syncer's rate limit;
+    like `np sync`, only notes that changed since the last import are sent.
+
+    Args:
+        syncer: NotionSync used for all requests.
+        source: Directory or glob pattern.
+        database_id: Database to import into.
+        manifest: Import state from previous runs (updated and saved).
+        schema_cache: Cache of the database schema (fetched once if omitted).
+        workers: Rows created concurrently.
+        split_tables: Apply split_large_tables (config `table_overflow: split`).
+        prune: Archive rows of notes that no longer exist.
+        force: Re-send every note, even if unchanged.
+
+    Returns:
+        One FileResult per note (and per pruned row).
+    """
+    schema = fetch_schema(syncer, database_id, schema_cache)
+    base, paths = collect_files(source)
+    known = manifest.files(database_id)
+    changed, unchanged = detect_changes(base, paths, known, force)
+    results = [FileResult(path=rel, status="unchanged", page_id=known[rel]["page_id"]) for rel in unchanged]
+    logger.info(f"🔍 {len(paths)} note(s) in {source}: {len(changed)} to import, {len(unchanged)} unchanged")
+
+    unmapped: Counter = Counter()
+    lock = threading.Lock()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {
+                executor.submit(_import_note, syncer, schema, record, (known.get(record["rel"]) or {}).get("page_id"),
+                                split_tables, unmapped, lock): record
+                for record in changed
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                record = futures[future]
+                result = future.result()
+                results.append(result)
+                if result.status == "uploaded":
+                    known[record["rel"]] = {"mtime": record["mtime"], "size": record["size"], "hash": record["hash"],
+                                            "page_id": result.page_id, "url": result.url}
+                    logger.info(f"[{done}/{len(changed)}] ✅ {result.path} ({result.blocks} blocks, {result.elapsed:.1f}s)")
+                    if done % SAVE_EVERY == 0:
+                        manifest.save()
+                else:
+                    logger.error(f"[{done}/{len(changed)}] ❌ {result.path}: {result.error}")
+    finally:
+        manifest.save()
+
+    if unmapped:
+        fields = ", ".join(f"{key} x{count}" for key, count in unmapped.most_common())
+        logger.warning(f"⚠️ Front matter fields without a matching property (ignored): {fields}")
+    if schema_cache and any(r.status == "failed" for r in results):
+        # Failures may come from a schema that changed since it was cached
+        schema_cache.invalidate(database_id)
+        schema_cache.save()
+
+    if prune:
+        present = {os.path.relpath(p, base) for p in paths}
+        for rel in [rel for rel in known if rel not in present]:
+            archive_page(syncer, known[rel]["page_id"])
+            results.append(FileResult(path=rel, status="pruned", page_id=known.pop(rel)["page_id"]))
+            logger.info(f"🗑️  Archived row of removed note {rel}")
+        manifest.save()
+
+    return results
@@ -0,0 +1,393 @@
+import os
+import glob
+import time
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Tuple
+
+from src.utils import state_path, JsonStateFile
+from src.parser import parse_markdown_to_blocks, split_large_tables
+from src.links import LinkResolver, rewrite_links
+from src.validate import validate_blocks
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "sync_manifest.json"
+DEFAULT_UPLOAD_WORKERS = 4
+SAVE_EVERY = 20  # Uploads between manifest saves, so an interrupted run keeps its progress
+
+
+@dataclass
+class FileResult:
+    """Outcome of syncing one file."""
+    path: str
+    status: str  # uploaded | unchanged | failed | pruned
+    page_id: Optional[str] = None
+    url: Optional[str] = None
+    blocks: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    links: List[str] = field(default_factory=list)  # Notes this one links to (with resolve_links)
+
+
+class SyncManifest(JsonStateFile):
+    """
+    Records, per parent page and relative file path, the file state last
+    synced (mtime, size, content hash) and the page it was synced to.
+    Callers edit the dict returned by files() in place, so every save()
+    writes the file.
+    """
+    indent = 1
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path or state_path(MANIFEST_FILE), "sync manifest")
+
+    def files(self, parent_id: str) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            return self.entries.setdefault(parent_id, {})
+
+    def save(self):
+        self.dirty = True
+        super().save()
+
+
+def collect_files(source: str) -> Tuple[str, List[str]]:
+    """
+    Expands a directory (all *.md files, recursively) or a glob pattern.
+    For a glob, relative paths start at its last directory without wildcards,
+    so they don't change as files matching it come and go.
+
+    Returns:
+        (base directory for relative paths, sorted list of file paths)
+    """
+    if os.path.isdir(source):
+        base = source
+        paths = glob.glob(os.path.join(source, "**", "*.md"), recursive=True)
+    else:
+        paths = glob.glob(source, recursive=True)
+        base = os.path.dirname(source)
+        while glob.has_magic(base):
+            base = os.path.dirname(base)
+        base = base or "."
+    return base, sorted(p for p in paths if os.path.isfile(p))
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_title_for(rel_path: str) -> str:
+    """
+    Page title of a synced file: its relative path without the extension.
+    """
+    return os.path.splitext(rel_path.replace(os.sep, "/"))[0]
+
+
+def detect_changes(base: str, paths: List[str], known: Dict[str, Dict[str, Any]],
+                   force: bool = False) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Splits files into changed and unchanged ones. A file whose mtime and size
+    match the manifest is unchanged without reading it; otherwise its content
+    hash decides (a touched but identical file only gets its mtime refreshed).
+
+    Returns:
+        (changed file records, relative paths of unchanged files)
+    """
+    changed = []
+    unchanged = []
+    for path in paths:
+        rel = os.path.relpath(path, base)
+        stat = os.stat(path)
+        record = {"rel": rel, "path": path, "mtime": stat.st_mtime, "size": stat.st_size}
+        entry = known.get(rel)
+        if entry and not force:
+            if entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                unchanged.append(rel)
+                continue
+            record["hash"] = file_digest(path)
+            if entry["hash"] == record["hash"]:
+                entry["mtime"] = stat.st_mtime
+                unchanged.append(rel)
+                continue
+        else:
+            record["hash"] = file_digest(path)
+        changed.append(record)
+    return changed, unchanged
+
+
+def add_dependents(base: str, changed: List[Dict[str, Any]], unchanged: List[str],
+                   known: Dict[str, Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Moves unchanged notes that link to a changed note into the changed set:
+    changed notes get new pages, so links to them must be rewritten. Repeats
+    until no more notes are affected.
+
+    Returns:
+        (changed file records, relative paths of unchanged files)
+    """
+    recreated = {record["rel"] for record in changed}
+    remaining = list(unchanged)
+    while True:
+        affected = [rel for rel in remaining if recreated.intersection(known[rel].get("links", []))]
+        if not affected:
+            return changed, remaining
+        for rel in affected:
+            entry = known[rel]
+            changed.append({"rel": rel, "path": os.path.join(base, rel), "mtime": entry["mtime"],
+                            "size": entry["size"], "hash": entry["hash"]})
+            recreated.add(rel)
+        remaining = [rel for rel in remaining if rel not in recreated]
+
+
+def preflight(rel: str, blocks: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Runs the pre-flight validator on a parsed file. Returns an error message
+    if the file can't be sent (nothing should be created for it), else None.
+    """
+    report = validate_blocks(blocks)
+    report.log(rel)
+    if report.errors:
+        return "Pre-flight check failed: " + "; ".join(f"{e.location}: {e.message}" for e in report.errors)
+    return None
+
+
+def _upload(syncer, parent_id: str, record: Dict[str, Any], blocks: List[Dict[str, Any]],
+            previous: Optional[str]) -> FileResult:
+    """
+    Creates the file's page and pushes its blocks. The page of the previous
+    version is archived only once the new one is complete.
+    """
+    result = FileResult(path=record["rel"], status="failed", blocks=len(blocks))
+    start = time.monotonic()
+    with syncer.lane(parent_id):
+        try:
+            result.page_id, result.url = syncer.create_child_page(page_title_for(record["rel"]), parent_id=parent_id)
+            syncer.push_blocks(result.page_id, blocks)
+            if previous:
+                archive_page(syncer, previous)
+            result.status = "uploaded"
+        except Exception as e:
+            result.error = str(e)
+            if result.page_id:
+                # Don't leave a half-written copy next to the previous version
+                archive_page(syncer, result.page_id)
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+def _push_body(syncer, record: Dict[str, Any], page: Tuple[str, Optional[str]], blocks: List[Dict[str, Any]],
+               links: List[str], previous: Optional[str]) -> FileResult:
+    """
+    Second phase of a linked sync: pushes a note's blocks (links already
+    rewritten) into the page shell created for it.
+    """
+    result = FileResult(path=record["rel"], status="failed", page_id=page[0], url=page[1],
+                        blocks=len(blocks), links=links)
+    start = time.monotonic()
+    with syncer.lane(syncer.root_page_id):
+        try:
+            syncer.push_blocks(result.page_id, blocks)
+            if previous:
+                archive_page(syncer, previous)
+            result.status = "uploaded"
+        except Exception as e:
+            result.error = str(e)
+            archive_page(syncer, result.page_id)
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+def _push_linked(syncer, parent_id: str, changed: List[Dict[str, Any]], unchanged: List[str],
+                 known: Dict[str, Dict[str, Any]],
+                 upload_pool: ThreadPoolExecutor, parse_pool: Optional[ProcessPoolExecutor],
+                 split_tables: bool, record_result):
+    """
+    Two-phase upload of notes that link to each other. Phase 1 creates an
+    empty page for every changed note (while the notes are parsed), so every
+    link target has an ID before any body is sent; phase 2 pushes the bodies
+    with their links rewritten. Links cost no extra requests, cycles included.
+    A note that fails the pre-flight check only costs its (archived) shell.
+    """
+    shells = {record["rel"]: upload_pool.submit(syncer.create_child_page, page_title_for(record["rel"]), parent_id)
+              for record in changed}
+    parsing = {record["rel"]: parse_pool.submit(parse_markdown_to_blocks, record["path"])
+               for record in changed} if parse_pool else {}
+
+    pages = {rel: (known[rel]["page_id"], known[rel].get("url")) for rel in unchanged}
+    errors = {}
+    for rel, future in shells.items():
+        try:
+            pages[rel] = future.result()
+        except Exception as e:
+            errors[rel] = f"Page creation failed: {e}"
+    resolver = LinkResolver(pages)
+
+    pending = {}
+    for record in changed:
+        rel = record["rel"]
+        try:
+            blocks = parsing[rel].result() if parse_pool else parse_markdown_to_blocks(record["path"])
+        except Exception as e:
+            errors.setdefault(rel, f"Parse error: {e}")
+        if rel not in errors:
+            if split_tables:
+                blocks = split_large_tables(blocks)
+            linked, unresolved = rewrite_links(blocks, rel, resolver)
+            if unresolved:
+                logger.warning(f"⚠️ {rel}: unresolved link(s) left as text: {', '.join(sorted(set(unresolved)))}")
+            # After the rewrite, so links to other notes are checked in their final form
+            error = preflight(rel, blocks)
+            if error:
+                errors[rel] = error
+        if rel in errors:
+            if rel in shells and not shells[rel].exception():
+                archive_page(syncer, pages[rel][0])
+            record_result(FileResult(path=rel, status="failed", error=errors[rel]), record)
+            continue
+        previous = (known.get(rel) or {}).get("page_id")
+        pending[upload_pool.submit(_push_body, syncer, record, pages[rel], blocks, sorted(linked), previous)] = record
+
+    for future in as_completed(pending):
+        record_result(future.result(), pending[future])
+
+
+def archive_page(syncer, page_id: str):
+    """
+    Archives (moves to trash) a page. Pages that are already gone are ignored.
+    """
+    try:
+        syncer._call("pages.update", page_id=page_id, archived=True)
+    except Exception as e:
+        if getattr(e, "status", None) != 404:
+            logger.warning(f"⚠️ Could not archive page {page_id}: {e}")
+
+
+def sync_directory(syncer, source: str, parent_id: str, manifest: SyncManifest,
+                   workers: int = DEFAULT_UPLOAD_WORKERS, parse_workers: Optional[int] = None,
+                   split_tables: bool = False, prune: bool = False, force: bool = False,
+                   resolve_links: bool = False) -> List[FileResult]:
+    """
+    Mirrors a folder (or glob) of Markdown notes as child pages of `parent_id`.
+
+    Only files whose content changed since the last sync are parsed and sent.
+    Parsing runs in a process pool; each parsed file is handed straight to a
+    thread pool of uploaders sharing the syncer's rate limit.
+
+    Args:
+        syncer: NotionSync used for all requests.
+        source: Directory or glob pattern.
+        parent_id: Page under which the notes are mirrored.
+        manifest: Sync state from previous runs (updated and saved).
+        workers: Files uploaded concurrently.
+        parse_workers: Parser processes (default: CPU count; 1 parses in-process).
+        split_tables: Apply split_large_tables (config `table_overflow: split`).
+        prune: Archive pages of files that no longer exist.
+        force: Re-send every file, even if unchanged.
+        resolve_links: Turn [[wikilinks]] and relative .md links between the
+            notes into page mentions and URLs (see _push_linked). Notes linking
+            to a changed note are re-sent, as its page is replaced.
+
+    Returns:
+        One FileResult per file (and per pruned page).
+    """
+    base, paths = collect_files(source)
+    known = manifest.files(parent_id)
+    changed, unchanged = detect_changes(base, paths, known, force)
+    if resolve_links:
+        changed, unchanged = add_dependents(base, changed, unchanged, known)
+    results = [FileResult(path=rel, status="unchanged", page_id=known[rel]["page_id"]) for rel in unchanged]
+    logger.info(f"🔍 {len(paths)} file(s) in {source}: {len(changed)} to sync, {len(unchanged)} unchanged")
+
+    total = len(changed)
+    done = 0
+
+    def record_result(result: FileResult, record: Dict[str, Any]):
+        nonlocal done
+        done += 1
+        results.append(result)
+        if result.status == "uploaded":
+            known[record["rel"]] = {"mtime": record["mtime"], "size": record["size"], "hash": record["hash"],
+                                    "page_id": result.page_id, "url": result.url}
+            if result.links:
+                known[record["rel"]]["links"] = result.links
+            logger.info(f"[{done}/{total}] ✅ {result.path} ({result.blocks} blocks, {result.elapsed:.1f}s)")
+            if done % SAVE_EVERY == 0:
+                manifest.save()
+        else:
+            logger.error(f"[{done}/{total}] ❌ {result.path}: {result.error}")
+
+    parse_workers = parse_workers or os.cpu_count() or 1
+    parse_pool = ProcessPoolExecutor(parse_workers) if parse_workers > 1 and total > 1 else None
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as upload_pool:
+            if resolve_links:
+                _push_linked(syncer, parent_id, changed, unchanged, known, upload_pool, parse_pool,
+                             split_tables, record_result)
+            else:
+                pending = {}
+
+                def parsed(record: Dict[str, Any], get_blocks):
+                    # Hands a parsed file to the uploaders (or records its parse error)
+                    try:
+                        blocks = get_blocks()
+                    except Exception as e:
+                        record_result(FileResult(path=record["rel"], status="failed", error=f"Parse error: {e}"), record)
+                        return
+                    if split_tables:
+                        blocks = split_large_tables(blocks)
+                    error = preflight(record["rel"], blocks)
+                    if error:
+                        record_result(FileResult(path=record["rel"], status="failed", error=error), record)
+                        return
+                    previous = (known.get(record["rel"]) or {}).get("page_id")
+                    pending[upload_pool.submit(_upload, syncer, parent_id, record, blocks, previous)] = ("upload", record)
+
+                for record in changed:
+                    if parse_pool:
+                        pending[parse_pool.submit(parse_markdown_to_blocks, record["path"])] = ("parse", record)
+                    else:
+                        parsed(record, lambda: parse_markdown_to_blocks(record["path"]))
+
+                while pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        stage, record = pending.pop(future)
+                        if stage == "upload":
+                            record_result(future.result(), record)
+                        else:
+                            parsed(record, future.result)
+    finally:
+        if parse_pool:
+            parse_pool.shutdown(cancel_futures=True)
+        manifest.save()
+
+    if prune:
+        present = {os.path.relpath(p, base) for p in paths}
+        for rel in [rel for rel in known if rel not in present]:
+            archive_page(syncer, known[rel]["page_id"])
+            results.append(FileResult(path=rel, status="pruned", page_id=known.pop(rel)["page_id"]))
+            logger.info(f"🗑️  Archived page of removed file {rel}")
+        manifest.save()
+
+    return results
+
+
+def format_report(results: List[FileResult], elapsed: float) -> str:
+    """
+    Final summary: counts per status, then the failures.
+    """
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r.status] = counts.get(r.status, 0) + 1
+    lines = [f"{counts.get('uploaded', 0)} uploaded, {counts.get('unchanged', 0)} unchanged, "
+             f"{counts.get('failed', 0)} failed, {counts.get('pruned', 0)} pruned in {elapsed:.1f}s"]
+    for r in results:
+        if r.status == "failed":
+            lines.append(f"  ❌ {r.path}: {r.error}")
+    return "\n".join(lines)
@@ -0,0 +1,276 @@
+import logging
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from src.utils import state_path, JsonStateFile
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CACHE_FILE = "export_cache.json"
+DEFAULT_EXPORT_WORKERS = 4
+LIST_PAGE_SIZE = 100  # Maximum allowed by blocks.children.list
+# last_edited_time is truncated to the minute: a stamp is only trusted once
+# its minute is over (plus a minute of clock skew), or a later edit in the
+# same minute would keep the same stamp
+SETTLE_SECONDS = 120
+
+HEADING_PREFIX = {"heading_1": "# ", "heading_2": "## ", "heading_3": "### "}
+LIST_TYPES = ("bulleted_list_item", "numbered_list_item", "to_do")
+# Rendered as a link: their content is never fetched
+LINKED_TYPES = ("child_page", "child_database")
+
+
+class ExportCache(JsonStateFile):
+    """
+    Local cache of fetched block children (JSON file).
+
+    Each entry holds the children of one block, keyed by the block ID and
+    valid for as long as the block's last_edited_time is unchanged. Children
+    are stored without their own children, which have entries of their own.
+    Stamps of the last SETTLE_SECONDS are neither stored nor trusted.
+    Safe to share between threads.
+    """
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path or state_path(EXPORT_CACHE_FILE), "export cache")
+
+    def get(self, block_id: str, edited: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        with self.lock:
+            entry = self.entries.get(block_id)
+        if entry is None or not is_settled(edited) or entry["edited"] != edited:
+            return None
+        return entry["children"]
+
+    def put(self, block_id: str, edited: Optional[str], children: List[Dict[str, Any]]):
+        if is_settled(edited):
+            flat = [{k: v for k, v in child.items() if k != "children"} for child in children]
+            with self.lock:
+                self.entries[block_id] = {"edited": edited, "children": flat}
+                self.dirty = True
+
+
+def is_settled(edited: Optional[str], now: Optional[float] = None) -> bool:
+    """
+    Returns True if a last_edited_time stamp can no longer be reused by a
+    later edit (see SETTLE_SECONDS). Missing or unreadable stamps never are.
+    """
+    if not edited:
+        return False
+    try:
+        stamp = datetime.fromisoformat(edited.replace("Z", "+00:00"))
+    except ValueError:
+        return False
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    now = datetime.now(timezone.utc).timestamp() if now is None else now
+    return now - stamp.timestamp() >= SETTLE_SECONDS
+
+
+def list_children(syncer, block_id: str) -> List[Dict[str, Any]]:
+    """
+    Returns all children of a block, following pagination cursors.
+    """
+    children = []
+    cursor = None
+    while True:
+        kwargs = {"block_id": block_id, "page_size": LIST_PAGE_SIZE}
+        if cursor:
+            kwargs["start_cursor"] = cursor
+        response = syncer._call("blocks.children.list", **kwargs)
+        children.extend(response.get("results", []))
+        if not response.get("has_more"):
+            return children
+        cursor = response.get("next_cursor")
+
+
+def fetch_tree(syncer, block_id: str, cache: Optional[ExportCache] = None,
+               max_workers: int = DEFAULT_EXPORT_WORKERS) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Fetches the block tree below `block_id`, one depth level at a time.
+    All blocks of a level are listed concurrently (at most `max_workers`
+    at once, under the syncer's rate limit). Blocks whose last_edited_time
+    matches the cache are not listed again. An edit deep in the tree need
+    not touch its ancestors' stamps, so only stamps fresh from the API are
+    compared: the children of a cached listing carry the stamps they had
+    then, and are listed again themselves. Subpages and child databases
+    are rendered as links, so nothing below them is listed.
+    Child blocks are attached to their parent under the "children" key.
+
+    Returns:
+        (top-level blocks, number of blocks whose children were listed)
+    """
+    root = syncer._call("blocks.retrieve", block_id=block_id)
+    top: List[Dict[str, Any]] = []
+    # (block ID, last_edited_time, list to fill, whether the stamp is fresh)
+    frontier = [(block_id, root.get("last_edited_time"), top, True)]
+    fetched = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while frontier:
+            missing = []
+            next_frontier = []
+            for parent_id, edited, target, fresh in frontier:
+                cached = cache.get(parent_id, edited) if cache and fresh else None
+                if cached is None:
+                    missing.append((parent_id, edited, target))
+                else:
+                    # Copies, so attaching grandchildren never touches the cache
+                    target.extend(dict(child) for child in cached)
+                    next_frontier.extend(_expand(target, fresh=False))
+
+            listed = executor.map(lambda item: list_children(syncer, item[0]), missing)
+            for (parent_id, edited, target), children in zip(missing, listed):
+                fetched += 1
+                target.extend(children)
+                if cache:
+                    cache.put(parent_id, edited, children)
+                next_frontier.extend(_expand(target, fresh=True))
+            frontier = next_frontier
+
+    return top, fetched
+
+
+def _expand(blocks: List[Dict[str, Any]], fresh: bool) -> List[Tuple[str, Optional[str], List[Dict[str, Any]], bool]]:
+    # Frontier entries for the blocks whose children are still to be fetched
+    entries = []
+    for block in blocks:
+        if block.get("has_children") and block.get("type") not in LINKED_TYPES:
+            block["children"] = []
+            entries.append((block["id"], block.get("last_edited_time"), block["children"], fresh))
+    return entries
+
+
+def render_rich_text(rich_text: List[Dict[str, Any]]) -> str:
+    """
+    Renders rich text back to inline Markdown (inverse of parse_inline_elements).
+    """
+    parts = []
+    for item in rich_text:
+        kind = item.get("type", "text")
+        if kind == "equation":
+            parts.append(f"${item['equation']['expression']}$")
+            continue
+        if kind == "text":
+            content = item["text"]["content"]
+            link = (item["text"].get("link") or {}).get("url")
+        else:
+            # Mentions: keep the text Notion displays
+            content = item.get("plain_text", "")
+            link = item.get("href")
+
+        annotations = item.get("annotations", {})
+        if annotations.get("code"):
+            content = f"`{content}`"
+        if link:
+            content = f"[{content}]({link})"
+        if annotations.get("italic"):
+            content = f"*{content}*"
+        if annotations.get("bold"):
+            content = f"**{content}**"
+        if annotations.get("strikethrough"):
+            content = f"~~{content}~~"
+        parts.append(content)
+    return "".join(parts)
+
+
+def _render_table(block: Dict[str, Any], pad: str) -> List[str]:
+    lines = []
+    for n, row in enumerate(block.get("children", [])):
+        cells = [render_rich_text(cell) for cell in row["table_row"]["cells"]]
+        lines.append(pad + "| " + " | ".join(cells) + " |")
+        if n == 0:
+            lines.append(pad + "|" + "---|" * len(cells))
+    return lines
+
+
+def render_block(block: Dict[str, Any], indent: int = 0, number: int = 1) -> List[str]:
+    """
+    Renders one block (and its children) to Markdown lines, mapping each
+    block type back to the syntax the parser reads it from.
+    """
+    kind = block["type"]
+    body = block.get(kind, {})
+    pad = " " * indent
+    text = render_rich_text(body.get("rich_text", []))
+    children = block.get("children") or body.get("children") or []
+
+    if kind in HEADING_PREFIX:
+        lines = [pad + HEADING_PREFIX[kind] + text]
+    elif kind == "paragraph":
+        lines = [pad + text]
+    elif kind == "bulleted_list_item":
+        lines = [pad + "- " + text]
+    elif kind == "numbered_list_item":
+        lines = [pad + f"{number}. " + text]
+    elif kind == "to_do":
+        lines = [pad + ("- [x] " if body.get("checked") else "- [ ] ") + text]
+    elif kind == "toggle":
+        lines = [pad + "- " + text]
+    elif kind in ("quote", "callout"):
+        if text:
+            return [pad + "> " + text] + render_blocks(children, indent + 2)
+        # Quote wrapping a list item, as produced by the parser for "> - item"
+        return [pad + "> " + line.lstrip() for line in render_blocks(children)]
+    elif kind == "code":
+        language = body.get("language", "plain text")
+        fence = "```" + ("" if language == "plain text" else language)
+        code = "".join(part.get("plain_text") or part.get("text", {}).get("content", "")
+                       for part in body.get("rich_text", []))
+        return [pad + fence] + code.split("\n") + [pad + "```"]
+    elif kind == "equation":
+        return [pad + "$$", pad + body.get("expression", ""), pad + "$$"]
+    elif kind == "divider":
+        return [pad + "---"]
+    elif kind == "image":
+        source = body.get(body.get("type", "external"), {})
+        return [pad + f"![]({source.get('url', '')})"]
+    elif kind == "table":
+        return _render_table(block, pad)
+    elif kind in ("bookmark", "embed", "link_preview"):
+        return [pad + body.get("url", "")]
+    elif kind in LINKED_TYPES:
+        return [pad + f"[{body.get('title', '')}]({block.get('url') or block['id']})"]
+    else:
+        logger.warning(f"⚠️ Exporting unsupported block type '{kind}' as a comment")
+        return [pad + f"<!-- unsupported block: {kind} -->"]
+
+    return lines + render_blocks(children, indent + 2)
+
+
+def render_blocks(blocks: List[Dict[str, Any]], indent: int = 0) -> List[str]:
+    """
+    Renders sibling blocks. Consecutive items of the same list stay on
+    adjacent lines; other blocks are separated by a blank line at the top level.
+    """
+    lines: List[str] = []
+    previous = None
+    number = 0
+    for block in blocks:
+        kind = block["type"]
+        number = number + 1 if kind == "numbered_list_item" and previous == kind else 1
+        if lines and indent == 0 and not (kind in LIST_TYPES and kind == previous):
+            lines.append("")
+        lines.extend(render_block(block, indent, number))
+        previous = kind
+    return lines
+
+
+def export_page(syncer, page_id: str, cache: Optional[ExportCache] = None,
+                max_workers: int = DEFAULT_EXPORT_WORKERS) -> str:
+    """
+    Fetches a page's content and renders it as Markdown.
+
+    Args:
+        syncer: NotionSync (or anything with a compatible `_call`).
+        page_id: Page (or block) to export.
+        cache: Children cache; unchanged subtrees are served from it.
+        max_workers: Maximum concurrent children.list requests.
+
+    Returns:
+        The Markdown document.
+    """
+    blocks, fetched = fetch_tree(syncer, page_id, cache, max_workers)
+    if cache:
+        cache.save()
+    logger.info(f"📤 Exported {page_id}: {len(blocks)} top-level blocks, {fetched} children listing(s) fetched")
+    return "\n".join(render_blocks(blocks)) + "\n"
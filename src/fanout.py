@@ -0,0 +1,104 @@
+import time
+import logging
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Kept out of the runtime imports so thin clients can format results cheaply
+    from src.client import NotionSync
+    from src.undo import SyncRecord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FANOUT_WORKERS = 4
+
+
+@dataclass
+class TargetResult:
+    """Outcome of pushing the document to a single target page."""
+    target: str
+    page_id: Optional[str] = None
+    url: Optional[str] = None
+    ok: bool = False
+    batches: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    status: Optional[int] = None  # HTTP status of the failure, if any
+
+
+def _push_one(syncer: "NotionSync", page_id: str, batches: List[List[Dict[str, Any]]],
+              title: str, new_page: bool, record: Optional["SyncRecord"]) -> TargetResult:
+    result = TargetResult(target=page_id)
+    start = time.monotonic()
+    try:
+        # With a token pool, each target is pushed with its own token
+        with syncer.lane(page_id):
+            if new_page:
+                result.page_id, result.url = syncer.create_child_page(title, parent_id=page_id, record=record)
+            else:
+                result.page_id = page_id
+            syncer.push_batches(result.page_id, batches, record=record)
+        result.batches = len(batches)
+        result.ok = True
+    except Exception as e:
+        # Isolated per target: one failing page must not abort the others
+        result.error = str(e)
+        result.status = getattr(e, "status", None)
+        logger.error(f"❌ Target {page_id} failed: {e}")
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+def fan_out(syncer: "NotionSync", page_ids: List[str], blocks: List[Dict[str, Any]],
+            title: str, new_page: bool = False,
+            max_workers: int = DEFAULT_FANOUT_WORKERS,
+            record: Optional["SyncRecord"] = None) -> List[TargetResult]:
+    """
+    Pushes one parsed document to several pages concurrently.
+
+    The blocks are chunked once and the same batches are shared by every target.
+    Each target runs independently: transient errors are retried per request by
+    NotionSync, and a target that still fails does not affect the others.
+
+    Args:
+        syncer: Shared client; its rate limiter bounds the total request rate.
+        page_ids: Target page IDs (already extracted).
+        blocks: Parsed Notion blocks.
+        title: Child page title when `new_page` is set.
+        new_page: Create a child page under each target instead of appending.
+        max_workers: Number of targets pushed in parallel.
+        record: Collects what was created on every target, for `np undo`.
+
+    Returns:
+        One TargetResult per target, in input order.
+    """
+    from src.client import chunk_blocks
+
+    batches = chunk_blocks(blocks)
+    workers = max(1, min(max_workers, len(page_ids)))
+    logger.info(f"📡 Fan-out: {len(blocks)} blocks in {len(batches)} batches -> {len(page_ids)} targets ({workers} workers)")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_push_one, syncer, page_id, batches, title, new_page, record) for page_id in page_ids]
+        return [future.result() for future in futures]
+
+
+def format_summary(results: List[TargetResult]) -> str:
+    """
+    Renders the fan-out results as a plain-text table.
+    """
+    header = ("TARGET", "STATUS", "BATCHES", "TIME", "DETAIL")
+    rows = []
+    for r in results:
+        detail = (r.url or r.page_id or "") if r.ok else (r.error or "")
+        rows.append((r.target, "ok" if r.ok else "FAILED", str(r.batches), f"{r.elapsed:.1f}s", detail))
+
+    widths = [max(len(row[col]) for row in [header] + rows) for col in range(len(header) - 1)]
+    lines = []
+    for row in [header] + rows:
+        cells = [cell.ljust(width) for cell, width in zip(row, widths)]
+        lines.append("  ".join(cells + [row[-1]]))
+    ok = sum(1 for r in results if r.ok)
+    lines.append(f"{ok}/{len(results)} targets succeeded")
+    return "\n".join(lines)
@@ -0,0 +1,169 @@
+import os
+import re
+import logging
+from urllib.parse import unquote
+from typing import List, Dict, Any, Optional, Tuple, Set
+
+logger = logging.getLogger(__name__)
+
+# [[Note]], [[folder/Note]], [[Note#Heading]], [[Note|shown text]]
+WIKILINK_PATTERN = re.compile(r'\[\[([^\[\]|#\n]+)(?:#([^\[\]|\n]*))?(?:\|([^\[\]\n]+))?\]\]')
+# Link targets that are not local files
+EXTERNAL_LINK = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//|#)')
+
+
+def note_key(name: str) -> str:
+    """
+    Lookup key of a note: its relative path without the .md extension,
+    with forward slashes, case-insensitive.
+    """
+    name = name.strip().replace("\\", "/")
+    if name.lower().endswith(".md"):
+        name = name[:-3]
+    return name.strip("/").casefold()
+
+
+def page_url(page_id: str) -> str:
+    return f"https://www.notion.so/{page_id.replace('-', '')}"
+
+
+class LinkResolver:
+    """
+    Maps link targets in a set of notes to their pages.
+
+    Wikilinks match a note by relative path, or by file name when that is
+    unique; relative Markdown links ("../other.md") are resolved against the
+    linking note's folder.
+    """
+    def __init__(self, pages: Dict[str, Tuple[str, Optional[str]]]):
+        """
+        Args:
+            pages: Relative note path -> (page_id, page_url or None).
+        """
+        self.pages = pages
+        self.by_path: Dict[str, str] = {}
+        self.by_name: Dict[str, List[str]] = {}
+        for rel in pages:
+            key = note_key(rel)
+            self.by_path[key] = rel
+            self.by_name.setdefault(key.rsplit("/", 1)[-1], []).append(rel)
+
+    def resolve_name(self, name: str) -> Optional[str]:
+        """
+        Returns the relative path of the note a wikilink points to, if known.
+        """
+        key = note_key(name)
+        if key in self.by_path:
+            return self.by_path[key]
+        candidates = self.by_name.get(key, [])
+        return candidates[0] if len(candidates) == 1 else None
+
+    def resolve_href(self, source: str, href: str) -> Optional[str]:
+        """
+        Returns the relative path of the note a Markdown link from `source`
+        points to, if it is a local .md file that is part of the sync.
+        """
+        if not href or EXTERNAL_LINK.match(href):
+            return None
+        path = unquote(href.split("#", 1)[0])
+        if not path.lower().endswith(".md"):
+            return None
+        joined = os.path.normpath(os.path.join(os.path.dirname(source), path))
+        return self.by_path.get(note_key(joined))
+
+    def page(self, rel: str) -> Tuple[str, str]:
+        page_id, url = self.pages[rel]
+        return page_id, url or page_url(page_id)
+
+
+def _link_item(item: Dict[str, Any], content: str, url: str) -> Dict[str, Any]:
+    new = {"text": {"content": content, "link": {"url": url}}}
+    if item.get("annotations"):
+        new["annotations"] = item["annotations"]
+    return new
+
+
+def _rewrite_item(item: Dict[str, Any], source: str, resolver: LinkResolver,
+                  linked: Set[str], unresolved: List[str]) -> List[Dict[str, Any]]:
+    text = item["text"]
+    link = (text.get("link") or {}).get("url")
+    if link:
+        target = resolver.resolve_href(source, link)
+        if target is None:
+            return [item]
+        linked.add(target)
+        return [_link_item(item, text["content"], resolver.page(target)[1])]
+
+    content = text["content"]
+    if "[[" not in content or (item.get("annotations") or {}).get("code"):
+        return [item]
+
+    annotations = item.get("annotations")
+    result = []
+    last = 0
+    for match in WIKILINK_PATTERN.finditer(content):
+        name, heading, alias = match.groups()
+        target = resolver.resolve_name(name)
+        if target is None:
+            unresolved.append(name.strip())
+            continue
+        linked.add(target)
+        if match.start() > last:
+            result.append(dict(item, text={"content": content[last:match.start()]}))
+        page_id, url = resolver.page(target)
+        if alias or heading:
+            # Mentions always show the page title; keep custom text as a link
+            result.append(_link_item(item, (alias or f"{name}#{heading}").strip(), url))
+        else:
+            mention = {"type": "mention", "mention": {"type": "page", "page": {"id": page_id}}}
+            if annotations:
+                mention["annotations"] = annotations
+            result.append(mention)
+        last = match.end()
+    if not result:
+        return [item]
+    if last < len(content):
+        result.append(dict(item, text={"content": content[last:]}))
+    return result
+
+
+def _rewrite_rich_text(rich_text: List[Dict[str, Any]], source: str, resolver: LinkResolver,
+                       linked: Set[str], unresolved: List[str]) -> List[Dict[str, Any]]:
+    result = []
+    for item in rich_text:
+        if item.get("type", "text") == "text":
+            result.extend(_rewrite_item(item, source, resolver, linked, unresolved))
+        else:
+            result.append(item)
+    return result
+
+
+def rewrite_links(blocks: List[Dict[str, Any]], source: str, resolver: LinkResolver,
+                  linked: Optional[Set[str]] = None, unresolved: Optional[List[str]] = None) -> Tuple[Set[str], List[str]]:
+    """
+    Rewrites, in place, links between notes: [[wikilinks]] become page
+    mentions (links when they carry custom text or a heading) and relative
+    .md links point to the target's page URL. Unresolved wikilinks stay as
+    plain text.
+
+    Args:
+        blocks: Parsed blocks of the note at relative path `source`.
+        source: Relative path of the note (for relative links).
+        resolver: Known notes and their pages.
+
+    Returns:
+        (relative paths of the linked notes, names of unresolved wikilinks)
+    """
+    linked = set() if linked is None else linked
+    unresolved = [] if unresolved is None else unresolved
+    for block in blocks:
+        body = block.get(block.get("type"), {})
+        if not isinstance(body, dict):
+            continue
+        if "rich_text" in body and block["type"] != "code":
+            body["rich_text"] = _rewrite_rich_text(body["rich_text"], source, resolver, linked, unresolved)
+        if "cells" in body:
+            body["cells"] = [_rewrite_rich_text(cell, source, resolver, linked, unresolved) for cell in body["cells"]]
+        if body.get("children"):
+            rewrite_links(body["children"], source, resolver, linked, unresolved)
+    return linked, unresolved
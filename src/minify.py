@@ -0,0 +1,98 @@
+import logging
+from typing import List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+MAX_TEXT_LENGTH = 2000  # Characters per rich_text content; merged runs stay under it
+
+# Keys whose value equals the API default, per block body. Removing them
+# leaves the request unchanged for Notion but makes it smaller.
+DEFAULT_BODY_KEYS = {
+    "table": {"has_column_header": False, "has_row_header": False},
+}
+
+
+def _strip_defaults(item: Dict[str, Any]):
+    # False and "default" annotations and a null link are what the API assumes anyway
+    annotations = item.get("annotations")
+    if annotations is not None:
+        for key in [k for k, v in annotations.items() if not v or v == "default"]:
+            del annotations[key]
+        if not annotations:
+            del item["annotations"]
+    if item.get("type", "text") == "text":
+        item.pop("type", None)
+        if "link" in item["text"] and not item["text"]["link"]:
+            del item["text"]["link"]
+
+
+def coalesce_rich_text(rich_text: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Minimizes a rich_text array in place and returns it: adjacent text runs
+    with the same annotations and link are merged (up to 2000 characters),
+    empty text runs are dropped, and default values are left out
+    ("type": "text", false annotations, null links).
+    """
+    if len(rich_text) == 1 and len(rich_text[0]) == 2 and rich_text[0].get("type") == "text":
+        # Single plain run, as the parser emits for most table cells
+        item = rich_text[0]
+        del item["type"]
+        if not item["text"]["content"]:
+            rich_text.clear()
+        return rich_text
+
+    result: List[Dict[str, Any]] = []
+    previous = None
+    for item in rich_text:
+        _strip_defaults(item)
+        text = item.get("text")
+        if text is None or "type" in item:
+            # Equations and mentions are kept as they are
+            result.append(item)
+            previous = None
+            continue
+        if not text["content"]:
+            continue
+        if (previous is not None and previous.get("annotations") == item.get("annotations")
+                and previous["text"].get("link") == text.get("link")
+                and len(previous["text"]["content"]) + len(text["content"]) <= MAX_TEXT_LENGTH):
+            previous["text"]["content"] += text["content"]
+            continue
+        result.append(item)
+        previous = item
+    rich_text[:] = result
+    return rich_text
+
+
+def minify_block(block: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Minifies one block and its children in place (see coalesce_rich_text).
+    The "object": "block" marker is dropped; "type" is kept, as the rest
+    of the pipeline dispatches on it.
+    """
+    block.pop("object", None)
+    kind = block.get("type")
+    body = block.get(kind)
+    if not isinstance(body, dict):
+        return block
+
+    for key, default in DEFAULT_BODY_KEYS.get(kind, {}).items():
+        if body.get(key, default) == default:
+            body.pop(key, None)
+    if "rich_text" in body:
+        body["rich_text"] = coalesce_rich_text(body["rich_text"])
+    if "cells" in body:
+        body["cells"] = [coalesce_rich_text(cell) for cell in body["cells"]]
+    for child in body.get("children") or []:
+        minify_block(child)
+    return block
+
+
+def minify_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Minifies parsed blocks in place and returns them. Rendering in Notion is
+    unchanged; requests get smaller and carry fewer rich_text elements.
+    """
+    for block in blocks:
+        minify_block(block)
+    return blocks
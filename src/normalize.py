@@ -0,0 +1,184 @@
+import re
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Union, Callable
+
+logger = logging.getLogger(__name__)
+
+# Characters deleted (or mapped) in a single str.translate pass
+DEFAULT_TRANSLATION = {
+    0x200B: None,  # Zero-width space
+}
+
+# Fenced code and $$ equations (matched at line starts) are copied verbatim:
+# rules never run inside them. A fence left open runs to the end of the
+# buffer, as in the parser. Whole lines are skipped at a time until the closing line.
+PROTECTED_PATTERN = (
+    r'(?P<_fence>[^\S\n]*```[^\n]*(?:\n(?![^\S\n]*```[^\S\n]*$)[^\n]*)*(?:\n[^\S\n]*```[^\S\n]*$)?)|'
+    r'(?P<_math>[^\S\n]*\$\$[^\S\n]*$(?:\n(?![^\S\n]*\$\$[^\S\n]*$)[^\n]*)*(?:\n[^\S\n]*\$\$[^\S\n]*$)?)'
+)
+
+MAX_SAMPLES = 3  # Examples kept per rule for the summary line
+
+
+@dataclass
+class NormalizeRule:
+    """
+    A cleaning rule: every match of `pattern` is replaced by `replace`
+    (a string, or a function of the match object).
+
+    Patterns are combined into one regex (MULTILINE), so `^`/`$` match at line
+    boundaries; patterns starting with `^` are tried before the others at a
+    line start. Backreferences must use named groups, e.g. (?P<d>\\d)(?P=d).
+    """
+    name: str
+    pattern: str
+    replace: Union[str, Callable[[re.Match], str]] = ""
+
+
+def _table_row(match: re.Match) -> str:
+    # Full-width pipes (common in CJK LLM output) become a regular table row
+    row = match.group()
+    if '｜' not in row:
+        return row  # Plain table rows are only protected from the other rules
+    row = row.replace('｜', '|').strip()
+    if not row.startswith('|'):
+        row = '|' + row
+    if not row.endswith('|'):
+        row = row + '|'
+    return row
+
+
+BUILTIN_RULES = [
+    # Table rows: lines starting with '|' or containing '｜'. Listed first so
+    # cell contents (e.g. the number 1111) are left alone by the rules below.
+    NormalizeRule("table_row", r'^(?=[^\S\n]*\||[^\n]*｜)[^\n]*', _table_row),
+    # Empty blockquote lines ("> ", ">"): LLMs add them for spacing, Notion renders empty quotes
+    NormalizeRule("empty_quote", r'^[^\S\n]*>+[^\S\n]*$'),
+    # Artifact noise such as 1111 or 2222
+    NormalizeRule("digit_noise", r'(?P<_digit>\d)(?<!\w\d)(?P=_digit){3,}\b'),
+]
+
+
+class NoiseReport:
+    """
+    Aggregated counts (and a few examples) of what normalization changed.
+    """
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.samples: Dict[str, List[str]] = {}
+
+    def add(self, name: str, sample: str, count: int = 1):
+        self.counts[name] += count
+        samples = self.samples.setdefault(name, [])
+        if len(samples) < MAX_SAMPLES and sample and sample not in samples:
+            samples.append(sample)
+
+    def __bool__(self):
+        return bool(self.counts)
+
+    def summary(self) -> str:
+        parts = []
+        for name, count in self.counts.most_common():
+            examples = ", ".join(repr(s) for s in self.samples.get(name, []))
+            parts.append(f"{name} x{count}" + (f" (e.g. {examples})" if examples else ""))
+        return "; ".join(parts)
+
+    def log(self, source: str = "input"):
+        """
+        Emits one log line for the whole document instead of one per hit.
+        """
+        if self:
+            logger.info(f"🧹 [Noise Cleaning] {source}: {self.summary()}")
+
+
+class Normalizer:
+    """
+    Cleans a whole Markdown buffer before parsing, in two passes: one
+    str.translate call for single characters and one combined compiled
+    pattern for all rules. Keeping this out of the parser's per-line loop
+    means custom rules cost one regex alternative, not one pass each.
+    """
+    def __init__(self, rules: Optional[List[NormalizeRule]] = None,
+                 translation: Optional[Dict[int, Optional[str]]] = None):
+        self.rules = list(BUILTIN_RULES if rules is None else rules)
+        self.translation = dict(DEFAULT_TRANSLATION if translation is None else translation)
+        self._translated = [chr(code) for code in self.translation]
+        self._compile()
+
+    def _compile(self):
+        # Rules anchored at a line start share one '^' check, so most
+        # positions in the buffer are rejected by a single test
+        anchored = [PROTECTED_PATTERN]
+        floating = []
+        for n, rule in enumerate(self.rules):
+            if rule.pattern.startswith('^'):
+                anchored.append(f"(?P<_r{n}>{rule.pattern[1:]})")
+            else:
+                floating.append(f"(?P<_r{n}>{rule.pattern})")
+        combined = "^(?:" + "|".join(anchored) + ")"
+        if floating:
+            combined += "|" + "|".join(floating)
+        try:
+            self.pattern = re.compile(combined, re.MULTILINE)
+        except re.error as e:
+            raise ValueError(f"Invalid normalization rule pattern: {e}") from e
+
+    def add_rule(self, rule: NormalizeRule):
+        """
+        Registers a custom rule (applied after the existing ones).
+
+        Raises:
+            ValueError: If the pattern doesn't compile alongside the other rules.
+        """
+        self.rules.append(rule)
+        try:
+            self._compile()
+        except ValueError:
+            self.rules.pop()
+            self._compile()
+            raise
+
+    def normalize(self, text: str, report: Optional[NoiseReport] = None, verbatim: bool = False) -> str:
+        """
+        Returns the cleaned text.
+
+        Args:
+            text: Whole document (or a single line when streaming).
+            report: Collects what was changed. If omitted, a summary is logged here.
+            verbatim: Only apply the character translation (for lines known to
+                be inside a code fence or equation).
+        """
+        own_report = report is None
+        report = NoiseReport() if own_report else report
+
+        # translate() is slow on non-ASCII text; substring checks are not
+        cleaned = text
+        if any(char in text for char in self._translated):
+            cleaned = text.translate(self.translation)
+        if len(cleaned) != len(text):
+            report.add("invisible_chars", "", len(text) - len(cleaned))
+
+        if not verbatim:
+            cleaned = self.pattern.sub(lambda m: self._replace(m, report), cleaned)
+
+        if own_report:
+            report.log()
+        return cleaned
+
+    def _replace(self, match: re.Match, report: NoiseReport) -> str:
+        kind = match.lastgroup
+        found = match.group()
+        if kind in ("_fence", "_math"):
+            return found
+        rule = self.rules[int(kind[2:])]
+        result = rule.replace(match) if callable(rule.replace) else match.expand(rule.replace)
+        if result != found:
+            report.add(rule.name, found.strip()[:40])
+        return result
+
+
+# Used by the parser unless a Normalizer is passed explicitly.
+# Custom rules can be added with DEFAULT_NORMALIZER.add_rule(...).
+DEFAULT_NORMALIZER = Normalizer()
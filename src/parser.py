@@ -1,9 +1,35 @@
+import io
 import re
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Union, IO
+
+from src.normalize import Normalizer, DEFAULT_NORMALIZER
+from src.minify import minify_blocks
 
 logger = logging.getLogger(__name__)
 
+# Master Regex with Named Groups (compiled once; this runs for every line and table cell)
+# 0. Wikilink: [[...]] (kept literal here, resolved by src/links.py in multi-note syncs)
+# 1. Code: `...` (Backticks)
+# 2. Math: $...$ or $$...$$ (One or more $)
+# 3. Image: ![...](...) (Zero or more content)
+# 4. Link: [...](...) (Zero or more content - RELAXED from + to *)
+# 5. Bold: **...**
+# 6. Italic: *...* or _..._
+INLINE_PATTERN = re.compile(
+    r'(?P<wikilink>\[\[[^\[\]\n]+\]\])|'
+    r'(?P<code>`[^`]+`)|'
+    r'(?P<math>\$+(?:[^\$]+)\$+)|'
+    r'(?P<image>!\[[^\]]*\]\([^\)]*\))|'
+    r'(?P<link>\[[^\]]*\]\([^\)]*\))|'
+    r'(?P<bold>\*\*[^\*]+\*\*)|'
+    r'(?P<italic>\*(?:[^\*]+)\*|_(?:[^_]+)_)'
+)
+# Every inline construct above needs at least one of these characters
+INLINE_TRIGGER = re.compile(r'[`$\[*_]')
+LINK_PARTS = re.compile(r'^\[(.*?)\]\((.*?)\)$')
+TABLE_DIVIDER = re.compile(r'^[\s\|:\-－]+$')
+
 def parse_inline_elements(text_content: str) -> List[Dict[str, Any]]:
     """
     Parses inline elements using a robust scanner approach (re.finditer).
@@ -12,25 +38,14 @@ def parse_inline_elements(text_content: str) -> List[Dict[str, Any]]:
     if not text_content:
         return []
 
-    # Master Regex with Named Groups
-    # 1. Code: `...` (Backticks)
-    # 2. Math: $...$ or $$...$$ (One or more $)
-    # 3. Image: ![...](...) (Zero or more content)
-    # 4. Link: [...](...) (Zero or more content - RELAXED from + to *)
-    # 5. Bold: **...**
-    pattern = re.compile(
-        r'(?P<code>`[^`]+`)|'
-        r'(?P<math>\$+(?:[^\$]+)\$+)|'
-        r'(?P<image>!\[[^\]]*\]\([^\)]*\))|'
-        r'(?P<link>\[[^\]]*\]\([^\)]*\))|'
-        r'(?P<bold>\*\*[^\*]+\*\*)|'
-        r'(?P<italic>\*(?:[^\*]+)\*|_(?:[^_]+)_)'
-    )
+    # Fast path: plain text (most table cells) can't contain any inline element
+    if not INLINE_TRIGGER.search(text_content):
+        return [{"type": "text", "text": {"content": text_content}}]
 
     rich_text = []
     last_idx = 0
 
-    for match in pattern.finditer(text_content):
+    for match in INLINE_PATTERN.finditer(text_content):
         # 1. Handle Plain Text before the match
         if match.start() > last_idx:
             plain_text = text_content[last_idx:match.start()]
@@ -43,7 +58,11 @@ def parse_inline_elements(text_content: str) -> List[Dict[str, Any]]:
         kind = match.lastgroup
         full_match = match.group()
 
-        if kind == 'code':
+        if kind == 'wikilink':
+            # One literal run, so inner '_' or '*' never turn into italics
+            rich_text.append({"type": "text", "text": {"content": full_match}})
+
+        elif kind == 'code':
             content = full_match[1:-1] # Strip backticks
             rich_text.append({
                 "type": "text",
@@ -62,7 +81,7 @@ def parse_inline_elements(text_content: str) -> List[Dict[str, Any]]:
         elif kind == 'link':
             # Extract Text and URL from [Text](URL)
             # Relaxed regex to allow empty parts (.*?)
-            m = re.match(r'^\[(.*?)\]\((.*?)\)$', full_match)
+            m = LINK_PARTS.match(full_match)
             if m:
                 link_text = m.group(1)
                 # If text is empty, use URL as text
@@ -122,52 +141,57 @@ def parse_inline_elements(text_content: str) -> List[Dict[str, Any]]:
 
     return rich_text
 
-def create_table_block(rows: List[str]) -> Optional[Dict[str, Any]]:
+def create_table_block(rows: Iterable[str]) -> Optional[Dict[str, Any]]:
     """
-    Constructs a Notion table block from a list of markdown table rows.
+    Constructs a Notion table block from markdown table rows.
+    Rows are consumed one at a time, so a generator works as well as a list.
+    Full-width '｜' rows are expected to be converted already (see src.normalize).
     Returns None if no valid rows are found.
     
     Args:
-        rows: List of strings representing table rows.
+        rows: Strings representing table rows.
         
     Returns:
-        A Notion table block dictionary or None.
+        A Notion table block dictionary or None. Tables longer than Notion's
+        100-children limit are still returned whole; NotionSync.append_children
+        sends the extra rows in follow-up requests (see also split_large_tables).
+        The whole table is held in memory: table_width has to be known before
+        the first row can be sent, and the widest row may come last.
     """
     table_rows = []
     max_cols = 0
+    first_rows = []
     
-    parsed_rows = []
     for row in rows:
-        # 1. Full-width Character Support: Normalize to half-width
-        row = row.replace('｜', '|')
-        
-        # 2. Spacer/Divider Line Filter
-        if re.match(r'^[\s\|:\-－]+$', row):
+        if len(first_rows) < 3:
+            first_rows.append(row)
+
+        # Spacer/Divider Line Filter
+        if TABLE_DIVIDER.match(row):
             continue
 
         cells = [cell.strip() for cell in row.split('|')]
-        if row.strip().startswith('|') and len(cells) > 0 and cells[0] == '':
+        stripped = row.strip()
+        if stripped.startswith('|') and len(cells) > 0 and cells[0] == '':
             cells.pop(0)
-        if row.strip().endswith('|') and len(cells) > 0 and cells[-1] == '':
+        if stripped.endswith('|') and len(cells) > 0 and cells[-1] == '':
             cells.pop()
         
-        parsed_rows.append(cells)
+        # Parse cells right away; short rows are padded once the width is known
+        table_rows.append({
+            "type": "table_row",
+            "table_row": {"cells": [parse_inline_elements(cell_text) for cell_text in cells]}
+        })
         max_cols = max(max_cols, len(cells))
         
-    if not parsed_rows:
-        logger.warning(f"Table block creation failed: No valid rows found in buffer. First few lines: {rows[:3]}")
+    if not table_rows:
+        logger.warning(f"Table block creation failed: No valid rows found in buffer. First few lines: {first_rows}")
         return None
 
-    for cells in parsed_rows:
-        while len(cells) < max_cols:
-            cells.append("")
-        row_cells = []
-        for cell_text in cells:
-            row_cells.append(parse_inline_elements(cell_text))
-        table_rows.append({
-            "type": "table_row",
-            "table_row": {"cells": row_cells}
-        })
+    for table_row in table_rows:
+        row_cells = table_row["table_row"]["cells"]
+        while len(row_cells) < max_cols:
+            row_cells.append([])  # Same as parse_inline_elements("")
         
     return {
         "object": "block",
@@ -180,63 +204,124 @@ def create_table_block(rows: List[str]) -> Optional[Dict[str, Any]]:
         }
     }
 
-def parse_markdown_to_blocks(file_path: str) -> List[Dict[str, Any]]:
+def split_large_tables(blocks: List[Dict[str, Any]], max_rows: int = 100) -> List[Dict[str, Any]]:
+    """
+    Splits tables with more than `max_rows` rows into consecutive continuation
+    tables. Each continuation table repeats the first (header) row.
+    
+    Args:
+        blocks: Parsed blocks; only top-level tables are split.
+        max_rows: Rows per table, header included (Notion accepts 100 children per request).
+        
+    Returns:
+        A new block list; blocks that don't need splitting are reused as-is.
+    """
+    result = []
+    for block in blocks:
+        rows = block.get("table", {}).get("children", []) if block.get("type") == "table" else []
+        if len(rows) <= max_rows:
+            result.append(block)
+            continue
+
+        header, body = rows[0], rows[1:]
+        step = max(1, max_rows - 1)
+        for start in range(0, len(body), step):
+            table = dict(block["table"], children=[header] + body[start:start + step])
+            result.append(dict(block, table=table))
+    return result
+
+def make_title_block(title: str) -> Dict[str, Any]:
+    """
+    Builds the H1 block injected at the top of appended content.
+    """
+    return {
+        "object": "block",
+        "type": "heading_1",
+        "heading_1": {
+            "rich_text": [{"type": "text", "text": {"content": title}}]
+        }
+    }
+
+def parse_markdown_to_blocks(file_path: str, normalizer: Optional[Normalizer] = None) -> List[Dict[str, Any]]:
     """
     Parses a Markdown file into Notion blocks.
     Handles headings, bullet points, tables, equations, and images.
     
     Args:
         file_path: Path to the markdown file.
+        normalizer: Cleaning rules applied before parsing (default: DEFAULT_NORMALIZER).
         
     Returns:
         List of Notion block objects.
     """
-    blocks = []
-    
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+            text = f.read()
     except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
         return []
 
+    return parse_markdown_text(text, normalizer)
+
+def parse_markdown_text(text: str, normalizer: Optional[Normalizer] = None) -> List[Dict[str, Any]]:
+    """
+    Normalizes a Markdown string in one pass, then parses it into Notion blocks.
+    """
+    text = (normalizer or DEFAULT_NORMALIZER).normalize(text)
+    # Lines end at \n only, as with readlines() (str.splitlines also breaks
+    # on \x0b, \x0c, \x85 and \u2028)
+    return parse_markdown_lines(io.StringIO(text).readlines())
+
+def parse_markdown(source: Union[str, bytes, IO, Iterable[str]],
+                   normalizer: Optional[Normalizer] = None) -> List[Dict[str, Any]]:
+    """
+    Parses Markdown given as a string or a stream into Notion blocks.
+    Nothing is written to disk, so callers can parse generated text directly.
+
+    Args:
+        source: Markdown text (str or UTF-8 bytes), a file-like object with
+            read(), or any iterable of lines (e.g. sys.stdin, a generator).
+        normalizer: Cleaning rules applied before parsing (default: DEFAULT_NORMALIZER).
+
+    Returns:
+        List of Notion block objects.
+    """
+    if hasattr(source, "read"):
+        source = source.read()
+    elif not isinstance(source, (str, bytes)):
+        source = "".join(source)
+    if isinstance(source, bytes):
+        source = source.decode("utf-8")
+    return parse_markdown_text(source, normalizer)
+
+def parse_markdown_lines(lines: List[str], minify: bool = True) -> List[Dict[str, Any]]:
+    """
+    Parses Markdown lines (as returned by readlines) into Notion blocks.
+    The lines must already be normalized (see src.normalize); this loop does
+    no noise cleaning of its own.
+    
+    Args:
+        lines: Markdown source lines, with or without trailing newlines.
+        minify: Coalesce rich_text runs and drop default keys (see src.minify).
+        
+    Returns:
+        List of Notion block objects.
+    """
+    blocks = []
+
     i = 0
     while i < len(lines):
         # Calculate indentation (spaces at the beginning)
         raw_line = lines[i].rstrip('\n') # Keep indentation, remove newline
-        
-        # [Step 0] Pre-clean invisible chars
-        if '\u200b' in raw_line:
-            raw_line = raw_line.replace('\u200b', '')
-            
-        stripped_line = raw_line.strip()
-        
-        # [Step 1] Detect and Skip Empty Blockquote Lines (e.g. "> " or ">")
-        # LLMs often add these for visual spacing, but they break Notion rendering.
-        if re.match(r'^>+\s*$', stripped_line):
-            logger.debug(f"🧹 [Noise Cleaning] Skipped empty blockquote line at line {i+1}")
-            i += 1
-            continue
+        line = raw_line.strip()
 
-        if not stripped_line:
+        # Blank lines (including emptied noise lines) separate blocks
+        if not line:
             i += 1
             continue
 
         indent_level = len(raw_line) - len(raw_line.lstrip())
         
-        # [NEW] Clean Artifact Noise (e.g., 1111, 2222) with Transparent Logging
-        # Regex matches word boundary + digit + same digit 3+ times + word boundary
-        
-        # Helper callback for logging
-        def _log_noise(match):
-            noise = match.group()
-            # Log with context (stripped_line is available in closure scope)
-            logger.warning(f"🧹 [Noise Cleaning] Removed '{noise}' from line: '{stripped_line[:50]}...'")
-            return ""
-
-        # Apply cleaning with callback
-        line = re.sub(r'\b(\d)\1{3,}\b', _log_noise, stripped_line)
-        
         # --- Divider Detection ---
         if re.match(r'^[-*_]{3,}$', line):
             blocks.append({
@@ -283,13 +368,14 @@ def parse_markdown_to_blocks(file_path: str) -> List[Dict[str, Any]]:
             continue
 
         # --- Table Detection ---
-        if line.startswith('|') or '｜' in line:
-            table_buffer = []
-            while i < len(lines) and (lines[i].strip().startswith('|') or '｜' in lines[i]):
-                table_buffer.append(lines[i].rstrip())
-                i += 1
-            
-            table_block = create_table_block(table_buffer)
+        if line.startswith('|'):
+            end = i
+            while end < len(lines) and lines[end].strip().startswith('|'):
+                end += 1
+
+            # Rows are handed over one at a time instead of copied into a buffer
+            table_block = create_table_block(lines[n].rstrip() for n in range(i, end))
+            i = end
             if table_block:
                 blocks.append(table_block)
             continue
@@ -473,4 +559,4 @@ def parse_markdown_to_blocks(file_path: str) -> List[Dict[str, Any]]:
             
         i += 1
         
-    return blocks
+    return minify_blocks(blocks) if minify else blocks
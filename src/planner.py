@@ -0,0 +1,201 @@
+import json
+import math
+import logging
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_TEXT_LENGTH = 2000  # Characters per rich_text content
+DEFAULT_REQUEST_LATENCY = 0.4  # Assumed seconds per request (round trip), for the estimate only
+
+
+def payload_size(body: Dict[str, Any]) -> int:
+    """
+    Bytes of a JSON request body as httpx encodes it (compact UTF-8).
+    """
+    return len(json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+@dataclass
+class PlannedRequest:
+    """One request the push would send."""
+    endpoint: str
+    parent: str
+    blocks: int = 0
+    bytes: int = 0
+    continuation: bool = False  # Follow-up append for children beyond a request's limit
+
+
+@dataclass
+class Plan:
+    """Requests a push would send, computed without network access."""
+    targets: int
+    requests: List[PlannedRequest] = field(default_factory=list)
+    rich_text_splits: int = 0  # Extra rich_text runs needed for content over 2000 chars
+    estimated_seconds: float = 0.0
+
+    def count(self, endpoint: str, continuation: Optional[bool] = None) -> int:
+        return sum(1 for r in self.requests if r.endpoint == endpoint
+                   and (continuation is None or r.continuation == continuation))
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(r.bytes for r in self.requests)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "targets": self.targets,
+            "pages_create": self.count("pages.create"),
+            "appends": self.count("blocks.children.append", continuation=False),
+            "continuations": self.count("blocks.children.append", continuation=True),
+            "total_requests": len(self.requests),
+            "total_bytes": self.total_bytes,
+            "rich_text_splits": self.rich_text_splits,
+            "estimated_seconds": round(self.estimated_seconds, 1),
+            "requests": [asdict(r) for r in self.requests],
+        }
+
+
+class _PlanningEndpoint:
+    def __init__(self, plan: Plan, parents: set):
+        self.plan = plan
+        self.parents = parents  # Block IDs that are target pages, not created blocks
+        self.created = 0
+
+    def _new_id(self, kind: str) -> str:
+        self.created += 1
+        return f"planned-{kind}-{self.created}"
+
+    # pages.create
+    def create(self, parent, properties):
+        body = {"parent": parent, "properties": properties}
+        self.plan.requests.append(PlannedRequest("pages.create", parent["page_id"], bytes=payload_size(body)))
+        page_id = self._new_id("page")
+        self.parents.add(page_id)
+        return {"id": page_id, "url": ""}
+
+    # blocks.children.append
+    def append(self, block_id, children):
+        self.plan.requests.append(PlannedRequest(
+            "blocks.children.append", block_id, blocks=len(children),
+            bytes=payload_size({"children": children}),
+            continuation=block_id not in self.parents,
+        ))
+        return {"results": [{"id": self._new_id("block")} for _ in children]}
+
+
+class PlanningClient:
+    """
+    Stand-in for notion_client.Client that records requests instead of sending
+    them. NotionSync runs its normal batching and continuation logic on top,
+    so the plan matches what a real push would do.
+    """
+    def __init__(self, plan: Plan, target_ids: List[str]):
+        endpoint = _PlanningEndpoint(plan, set(target_ids))
+        self.pages = endpoint
+        self.blocks = type("Blocks", (), {})()
+        self.blocks.children = endpoint
+
+
+def count_text_splits(blocks: List[Dict[str, Any]]) -> int:
+    """
+    Counts the extra rich_text runs needed to keep every run under 2000 chars.
+    """
+    splits = 0
+    for block in blocks:
+        body = block.get(block.get("type"), {})
+        texts = [body.get("rich_text", [])] + body.get("cells", [])
+        for rich_text in texts:
+            for item in rich_text:
+                length = len(item.get("text", {}).get("content", ""))
+                if length > MAX_TEXT_LENGTH:
+                    splits += math.ceil(length / MAX_TEXT_LENGTH) - 1
+        splits += count_text_splits(body.get("children", []))
+    return splits
+
+
+def estimate_seconds(plan: Plan, rate_limit: float, workers: int = 1,
+                     latency: float = DEFAULT_REQUEST_LATENCY) -> float:
+    """
+    Estimated wall time: the slower of the rate limit (shared by all workers)
+    and the per-target request chains, which run in order.
+    """
+    total = len(plan.requests)
+    if not total:
+        return 0.0
+    rate_bound = (total - 1) / rate_limit + latency if rate_limit > 0 else 0.0
+    per_target = total / max(1, plan.targets)
+    waves = math.ceil(plan.targets / max(1, workers))
+    return max(rate_bound, waves * per_target * latency)
+
+
+def plan_push(blocks: List[Dict[str, Any]], targets: int = 1, new_page: bool = False,
+              title: str = "Untitled", rate_limit: float = 0.0, workers: int = 1,
+              text_splits: Optional[int] = None) -> Plan:
+    """
+    Computes the requests a push of `blocks` to `targets` pages would send.
+    Runs fully offline.
+
+    Args:
+        blocks: Parsed blocks, exactly as they would be pushed.
+        targets: Number of target pages (each receives the same batches).
+        new_page: Whether a child page is created under each target first.
+        title: Title of the created pages (counts towards request bytes).
+        rate_limit: Requests per second, for the wall-time estimate (0 = unlimited).
+        workers: Targets pushed concurrently.
+        text_splits: Extra rich_text runs per target, when counted before the
+            pre-flight validator split the long runs (default: counted on `blocks`).
+
+    Returns:
+        The Plan, with its wall-time estimate filled in.
+    """
+    from src.client import NotionSync, chunk_blocks
+
+    plan = Plan(targets=max(1, targets))
+    target_ids = [f"target-{n + 1}" for n in range(plan.targets)]
+    syncer = NotionSync("plan", None, rate_limit=0, max_retries=0, client=PlanningClient(plan, target_ids))
+    batches = chunk_blocks(blocks)
+
+    # Silence the per-batch logs of the simulated pushes
+    client_logger = logging.getLogger("src.client")
+    level = client_logger.level
+    client_logger.setLevel(logging.WARNING)
+    try:
+        for target_id in target_ids:
+            page_id = syncer.create_child_page(title, parent_id=target_id)[0] if new_page else target_id
+            syncer.push_batches(page_id, batches)
+    finally:
+        client_logger.setLevel(level)
+
+    if text_splits is None:
+        text_splits = count_text_splits(blocks)
+    plan.rich_text_splits = text_splits * plan.targets
+    plan.estimated_seconds = estimate_seconds(plan, rate_limit, workers)
+    return plan
+
+
+def format_plan(plan: Plan, rate_limit: float, max_rows: int = 20) -> str:
+    """
+    Human-readable plan: totals followed by one line per request.
+    """
+    sizes = [r.bytes for r in plan.requests] or [0]
+    lines = [
+        f"Targets:               {plan.targets}",
+        f"pages.create:          {plan.count('pages.create')}",
+        f"blocks.children.append: {plan.count('blocks.children.append', continuation=False)}"
+        f" (+{plan.count('blocks.children.append', continuation=True)} continuation)",
+        f"Total requests:        {len(plan.requests)}",
+        f"Payload bytes:         {plan.total_bytes} total, {max(sizes)} max, {plan.total_bytes // len(sizes)} avg",
+        f"rich_text splits:      {plan.rich_text_splits}",
+        f"Estimated wall time:   {plan.estimated_seconds:.1f}s"
+        + (f" at {rate_limit:g} req/s" if rate_limit > 0 else " (no rate limit)"),
+        "",
+        f"{'#':>4}  {'Endpoint':<32} {'Parent':<20} {'Blocks':>6} {'Bytes':>9}",
+    ]
+    for n, r in enumerate(plan.requests[:max_rows], start=1):
+        endpoint = r.endpoint + (" (cont.)" if r.continuation else "")
+        lines.append(f"{n:>4}  {endpoint:<32} {r.parent[:20]:<20} {r.blocks:>6} {r.bytes:>9}")
+    if len(plan.requests) > max_rows:
+        lines.append(f"      ... {len(plan.requests) - max_rows} more request(s)")
+    return "\n".join(lines)
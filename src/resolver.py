@@ -0,0 +1,144 @@
+import time
+import logging
+from typing import List, Dict, Any, Optional, Iterator, Callable
+
+from src.utils import extract_page_id, state_path, JsonStateFile
+
+logger = logging.getLogger(__name__)
+
+TITLE_INDEX_FILE = "title_index.json"
+DEFAULT_TITLE_TTL = 24 * 3600  # Seconds a cached title -> ID mapping stays valid
+SEARCH_PAGE_SIZE = 100  # Maximum allowed by the search endpoint
+
+
+def normalize_title(title: str) -> str:
+    """
+    Case- and whitespace-insensitive key for title lookups.
+    """
+    return " ".join(title.split()).casefold()
+
+
+def page_title(page: Dict[str, Any]) -> str:
+    """
+    Extracts the plain-text title of a page object returned by the API.
+    """
+    for prop in page.get("properties", {}).values():
+        if prop.get("type") == "title":
+            return "".join(part.get("plain_text", "") for part in prop.get("title", []))
+    return ""
+
+
+class TitleIndex(JsonStateFile):
+    """
+    Local title -> page ID cache (JSON file) with a TTL per entry.
+    Safe to share between threads.
+    """
+    def __init__(self, path: Optional[str] = None, ttl: float = DEFAULT_TITLE_TTL):
+        super().__init__(path or state_path(TITLE_INDEX_FILE), "title index")
+        self.ttl = ttl
+
+    def get(self, title: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(normalize_title(title))
+            if entry is None:
+                return None
+            if time.time() - entry["ts"] > self.ttl:
+                self.invalidate(title)
+                return None
+            return entry["id"]
+
+    def put(self, title: str, page_id: str):
+        key = normalize_title(title)
+        if key:
+            with self.lock:
+                self.entries[key] = {"id": page_id, "title": title, "ts": time.time()}
+                self.dirty = True
+
+    def invalidate(self, title: str):
+        with self.lock:
+            if self.entries.pop(normalize_title(title), None) is not None:
+                self.dirty = True
+
+
+def search_pages(syncer, query: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yields pages matching `query` from the search endpoint, fetching
+    result pages of 100 lazily so callers can stop early.
+    """
+    cursor = None
+    while True:
+        response = syncer._call("search", query=query, page_size=SEARCH_PAGE_SIZE, start_cursor=cursor,
+                                filter={"property": "object", "value": "page"})
+        for result in response.get("results", []):
+            yield result
+        if not response.get("has_more"):
+            return
+        cursor = response.get("next_cursor")
+
+
+def resolve_title(title: str, index: TitleIndex, syncer) -> str:
+    """
+    Resolves a page title to its ID, from the cache if possible.
+    A cold lookup pages through search results, caches every title it sees
+    on the way, and stops at the first exact match.
+
+    Raises:
+        ValueError: If no accessible page has exactly this title.
+    """
+    cached = index.get(title)
+    if cached:
+        logger.info(f"🔎 Resolved '{title}' from cache: {cached}")
+        return cached
+
+    wanted = normalize_title(title)
+    found = None
+    for page in search_pages(syncer, title):
+        name = page_title(page)
+        page_id = page["id"].replace("-", "")
+        if name:
+            index.put(name, page_id)
+        if normalize_title(name) == wanted:
+            found = page_id
+            break
+    index.save()
+
+    if found is None:
+        index.invalidate(title)
+        index.save()
+        raise ValueError(f"No page titled '{title}' is shared with this integration")
+    logger.info(f"🔎 Resolved '{title}' via search: {found}")
+    return found
+
+
+def resolve_targets(targets: List[str], index: TitleIndex, get_syncer: Callable[[], Any]) -> List[str]:
+    """
+    Turns IDs, URLs and page titles into a de-duplicated list of page IDs.
+    `get_syncer` is only called when a title misses the cache.
+
+    Raises:
+        ValueError: If a target can't be resolved.
+    """
+    page_ids = []
+    for target in targets:
+        try:
+            page_id = extract_page_id(target)
+        except ValueError:
+            page_id = index.get(target) or resolve_title(target, index, get_syncer())
+        if page_id not in page_ids:
+            page_ids.append(page_id)
+    return page_ids
+
+
+def invalidate_missing(index: TitleIndex, targets: List[str], missing_ids: List[str]):
+    """
+    Drops cached titles whose page turned out not to exist (HTTP 404),
+    so the next run searches again.
+    """
+    for target in targets:
+        try:
+            extract_page_id(target)
+        except ValueError:
+            if index.get(target) in missing_ids:
+                logger.info(f"🔎 Forgetting stale cache entry for '{target}'")
+                index.invalidate(target)
+    index.save()
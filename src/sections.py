@@ -0,0 +1,178 @@
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from src.utils import state_path, JsonStateFile
+from src.resolver import normalize_title
+from src.export import is_settled, list_children
+
+logger = logging.getLogger(__name__)
+
+PAGE_INDEX_FILE = "page_index.json"
+
+HEADING_LEVELS = {"heading_1": 1, "heading_2": 2, "heading_3": 3}
+
+
+def block_entry(block: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compact index entry for a top-level block returned by the API:
+    its ID and type, plus the text of headings (and whether they toggle).
+    """
+    entry = {"id": block["id"], "type": block.get("type")}
+    if entry["type"] in HEADING_LEVELS:
+        body = block.get(entry["type"], {})
+        entry["text"] = "".join(item.get("plain_text") or (item.get("text") or {}).get("content", "")
+                                for item in body.get("rich_text", []))
+        if body.get("is_toggleable"):
+            entry["toggle"] = True
+    return entry
+
+
+class PageIndex(JsonStateFile):
+    """
+    Local cache of the top-level blocks of pages (JSON file).
+
+    Each entry holds the block list of one page, keyed by the page ID and
+    valid for as long as the page's last_edited_time is unchanged, so a
+    large page is not listed again until it is edited. Stamps of the last
+    SETTLE_SECONDS (see export.is_settled) are neither stored nor trusted.
+    Safe to share between threads.
+    """
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path or state_path(PAGE_INDEX_FILE), "page index")
+
+    def get(self, page_id: str, edited: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        with self.lock:
+            entry = self.entries.get(page_id)
+        if entry is None or not is_settled(edited) or entry["edited"] != edited:
+            return None
+        return entry["blocks"]
+
+    def put(self, page_id: str, edited: Optional[str], blocks: List[Dict[str, Any]]):
+        if is_settled(edited):
+            with self.lock:
+                self.entries[page_id] = {"edited": edited, "blocks": blocks}
+                self.dirty = True
+
+    def invalidate(self, page_id: str):
+        with self.lock:
+            if self.entries.pop(page_id, None) is not None:
+                self.dirty = True
+
+
+def load_page_index(syncer, page_id: str, index: PageIndex) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Returns the page's top-level block entries and whether they came from the
+    cache. One blocks.retrieve validates the cached list; the page is listed
+    again only if its last_edited_time changed.
+    """
+    edited = syncer._call("blocks.retrieve", block_id=page_id).get("last_edited_time")
+    cached = index.get(page_id, edited)
+    if cached is not None:
+        logger.info(f"📇 Page index of {page_id} is up to date ({len(cached)} blocks)")
+        return cached, True
+    entries = [block_entry(block) for block in list_children(syncer, page_id)]
+    index.put(page_id, edited, entries)
+    logger.info(f"📇 Indexed {len(entries)} top-level blocks of page {page_id}")
+    return entries, False
+
+
+def find_section(entries: List[Dict[str, Any]], heading: str) -> Tuple[int, int]:
+    """
+    Locates the section of the first heading whose text matches `heading`
+    (case- and whitespace-insensitive, leading '#' ignored).
+
+    Returns:
+        (position of the heading, position of the last block of its section),
+        the section ending before the next heading of the same or higher level.
+
+    Raises:
+        ValueError: If no heading matches; the message lists the page's headings.
+    """
+    key = normalize_title(heading.lstrip("#"))
+    for start, entry in enumerate(entries):
+        level = HEADING_LEVELS.get(entry["type"])
+        if level and normalize_title(entry.get("text", "")) == key:
+            end = start
+            for entry_after in entries[start + 1:]:
+                if HEADING_LEVELS.get(entry_after["type"], 4) <= level:
+                    break
+                end += 1
+            return start, end
+    headings = [entry.get("text", "") for entry in entries if entry["type"] in HEADING_LEVELS]
+    available = ", ".join(repr(text) for text in headings[:20]) or "none"
+    raise ValueError(f"No heading {heading!r} on the page (headings: {available})")
+
+
+def insert_under(syncer, page_id: str, heading: str, blocks: List[Dict[str, Any]],
+                 index: Optional[PageIndex] = None, record: Optional[Any] = None) -> List[Dict[str, Any]]:
+    """
+    Inserts blocks at the end of the section under a heading, using the
+    append endpoint's `after` position. Into a toggle heading, the blocks
+    are appended as its children instead.
+
+    The page's top-level blocks come from the PageIndex when the page is
+    unchanged. The insertion itself edits the page, so its entry is dropped
+    afterwards: a stamp that recent can't tell our edit from another one
+    made in the same minute. If the anchor block no longer exists, the
+    first request is rejected before anything is written, and the page is
+    listed again and the insertion retried once.
+
+    Args:
+        syncer: NotionSync used for every request.
+        page_id: Page to insert into.
+        heading: Text of the heading whose section receives the blocks.
+        blocks: Parsed Notion blocks.
+        index: Cache of page block lists (default: the local page index).
+        record: SyncRecord collecting the created blocks, for `np undo`.
+
+    Returns:
+        The created top-level blocks, as returned by the API.
+
+    Raises:
+        ValueError: If the page has no such heading (nothing is sent).
+    """
+    from src.client import chunk_blocks
+
+    index = index or PageIndex()
+    batches = chunk_blocks(blocks)
+    entries, cached = load_page_index(syncer, page_id, index)
+    sent = False
+    try:
+        while True:
+            start, end = find_section(entries, heading)
+            anchor = entries[start]
+            if anchor.get("toggle"):
+                logger.info(f"📌 Appending into toggle heading '{anchor['text']}'")
+                parent_id, after = anchor["id"], None
+            else:
+                parent_id, after = page_id, entries[end]["id"]
+                logger.info(f"📌 Inserting under '{anchor['text']}' after block {end + 1} of {len(entries)}")
+            written = []
+            sent = True
+            try:
+                created = syncer.append_children(parent_id, batches[0] if batches else [], after=after,
+                                                 written=written).get("results", [])
+                break
+            except Exception as e:
+                if record is not None and written:
+                    record.add_blocks(parent_id, written)
+                # A stale anchor fails the first request; once a piece or a
+                # continuation is written, sending the batch again would duplicate it
+                if written or not cached or getattr(e, "status", None) not in (400, 404):
+                    raise
+                logger.warning(f"♻️  Cached page index of {page_id} is stale ({e}); listing the page again")
+                index.invalidate(page_id)
+                entries, cached = load_page_index(syncer, page_id, index)
+
+        if record is not None:
+            record.add_blocks(parent_id, created)
+        if len(batches) > 1:
+            last = created[-1]["id"] if created else after
+            created += syncer.push_batches(parent_id, batches[1:], after=None if parent_id != page_id else last,
+                                           record=record)
+    finally:
+        if sent:
+            # Whatever was written changed the page
+            index.invalidate(page_id)
+        index.save()
+    return created
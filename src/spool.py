@@ -0,0 +1,250 @@
+import json
+import time
+import sqlite3
+import logging
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+from src.utils import state_path
+
+logger = logging.getLogger(__name__)
+
+SPOOL_FILE = "spool.db"
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_POLL_INTERVAL = 2.0  # Seconds between polls of an empty queue
+MAX_GROUP_JOBS = 50  # Append jobs merged into one drain pass for the same target
+# Payloads Notion rejects as invalid or too large: resending them can't help.
+# Everything else (server errors, timeouts, rate limits, a token that lost
+# access to the page) is retried later.
+PERMANENT_STATUSES = {400, 413, 422}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target TEXT NOT NULL,
+    new_page INTEGER NOT NULL DEFAULT 0,
+    title TEXT,
+    payload BLOB NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, id);
+"""
+
+
+@dataclass
+class Job:
+    """A spooled sync job: parsed blocks waiting to be pushed to a target page."""
+    id: int
+    target: str
+    new_page: bool
+    title: Optional[str]
+    blocks: List[Dict[str, Any]]
+    priority: int
+    attempts: int
+
+
+class Spool:
+    """
+    Durable local job queue backed by SQLite.
+
+    Jobs move pending -> running -> done, or back to pending with a backoff
+    delay on failure, and end up 'dead' once they exhaust their attempts.
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or state_path(SPOOL_FILE)
+        self.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, target: str, blocks: List[Dict[str, Any]], title: Optional[str] = None,
+                new_page: bool = False, priority: int = 0) -> int:
+        """
+        Stores a parsed document for later delivery. Returns the job ID.
+        """
+        payload = json.dumps(blocks, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        cursor = self.conn.execute(
+            "INSERT INTO jobs (target, new_page, title, payload, priority, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (target, int(new_page), title, payload, priority, time.time()),
+        )
+        return cursor.lastrowid
+
+    def recover(self) -> int:
+        """
+        Returns jobs left 'running' by a crashed drainer to the queue.
+        """
+        cursor = self.conn.execute("UPDATE jobs SET status = 'pending' WHERE status = 'running'")
+        return cursor.rowcount
+
+    def claim_group(self, now: Optional[float] = None) -> List[Job]:
+        """
+        Claims the highest-priority ready job. If it is an append job, every other
+        ready append job for the same target is claimed with it (oldest first) so
+        they can be delivered in shared batches.
+        """
+        now = time.time() if now is None else now
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            head = self.conn.execute(
+                "SELECT id, target, new_page FROM jobs WHERE status = 'pending' AND next_attempt <= ? "
+                "ORDER BY priority DESC, id LIMIT 1", (now,)
+            ).fetchone()
+            if head is None:
+                self.conn.execute("COMMIT")
+                return []
+
+            if head[2]:
+                ids = [head[0]]
+            else:
+                ids = [row[0] for row in self.conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'pending' AND next_attempt <= ? AND target = ? "
+                    "AND new_page = 0 ORDER BY id LIMIT ?", (now, head[1], MAX_GROUP_JOBS)
+                )]
+
+            marks = ",".join("?" * len(ids))
+            self.conn.execute(f"UPDATE jobs SET status = 'running' WHERE id IN ({marks})", ids)
+            rows = self.conn.execute(
+                f"SELECT id, target, new_page, title, payload, priority, attempts FROM jobs "
+                f"WHERE id IN ({marks}) ORDER BY id", ids
+            ).fetchall()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        return [Job(id=r[0], target=r[1], new_page=bool(r[2]), title=r[3],
+                    blocks=json.loads(r[4]), priority=r[5], attempts=r[6]) for r in rows]
+
+    def complete(self, job_ids: List[int]):
+        if job_ids:
+            marks = ",".join("?" * len(job_ids))
+            self.conn.execute(f"UPDATE jobs SET status = 'done', payload = x'' WHERE id IN ({marks})", job_ids)
+
+    def rewrite(self, job_id: int, target: str, blocks: List[Dict[str, Any]]):
+        """
+        Replaces a job's target and remaining payload after partial delivery,
+        so a retry neither re-creates its page nor re-sends written blocks.
+        """
+        payload = json.dumps(blocks, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.conn.execute("UPDATE jobs SET target = ?, new_page = 0, payload = ? WHERE id = ?",
+                          (target, payload, job_id))
+
+    def fail(self, job_ids: List[int], error: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+             permanent: bool = False):
+        """
+        Records a failed delivery. Jobs are retried with exponential backoff,
+        or dead-lettered when the error is permanent or attempts run out.
+        """
+        now = time.time()
+        for job_id in job_ids:
+            attempts = self.conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()[0] + 1
+            if permanent or attempts >= max_attempts:
+                self.conn.execute("UPDATE jobs SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                                  (attempts, error, job_id))
+                logger.error(f"💀 Job {job_id} dead-lettered after {attempts} attempt(s): {error}")
+            else:
+                delay = min(300, 2 ** attempts)
+                self.conn.execute("UPDATE jobs SET status = 'pending', attempts = ?, last_error = ?, "
+                                  "next_attempt = ? WHERE id = ?", (attempts, error, now + delay, job_id))
+                logger.warning(f"⏳ Job {job_id} failed (attempt {attempts}), retrying in {delay}s: {error}")
+
+    def retry_dead(self) -> int:
+        """
+        Moves dead-lettered jobs back to the queue.
+        """
+        cursor = self.conn.execute("UPDATE jobs SET status = 'pending', attempts = 0, next_attempt = 0 "
+                                   "WHERE status = 'dead'")
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute("SELECT id, target, title, attempts, last_error FROM jobs "
+                                 "WHERE status = 'dead' ORDER BY id").fetchall()
+        return [dict(zip(("id", "target", "title", "attempts", "error"), row)) for row in rows]
+
+
+def is_permanent(error: Exception) -> bool:
+    """
+    Returns True if a job that failed with `error` should be dead-lettered
+    right away instead of retried later.
+    """
+    return getattr(error, "status", None) in PERMANENT_STATUSES
+
+
+def deliver_group(syncer, spool: Spool, jobs: List[Job], max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+    """
+    Pushes one claimed group. Append jobs for the same target are concatenated
+    and sent in shared 100-block batches. On failure, fully written jobs are
+    marked done and a partially written job keeps only its unsent blocks,
+    counted per request that went through (including the pieces and
+    continuations of a batch that failed halfway).
+    """
+    # Imported here so enqueueing never pays for loading notion_client
+    from src.client import chunk_blocks
+
+    job = jobs[0]
+    page_id = job.target
+    if job.new_page:
+        try:
+            page_id, _ = syncer.create_child_page(job.title or "Untitled", parent_id=job.target)
+        except Exception as e:
+            spool.fail([job.id], str(e), max_attempts, permanent=is_permanent(e))
+            return
+        # From here on the job is a plain append to the page we just created
+        spool.rewrite(job.id, page_id, job.blocks)
+
+    blocks = []
+    ends = []  # Index one past each job's last block
+    for j in jobs:
+        blocks.extend(j.blocks)
+        ends.append(len(blocks))
+
+    written = []  # Top-level blocks created so far
+    try:
+        for batch in chunk_blocks(blocks):
+            syncer.append_children(page_id, batch, written=written)
+    except Exception as e:
+        sent = len(written)
+        done = [j.id for j, end in zip(jobs, ends) if end <= sent]
+        spool.complete(done)
+        for j, end in zip(jobs, ends):
+            start = end - len(j.blocks)
+            if start < sent < end:
+                spool.rewrite(j.id, page_id, j.blocks[sent - start:])
+        spool.fail([j.id for j in jobs if j.id not in done], str(e), max_attempts,
+                   permanent=is_permanent(e))
+        return
+
+    spool.complete([j.id for j in jobs])
+    logger.info(f"✅ Delivered {len(jobs)} job(s) to {page_id} ({len(blocks)} blocks)")
+
+
+def drain(syncer, spool: Spool, once: bool = False, poll_interval: float = DEFAULT_POLL_INTERVAL,
+          max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+    """
+    Delivers spooled jobs until the queue is empty (`once`) or forever.
+    The syncer's rate limiter paces the requests. Returns the number of groups handled.
+    """
+    recovered = spool.recover()
+    if recovered:
+        logger.info(f"♻️  Recovered {recovered} interrupted job(s)")
+
+    handled = 0
+    while True:
+        jobs = spool.claim_group()
+        if not jobs:
+            if once:
+                return handled
+            time.sleep(poll_interval)
+            continue
+        deliver_group(syncer, spool, jobs, max_attempts)
+        handled += 1
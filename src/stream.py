@@ -0,0 +1,279 @@
+import time
+import queue
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Iterable
+
+from src.parser import parse_markdown_lines
+from src.normalize import Normalizer, NoiseReport, DEFAULT_NORMALIZER
+from src.validate import validate_blocks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 1.0  # Seconds a closed block may wait before it is sent
+DEFAULT_FLUSH_BLOCKS = 20     # Closed blocks that trigger an immediate send
+
+
+class IncrementalParser:
+    """
+    Parses Markdown that arrives line by line (e.g. LLM output on stdin).
+
+    Blocks are released as soon as later input can no longer change them,
+    without re-parsing what came before. Most blocks take a single line and
+    are final at once. Only three kinds of block stay open:
+    - a table, until the first line that does not start with `|`
+    - a code fence or $$ equation, until it is closed
+    - a list item, whose following paragraphs and indented items nest under it
+
+    The list item itself is released right away. Each line that nests under
+    it is final too, and it is handed out through take_children() so the
+    page fills in while the list grows.
+
+    Each line is normalized once as it arrives (verbatim inside fences, as the
+    whole-buffer pass does); the noise summary is logged on close().
+    """
+    def __init__(self, normalizer: Optional[Normalizer] = None):
+        self.normalizer = normalizer or DEFAULT_NORMALIZER
+        self.report = NoiseReport()
+        self._lines: List[str] = []       # Lines of the open table or fence
+        self._fence: Optional[str] = None
+        self._list_line: Optional[str] = None  # First line of the open list item
+        self._children: List[Dict[str, Any]] = []
+
+    def feed(self, line: str) -> List[Dict[str, Any]]:
+        """
+        Adds one line and returns the top-level blocks it proved closed
+        (possibly none). Blocks nested under the open list item are collected
+        for take_children().
+        """
+        line = self.normalizer.normalize(line, self.report, verbatim=self._fence is not None)
+        stripped = line.strip()
+
+        if self._fence:
+            self._lines.append(line)
+            if stripped == self._fence:
+                self._fence = None
+                return self._release_open()
+            return []
+
+        released = []
+        if self._lines:
+            # An open table grows by its rows; anything else closes it
+            if stripped.startswith('|'):
+                self._lines.append(line)
+                return []
+            released = self._release_open()
+        if not stripped:
+            # Blank lines never start a block (an open list item stays open)
+            return released
+
+        if self._list_line is not None:
+            blocks = parse_markdown_lines([self._list_line, line])
+            if len(blocks) == 1:
+                body = blocks[0][blocks[0]["type"]]
+                self._children.extend(body.get("children", []))
+                return released
+            self._list_line = None
+
+        if stripped.startswith('```') or stripped == '$$':
+            self._fence = '```' if stripped.startswith('```') else '$$'
+            self._lines = [line]
+        elif stripped.startswith('|'):
+            self._lines = [line]
+        else:
+            blocks = parse_markdown_lines([line])
+            if blocks and blocks[-1]["type"] in ("bulleted_list_item", "numbered_list_item"):
+                self._list_line = line
+            released.extend(blocks)
+        return released
+
+    def take_children(self) -> List[Dict[str, Any]]:
+        """
+        Returns (and forgets) the blocks nested under the last list item
+        released since the previous call.
+        """
+        children, self._children = self._children, []
+        return children
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        Ends the input and returns all remaining top-level blocks (an
+        unterminated fence runs to the end, as in a whole-buffer parse).
+        """
+        blocks = self._release_open()
+        self._fence = None
+        self._list_line = None
+        self.report.log("stream")
+        self.report = NoiseReport()
+        return blocks
+
+    def _release_open(self) -> List[Dict[str, Any]]:
+        blocks = parse_markdown_lines(self._lines) if self._lines else []
+        self._lines = []
+        return blocks
+
+
+class StreamPublisher:
+    """
+    Appends closed blocks to a page in micro-batches.
+
+    A batch is sent as soon as it holds `max_blocks` blocks, or when its oldest
+    block has waited `max_latency` seconds, whichever comes first. Children of
+    the last block (lines nested under an open list item) ride along with it
+    while it is pending, and go to the block itself once it has been sent.
+    """
+    def __init__(self, syncer, page_id: str,
+                 max_latency: float = DEFAULT_FLUSH_INTERVAL,
+                 max_blocks: int = DEFAULT_FLUSH_BLOCKS,
+                 record: Optional[Any] = None):
+        # Imported here so the CLI can read this module's defaults without loading notion_client
+        from src.client import MAX_BLOCKS_PER_REQUEST
+
+        self.syncer = syncer
+        self.record = record  # SyncRecord collecting the appended blocks, for `np undo`
+        self.page_id = page_id
+        self.max_latency = max_latency
+        self.max_blocks = max(1, min(max_blocks, MAX_BLOCKS_PER_REQUEST))
+        self.pending: List[Dict[str, Any]] = []
+        self.pending_children: List[Dict[str, Any]] = []  # For the last block sent
+        self.last_id: Optional[str] = None
+        self.oldest: Optional[float] = None
+        self.sent_blocks = 0
+        self.requests = 0
+
+    def add(self, blocks: List[Dict[str, Any]]):
+        if not blocks:
+            return
+        if self.pending_children:
+            self.flush()
+        if not self.pending:
+            self.oldest = time.monotonic()
+        self.pending.extend(blocks)
+        while len(self.pending) >= self.max_blocks:
+            self._send(self.max_blocks)
+        if not self.pending:
+            self.oldest = None
+
+    def add_children(self, children: List[Dict[str, Any]]):
+        """
+        Adds blocks nested under the last block passed to add().
+        """
+        if not children:
+            return
+        if self.pending:
+            parent = self.pending[-1]
+            parent[parent["type"]].setdefault("children", []).extend(children)
+            return
+        if self.last_id is None:
+            raise ValueError("Nested blocks streamed before their parent")
+        if not self.pending_children:
+            self.oldest = time.monotonic()
+        self.pending_children.extend(children)
+        while len(self.pending_children) >= self.max_blocks:
+            self._send_children(self.max_blocks)
+        if not self.pending_children:
+            self.oldest = None
+
+    def due_in(self) -> Optional[float]:
+        """
+        Seconds until the pending batch must be sent, or None if nothing is pending.
+        """
+        if not self.pending and not self.pending_children:
+            return None
+        return max(0.0, self.oldest + self.max_latency - time.monotonic())
+
+    def poll(self):
+        """
+        Sends the pending batch if its latency budget is used up.
+        """
+        if self.due_in() == 0:
+            self.flush()
+
+    def flush(self):
+        while self.pending_children:
+            self._send_children(self.max_blocks)
+        while self.pending:
+            self._send(self.max_blocks)
+        self.oldest = None
+
+    def _send(self, count: int):
+        batch = self.pending[:count]
+        response = self.syncer.append_children(self.page_id, batch)
+        results = response.get("results", [])
+        if self.record is not None:
+            self.record.add_blocks(self.page_id, results)
+        if results:
+            self.last_id = results[-1]["id"]
+        del self.pending[:count]
+        self.sent_blocks += len(batch)
+        self.requests += 1
+        logger.info(f"   - Streamed {len(batch)} block(s) ({self.sent_blocks} total)")
+        if self.pending:
+            self.oldest = time.monotonic()
+
+    def _send_children(self, count: int):
+        # Archived along with their parent on undo, so not recorded
+        batch = self.pending_children[:count]
+        self.syncer.append_children(self.last_id, batch)
+        del self.pending_children[:count]
+        self.requests += 1
+        logger.info(f"   - Streamed {len(batch)} nested block(s)")
+        if self.pending_children:
+            self.oldest = time.monotonic()
+
+
+_EOF = object()
+
+
+def _read_lines(stream: Iterable[str], lines: "queue.Queue"):
+    try:
+        for line in stream:
+            lines.put(line)
+    finally:
+        lines.put(_EOF)
+
+
+def _preflight(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # A live stream can't be stopped before it starts: repair what can be
+    # repaired and leave the rest to fail (and be logged) on its own batch
+    if blocks:
+        validate_blocks(blocks).log("stream")
+    return blocks
+
+
+def stream_to_page(stream: Iterable[str], publisher: StreamPublisher,
+                   prefix_blocks: Optional[List[Dict[str, Any]]] = None) -> int:
+    """
+    Reads Markdown from `stream` while it is being written and publishes
+    each block as soon as it is closed.
+
+    Args:
+        stream: Line iterator, typically sys.stdin.
+        publisher: Destination of the closed blocks.
+        prefix_blocks: Blocks sent ahead of the content (e.g. the title H1).
+
+    Returns:
+        Number of top-level blocks published.
+    """
+    parser = IncrementalParser()
+    lines: "queue.Queue" = queue.Queue()
+    # Reading happens on its own thread so latency flushes fire while stdin is idle
+    reader = threading.Thread(target=_read_lines, args=(stream, lines), daemon=True)
+    reader.start()
+
+    publisher.add(prefix_blocks or [])
+    while True:
+        try:
+            line = lines.get(timeout=publisher.due_in())
+        except queue.Empty:
+            publisher.poll()
+            continue
+        if line is _EOF:
+            break
+        publisher.add(_preflight(parser.feed(line)))
+        publisher.add_children(_preflight(parser.take_children()))
+        publisher.poll()
+
+    publisher.add(_preflight(parser.close()))
+    publisher.flush()
+    return publisher.sent_blocks
@@ -0,0 +1,147 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Set
+
+from src.client import RateLimiter, DEFAULT_RATE_LIMIT
+
+logger = logging.getLogger(__name__)
+
+UNAUTHORIZED = 401  # Token revoked or invalid: the lane is disabled (403: skipped for the target)
+
+
+def page_key(page_id: Optional[str]) -> Optional[str]:
+    """
+    Normalized page ID (the API returns dashed UUIDs, URLs carry plain hex).
+    """
+    return page_id.replace("-", "").lower() if page_id else None
+
+
+class TokenLane:
+    """
+    One integration token with its own client and rate budget.
+    """
+    def __init__(self, name: str, client: Any, rate_limit: float = DEFAULT_RATE_LIMIT,
+                 targets: Optional[List[str]] = None):
+        self.name = name
+        self.client = client
+        self.limiter = RateLimiter(rate_limit)
+        self.targets: Optional[Set[str]] = {page_key(t) for t in targets} if targets else None
+        self.denied: Set[Optional[str]] = set()  # Targets that returned 403 for this token
+        self.disabled = False
+        self.users = 0  # Jobs currently pinned to this lane
+        self.jobs = 0   # Jobs pinned so far (spreads short jobs round-robin)
+
+
+class TokenPool:
+    """
+    Several integration tokens used side by side, each with its own client
+    and rate limiter, so throughput grows with the number of integrations.
+
+    Independent jobs (a fan-out target, one file of a directory sync, one
+    database row) pin one lane for all their requests with `lane_for(target)`:
+    the least busy token listed for that target, else one without a target
+    list (ties go to the token that has taken the fewest jobs). Unpinned requests pick the same way for the syncer's root page.
+    A 401 disables a token and a 403 rules it out for the target; either way
+    the request moves to the next eligible token.
+    """
+    def __init__(self, lanes: List[TokenLane]):
+        if not lanes:
+            raise ValueError("A token pool needs at least one token")
+        self.lanes = lanes
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _pick(self, target: Optional[str], exclude: Optional[TokenLane] = None) -> Optional[TokenLane]:
+        usable = [lane for lane in self.lanes
+                  if lane is not exclude and not lane.disabled and target not in lane.denied]
+        # Listed for the target first, then unrestricted tokens; then any
+        # (the target may be a child page of one a token was listed for)
+        for candidates in ([l for l in usable if l.targets and target in l.targets],
+                           [l for l in usable if l.targets is None], usable):
+            if candidates:
+                return min(candidates, key=lambda lane: (lane.users, lane.jobs))
+        return None
+
+    @contextmanager
+    def lane_for(self, target: Optional[str]):
+        """
+        Pins a lane for `target` to the calling thread for the duration of a job.
+        """
+        target = page_key(target)
+        previous = getattr(self._local, "lane", None), getattr(self._local, "target", None)
+        with self._lock:
+            lane = self._pick(target)
+            if lane is None:
+                raise RuntimeError(f"No usable Notion token left for {target}")
+            lane.users += 1
+            lane.jobs += 1
+        self._local.lane, self._local.target = lane, target
+        try:
+            yield lane
+        finally:
+            with self._lock:
+                # Failover may have moved the job to another lane
+                self._local.lane.users -= 1
+            self._local.lane, self._local.target = previous
+
+    def current(self, default_target: Optional[str] = None) -> TokenLane:
+        """
+        The lane pinned to this thread, or the best one for `default_target`.
+        """
+        lane = getattr(self._local, "lane", None)
+        if lane is not None:
+            return lane
+        with self._lock:
+            lane = self._pick(page_key(default_target))
+        if lane is None:
+            raise RuntimeError("No usable Notion token left")
+        return lane
+
+    def fail_over(self, lane: TokenLane, error: Exception,
+                  default_target: Optional[str] = None) -> Optional[TokenLane]:
+        """
+        Takes `lane` out of service after a 401 (or for the target, after a
+        403) and returns the lane to retry with, or None if there is none.
+        """
+        status = getattr(error, "status", None)
+        pinned = getattr(self._local, "lane", None) is lane
+        target = self._local.target if pinned else page_key(default_target)
+        with self._lock:
+            if status == UNAUTHORIZED:
+                if not lane.disabled:
+                    logger.error(f"🔑 {lane.name} was rejected ({error}); disabled for this run")
+                lane.disabled = True
+            else:
+                lane.denied.add(target)
+            replacement = self._pick(target, exclude=lane)
+            if replacement is not None and pinned:
+                lane.users -= 1
+                replacement.users += 1
+                replacement.jobs += 1
+                self._local.lane = replacement
+        if replacement is not None:
+            logger.warning(f"🔀 {lane.name} failed with HTTP {status} for {target or 'this request'}; "
+                           f"retrying with {replacement.name}")
+        return replacement
+
+
+def build_pool(tokens: List[Dict[str, Any]], rate_limit: float = DEFAULT_RATE_LIMIT,
+               client_factory=None) -> TokenPool:
+    """
+    Creates a TokenPool from the entries returned by utils.get_tokens.
+
+    Args:
+        tokens: Entries with `token`, `name`, optional `targets` and `rate_limit`.
+        rate_limit: Requests per second for entries without their own rate_limit.
+        client_factory: Builds a client from a token (default: notion_client.Client).
+    """
+    if client_factory is None:
+        from notion_client import Client
+        client_factory = lambda token: Client(auth=token)
+    lanes = [TokenLane(entry["name"], client_factory(entry["token"]),
+                       rate_limit=float(entry.get("rate_limit", rate_limit)), targets=entry.get("targets"))
+             for entry in tokens]
+    logger.info(f"🔑 Token pool: {len(lanes)} integrations "
+                f"({sum(lane.limiter.rate for lane in lanes):g} requests/s in total)")
+    return TokenPool(lanes)
@@ -0,0 +1,183 @@
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from src.utils import state_path, JsonStateFile
+
+logger = logging.getLogger(__name__)
+
+SYNC_LOG_FILE = "sync_log.json"
+MAX_SYNCS = 50             # Most recent syncs kept undoable
+DEFAULT_UNDO_WORKERS = 8   # Concurrent archive requests (the rate limit still applies)
+
+
+def new_sync_id() -> str:
+    """
+    Short, sortable ID for one sync, e.g. 20261019-143012-3fa1.
+    """
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:4]}"
+
+
+class SyncRecord:
+    """
+    The blocks and pages created by one sync, as needed to undo it.
+
+    Only top-level items are kept: blocks appended to a page (or to a toggle
+    heading) and pages created by the sync. Archiving a block or page takes
+    its children with it, so blocks added inside a page created by the same
+    sync are not recorded at all. Safe to fill from several threads.
+    """
+    def __init__(self, description: str = "", sync_id: Optional[str] = None,
+                 created_at: Optional[float] = None, items: Optional[List[Dict[str, Any]]] = None):
+        self.sync_id = sync_id or new_sync_id()
+        self.description = description
+        self.created_at = created_at or time.time()
+        self.items: List[Dict[str, Any]] = list(items or [])
+        self._pages = {item["id"] for item in self.items if item.get("page")}
+        self._lock = threading.Lock()
+
+    def add_page(self, page_id: str, parent_id: Optional[str]):
+        with self._lock:
+            self.items.append({"id": page_id, "parent": parent_id, "page": True})
+            self._pages.add(page_id)
+
+    def add_blocks(self, parent_id: str, blocks: List[Dict[str, Any]]):
+        """
+        Records blocks returned by an append to `parent_id`.
+        """
+        with self._lock:
+            if parent_id in self._pages:
+                return  # Archived along with their page
+            self.items.extend({"id": block["id"], "parent": parent_id} for block in blocks)
+
+    def discard(self, ids: List[str]):
+        """
+        Forgets items that have been archived.
+        """
+        gone = set(ids)
+        with self._lock:
+            self.items = [item for item in self.items if item["id"] not in gone]
+            self._pages -= gone
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"id": self.sync_id, "description": self.description,
+                    "created_at": self.created_at, "items": list(self.items)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SyncRecord":
+        return cls(description=data.get("description", ""), sync_id=data["id"],
+                   created_at=data.get("created_at"), items=data.get("items"))
+
+
+class SyncLog(JsonStateFile):
+    """
+    Local record of the last MAX_SYNCS syncs and what they created (JSON
+    file). Safe to share between threads.
+    """
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(path or state_path(SYNC_LOG_FILE), "sync log", entries=[])  # Oldest first
+
+    def get(self, sync_id: Optional[str] = None) -> SyncRecord:
+        """
+        Returns the sync with this ID (or unique ID prefix), or the latest one.
+
+        Raises:
+            ValueError: If no sync matches.
+        """
+        with self.lock:
+            entries = list(self.entries)
+        if not entries:
+            raise ValueError("No recorded syncs to undo")
+        if not sync_id:
+            return SyncRecord.from_dict(entries[-1])
+        matches = [entry for entry in entries if entry["id"].startswith(sync_id)]
+        if len(matches) != 1:
+            known = ", ".join(entry["id"] for entry in entries[-5:])
+            raise ValueError(f"{'Ambiguous' if matches else 'Unknown'} sync ID '{sync_id}' (recent: {known})")
+        return SyncRecord.from_dict(matches[0])
+
+    def recent(self, count: int = 10) -> List[SyncRecord]:
+        with self.lock:
+            entries = self.entries[-count:]
+        return [SyncRecord.from_dict(entry) for entry in reversed(entries)]
+
+    def put(self, record: SyncRecord):
+        entry = record.to_dict()
+        with self.lock:
+            self.entries = [e for e in self.entries if e["id"] != record.sync_id] + [entry]
+            self.entries = self.entries[-MAX_SYNCS:]
+            self.dirty = True
+
+    def remove(self, sync_id: str):
+        with self.lock:
+            self.entries = [e for e in self.entries if e["id"] != sync_id]
+            self.dirty = True
+
+
+def _already_gone(error: Exception) -> bool:
+    # Deleted by hand, or archived by an earlier, interrupted undo
+    status = getattr(error, "status", None)
+    return status == 404 or (status == 400 and "archived" in str(error).lower())
+
+
+def _archive(syncer, item: Dict[str, Any]) -> Optional[str]:
+    try:
+        if item.get("page"):
+            syncer._call("pages.update", page_id=item["id"], archived=True)
+        else:
+            syncer._call("blocks.delete", block_id=item["id"])
+    except Exception as e:
+        if not _already_gone(e):
+            return str(e)
+    return None
+
+
+def undo_sync(syncer, record: SyncRecord,
+              workers: int = DEFAULT_UNDO_WORKERS) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Archives everything a sync created, with concurrent requests under the
+    syncer's shared rate limit. Blocks that no longer exist count as archived.
+
+    Args:
+        syncer: NotionSync used for every request.
+        record: The sync to undo; archived items are removed from it.
+        workers: Requests in flight at once.
+
+    Returns:
+        (archived IDs, {ID: error} for items that could not be archived)
+    """
+    items = list(record.items)
+    if not items:
+        return [], {}
+    workers = max(1, min(workers, len(items)))
+    logger.info(f"↩️  Undoing sync {record.sync_id}: archiving {len(items)} item(s) ({workers} workers)")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        errors = list(pool.map(lambda item: _archive(syncer, item), items))
+    archived = [item["id"] for item, error in zip(items, errors) if error is None]
+    failed = {item["id"]: error for item, error in zip(items, errors) if error is not None}
+    record.discard(archived)
+    for block_id, error in failed.items():
+        logger.error(f"❌ Could not archive {block_id}: {error}")
+    return archived, failed
+
+
+def format_records(records: List[SyncRecord]) -> str:
+    """
+    Renders recorded syncs as a plain-text list, newest first.
+    """
+    if not records:
+        return "No recorded syncs"
+    lines = []
+    for record in records:
+        when = datetime.fromtimestamp(record.created_at).strftime("%Y-%m-%d %H:%M")
+        lines.append(f"{record.sync_id}  {when}  {len(record):>5} item(s)  {record.description}")
+    return "\n".join(lines)
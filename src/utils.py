@@ -1,9 +1,12 @@
 import os
 import re
 import sys
+import json
 import logging
+import tempfile
+import threading
 import yaml
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 # Configure logging
 def setup_logging(name: str = "notion_researcher") -> logging.Logger:
@@ -20,9 +23,21 @@ def setup_logging(name: str = "notion_researcher") -> logging.Logger:
 logger = logging.getLogger(__name__)
 
 CONFIG_FILE = "config.yaml"
+STATE_DIR = ".notion_pusher"  # Local caches, spool and history (next to config.yaml)
 CONFIG_TEMPLATE = """# Notion Researcher Configuration
 notion_token: "ntn_YOUR_TOKEN_HERE"
 root_page_id: "YOUR_ROOT_PAGE_ID_HERE"
+# rate_limit: 3  # Max requests per second (Notion allows ~3 on average)
+# notion_tokens:  # Several integrations instead of notion_token; work is spread across them
+#   - token: "ntn_YOUR_FIRST_TOKEN"
+#     targets: ["PAGE_ID_OR_URL"]  # Pages shared with this integration (omit: any page)
+#     rate_limit: 3  # This token's own budget (default: rate_limit)
+#   - token: "ntn_YOUR_SECOND_TOKEN"
+# title_cache_ttl: 86400  # Seconds a resolved page title stays cached
+# adaptive: true  # Off by default. Tune batch size and in-flight requests per target from 429s, timeouts and latency
+# table_overflow: append  # Tables over 100 rows: "append" rows in follow-up requests, or "split" into continuation tables
+# database_id: "YOUR_DATABASE_ID"  # Default database for `np import`
+# schema_cache_ttl: 3600  # Seconds a database schema stays cached
 """
 
 class ConfigLoader:
@@ -71,3 +86,112 @@ def extract_page_id(input_str: str) -> str:
         return match.group(1)
     
     raise ValueError(f"Could not extract a valid 32-char Page ID from: '{input_str}'")
+
+
+def get_root_page_id(config: Dict[str, Any]) -> Optional[str]:
+    """
+    Returns the configured root page ID, or None if it is missing or still the template placeholder.
+    """
+    root_page_id = config.get("root_page_id")
+    if root_page_id and "YOUR_ROOT_PAGE_ID_HERE" not in root_page_id:
+        return root_page_id
+    return None
+
+def get_tokens(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Returns the configured integration tokens: the `notion_tokens` pool, or
+    else `notion_token` on its own (empty if it is missing or a placeholder).
+    Entries are either a token string or a mapping with `token` and optional
+    `name`, `targets` (page IDs or URLs the integration can access) and
+    `rate_limit`.
+
+    Raises:
+        ValueError: If a pool entry has no usable token or an invalid target.
+    """
+    entries = config.get("notion_tokens")
+    if not entries:
+        token = config.get("notion_token")
+        if token and "YOUR_TOKEN_HERE" not in token:
+            return [{"token": token, "name": "notion_token"}]
+        return []
+
+    tokens = []
+    for n, entry in enumerate(entries, start=1):
+        if isinstance(entry, str):
+            entry = {"token": entry}
+        token = entry.get("token") if isinstance(entry, dict) else None
+        if not token or "YOUR_" in token:
+            raise ValueError(f"notion_tokens entry {n} has no valid 'token'")
+        targets = entry.get("targets")
+        if isinstance(targets, str):
+            targets = [targets]
+        parsed = {"token": token, "name": entry.get("name") or f"token {n}",
+                  "targets": [extract_page_id(t) for t in targets] if targets else None}
+        if entry.get("rate_limit") is not None:
+            parsed["rate_limit"] = float(entry["rate_limit"])
+        tokens.append(parsed)
+    return tokens
+
+def load_targets_file(path: str) -> List[str]:
+    """
+    Reads one target (ID or URL) per line. Blank lines and '#' comments are ignored.
+    """
+    targets = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                targets.append(line)
+    return targets
+
+def state_path(filename: str) -> str:
+    """
+    Returns the path of a file inside the local state directory, creating the directory if needed.
+    """
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, filename)
+
+
+class JsonStateFile:
+    """
+    Base for the small JSON files kept in the state directory (caches,
+    manifests, history). The file is read once; an unreadable file is
+    ignored with a warning. save() writes only after a change, through a
+    temporary file of its own, so concurrent savers never see a half-written
+    file. Subclasses keep their data in `entries` and hold `lock` while
+    touching it; save() takes the same lock.
+    """
+    indent: Optional[int] = None
+
+    def __init__(self, path: str, label: str, entries: Any = None):
+        """
+        Args:
+            path: Location of the JSON file.
+            label: Name of the file in warnings, e.g. "title index".
+            entries: Initial (empty) content; a dict if omitted.
+        """
+        self.path = path
+        self.entries = {} if entries is None else entries
+        self.dirty = False
+        self.lock = threading.RLock()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable {label} {path}: {e}")
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".",
+                                            suffix=".tmp", dir=os.path.dirname(self.path) or ".")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self.entries, f, ensure_ascii=False, indent=self.indent)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self.dirty = False
@@ -0,0 +1,281 @@
+import re
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Notion API limits checked locally
+MAX_TEXT_LENGTH = 2000       # Characters per rich_text content
+MAX_RICH_TEXT_ITEMS = 100    # Runs per rich_text array
+MAX_URL_LENGTH = 2000        # Characters per link or image URL
+MAX_EQUATION_LENGTH = 1000   # Characters per equation expression
+MAX_NESTING_DEPTH = 2        # Levels of children in one append request
+
+# Languages accepted by code blocks
+CODE_LANGUAGES = {
+    "abap", "agda", "arduino", "ascii art", "assembly", "bash", "basic", "bnf", "c", "c#", "c++",
+    "clojure", "coffeescript", "coq", "css", "dart", "dhall", "diff", "docker", "ebnf", "elixir",
+    "elm", "erlang", "f#", "flow", "fortran", "gherkin", "glsl", "go", "graphql", "groovy",
+    "haskell", "hcl", "html", "idris", "java", "javascript", "json", "julia", "kotlin", "latex",
+    "less", "lisp", "livescript", "llvm ir", "lua", "makefile", "markdown", "markup", "matlab",
+    "mathematica", "mermaid", "nix", "notion formula", "objective-c", "ocaml", "pascal", "perl",
+    "php", "plain text", "powershell", "prolog", "protobuf", "purescript", "python", "r", "racket",
+    "reason", "ruby", "rust", "sass", "scala", "scheme", "scss", "shell", "smalltalk", "solidity",
+    "sql", "swift", "toml", "typescript", "vb.net", "verilog", "vhdl", "visual basic", "webassembly",
+    "xml", "yaml", "java/c/c++/c#",
+}
+# Common fence info strings that name a supported language differently
+LANGUAGE_ALIASES = {
+    "py": "python", "python3": "python", "ipython": "python", "js": "javascript", "jsx": "javascript",
+    "node": "javascript", "ts": "typescript", "tsx": "typescript", "sh": "shell", "zsh": "shell",
+    "console": "shell", "shell-session": "shell", "ps1": "powershell", "pwsh": "powershell",
+    "yml": "yaml", "cpp": "c++", "cxx": "c++", "cc": "c++", "h": "c", "cs": "c#", "csharp": "c#",
+    "fsharp": "f#", "golang": "go", "rs": "rust", "rb": "ruby", "kt": "kotlin", "tex": "latex",
+    "md": "markdown", "objc": "objective-c", "dockerfile": "docker", "make": "makefile",
+    "jsonc": "json", "json5": "json", "text": "plain text", "txt": "plain text", "plaintext": "plain text",
+    "svg": "xml", "vbnet": "vb.net", "vb": "visual basic", "wasm": "webassembly", "proto": "protobuf",
+    "hs": "haskell", "ml": "ocaml", "pl": "perl", "jl": "julia", "m": "matlab", "tf": "hcl",
+}
+
+URL_PATTERN = re.compile(r'^(?:(?:https?|ftp)://\S+|(?:mailto|tel):\S+)$', re.IGNORECASE)
+LATEX_ENVIRONMENT = re.compile(r'\\(begin|end)\s*\{([^}]*)\}')
+LATEX_DELIMITER = re.compile(r'\\(left|right)(?![a-zA-Z])')
+
+
+@dataclass
+class Issue:
+    """One problem found in the parsed blocks."""
+    location: str  # e.g. "block 12 > child 3"
+    kind: str
+    message: str
+    repaired: bool
+
+
+@dataclass
+class ValidationReport:
+    """Problems found by validate_blocks: repaired ones and errors."""
+    issues: List[Issue] = field(default_factory=list)
+
+    @property
+    def errors(self) -> List[Issue]:
+        return [issue for issue in self.issues if not issue.repaired]
+
+    @property
+    def repaired(self) -> List[Issue]:
+        return [issue for issue in self.issues if issue.repaired]
+
+    def add(self, location: str, kind: str, message: str, repaired: bool):
+        self.issues.append(Issue(location, kind, message, repaired))
+
+    def summary(self) -> str:
+        counts = Counter(issue.kind for issue in self.repaired)
+        repaired = ", ".join(f"{kind} x{n}" for kind, n in counts.most_common())
+        text = f"{len(self.repaired)} repaired" + (f" ({repaired})" if repaired else "")
+        return text + f", {len(self.errors)} error(s)"
+
+    def log(self, source: str):
+        """
+        Logs one summary line, plus one line per error (nothing if all is well).
+        """
+        if not self.issues:
+            return
+        log = logger.error if self.errors else logger.info
+        log(f"🩺 [Pre-flight] {source}: {self.summary()}")
+        for issue in self.issues:
+            if issue.repaired:
+                logger.debug(f"   🔧 {issue.location}: {issue.message}")
+            else:
+                logger.error(f"   ❌ {issue.location}: {issue.message}")
+
+
+def equation_problem(expression: str) -> Optional[str]:
+    """
+    Returns why a LaTeX expression is malformed (unbalanced braces,
+    \\begin/\\end or \\left/\\right), or None if its nesting is fine.
+    """
+    depth = 0
+    escaped = False
+    for char in expression:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth < 0:
+                return "unbalanced '}'"
+    if depth:
+        return f"{depth} unclosed '{{'"
+
+    environments = []
+    for kind, name in LATEX_ENVIRONMENT.findall(expression):
+        if kind == "begin":
+            environments.append(name)
+        elif not environments or environments.pop() != name:
+            return f"\\end{{{name}}} without matching \\begin"
+    if environments:
+        return f"\\begin{{{environments[-1]}}} is never closed"
+
+    delimiters = 0
+    for kind in LATEX_DELIMITER.findall(expression):
+        delimiters += 1 if kind == "left" else -1
+        if delimiters < 0:
+            return "\\right without matching \\left"
+    if delimiters:
+        return "\\left without matching \\right"
+    return None
+
+
+def valid_url(url: str) -> bool:
+    return bool(url) and len(url) <= MAX_URL_LENGTH and bool(URL_PATTERN.match(url))
+
+
+def _check_rich_text(rich_text: List[Dict[str, Any]], location: str, report: ValidationReport,
+                     repair: bool) -> List[Dict[str, Any]]:
+    result = []
+    for n, item in enumerate(rich_text, start=1):
+        where = f"{location}, run {n}"
+        if item.get("type") == "equation":
+            expression = item["equation"].get("expression", "")
+            problem = equation_problem(expression) or (
+                f"longer than {MAX_EQUATION_LENGTH} characters" if len(expression) > MAX_EQUATION_LENGTH else None)
+            if problem:
+                report.add(where, "inline_equation", f"Inline equation {problem}; sent as code text", repair)
+                if repair:
+                    item = {"text": {"content": expression}, "annotations": {"code": True}}
+                else:
+                    result.append(item)
+                    continue
+            else:
+                result.append(item)
+                continue
+
+        text = item.get("text")
+        if text is None:
+            result.append(item)
+            continue
+        url = (text.get("link") or {}).get("url")
+        if url is not None and not valid_url(url):
+            report.add(where, "link_url", f"Invalid link URL {url[:80]!r}; link removed", repair)
+            if repair:
+                item = dict(item, text={"content": text["content"]})
+                text = item["text"]
+
+        content = text["content"]
+        if len(content) > MAX_TEXT_LENGTH:
+            report.add(where, "text_length", f"Text of {len(content)} characters split into runs of {MAX_TEXT_LENGTH}", repair)
+            if repair:
+                for start in range(0, len(content), MAX_TEXT_LENGTH):
+                    result.append(dict(item, text=dict(text, content=content[start:start + MAX_TEXT_LENGTH])))
+                continue
+        result.append(item)
+
+    if len(result) > MAX_RICH_TEXT_ITEMS:
+        report.add(location, "rich_text_items",
+                   f"{len(result)} rich_text runs (limit {MAX_RICH_TEXT_ITEMS}); simplify the formatting", False)
+    return result
+
+
+def _check_block(block: Dict[str, Any], location: str, depth: int, report: ValidationReport,
+                 repair: bool) -> Optional[Dict[str, Any]]:
+    """
+    Validates (and repairs) one block. Returns the block to send, a
+    replacement, or None if the block has to be dropped.
+    """
+    kind = block.get("type")
+    body = block.get(kind)
+    if not kind or not isinstance(body, dict):
+        report.add(location, "block_type", f"Block has no '{kind}' body", False)
+        return block
+
+    if kind == "image":
+        url = body.get(body.get("type", "external"), {}).get("url", "")
+        if not url.strip():
+            report.add(location, "image_url", "Image without URL dropped", repair)
+            return None if repair else block
+        if not valid_url(url):
+            report.add(location, "image_url", f"Image URL {url[:80]!r} is not an absolute URL; sent as text", repair)
+            if repair:
+                return {"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": url[:MAX_TEXT_LENGTH]}}]}}
+        return block
+
+    if kind == "code":
+        language = body.get("language", "plain text")
+        if language not in CODE_LANGUAGES:
+            fixed = LANGUAGE_ALIASES.get(language.lower(), language.lower())
+            fixed = fixed if fixed in CODE_LANGUAGES else "plain text"
+            report.add(location, "code_language", f"Code language {language!r} sent as {fixed!r}", repair)
+            if repair:
+                body["language"] = fixed
+
+    if kind == "equation":
+        expression = body.get("expression", "")
+        if not expression.strip():
+            report.add(location, "equation", "Empty equation dropped", repair)
+            return None if repair else block
+        problem = equation_problem(expression) or (
+            f"longer than {MAX_EQUATION_LENGTH} characters" if len(expression) > MAX_EQUATION_LENGTH else None)
+        if problem:
+            report.add(location, "equation", f"Equation {problem}; sent as a LaTeX code block", repair)
+            if repair:
+                block = {"type": "code", "code": {"language": "latex", "rich_text": []}}
+                body = block["code"]
+                body["rich_text"] = _check_rich_text([{"text": {"content": expression}}], location, report, repair)
+            return block
+
+    if kind == "table":
+        width = body.get("table_width", 0)
+        for n, row in enumerate(body.get("children", []), start=1):
+            cells = row.get("table_row", {}).get("cells", [])
+            if len(cells) != width:
+                report.add(f"{location} > row {n}", "table_width",
+                           f"Row has {len(cells)} cells, table has {width}; padded/truncated", repair)
+                if repair:
+                    row["table_row"]["cells"] = (cells + [[] for _ in range(width - len(cells))])[:width]
+
+    if "rich_text" in body:
+        body["rich_text"] = _check_rich_text(body["rich_text"], location, report, repair)
+    if "cells" in body:
+        body["cells"] = [_check_rich_text(cell, f"{location}, cell {n}", report, repair)
+                         for n, cell in enumerate(body["cells"], start=1)]
+
+    children = body.get("children")
+    if children:
+        if depth >= MAX_NESTING_DEPTH:
+            report.add(location, "nesting", f"Children nested deeper than {MAX_NESTING_DEPTH} levels", False)
+        body["children"] = _check_blocks(children, location + " > child", depth + 1, report, repair)
+    return block
+
+
+def _check_blocks(blocks: List[Dict[str, Any]], prefix: str, depth: int, report: ValidationReport,
+                  repair: bool) -> List[Dict[str, Any]]:
+    result = []
+    for n, block in enumerate(blocks, start=1):
+        checked = _check_block(block, f"{prefix} {n}", depth, report, repair)
+        if checked is not None:
+            result.append(checked)
+    return result
+
+
+def validate_blocks(blocks: List[Dict[str, Any]], repair: bool = True) -> ValidationReport:
+    """
+    Checks parsed blocks against the Notion API schema and limits in one pass,
+    before anything is sent. Problems with a safe fix are repaired in place
+    (e.g. unknown code languages, over-long text, relative image URLs);
+    the rest are reported as errors, so a doomed upload fails before its
+    first request instead of after some batches were written.
+
+    Args:
+        blocks: Parsed blocks (modified in place when repairing).
+        repair: Apply fixes; if False, every problem is reported as an error.
+
+    Returns:
+        The ValidationReport; `errors` is empty if the blocks can be sent.
+    """
+    report = ValidationReport()
+    blocks[:] = _check_blocks(blocks, "block", 0, report, repair)
+    return report
@@ -0,0 +1,133 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class FakeError(Exception):
+    """An API error with an HTTP status. Retry-After is 0, so retries don't wait."""
+    def __init__(self, status, code="", retry_after="0"):
+        super().__init__(f"HTTP {status} {code}".strip())
+        self.status = status
+        self.code = code
+        self.headers = {"retry-after": retry_after} if retry_after else {}
+
+
+def make_blocks(n, tag=""):
+    """`n` paragraphs; with a tag, each holds its own text (x0, x1, ...)."""
+    if not tag:
+        return [{"type": "paragraph", "paragraph": {"rich_text": []}} for _ in range(n)]
+    return [{"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": f"{tag}{i}"}}]}}
+            for i in range(n)]
+
+
+def make_client(endpoints):
+    """
+    Builds a client from {"blocks.children.append": function, ...}, the
+    dotted paths NotionSync calls endpoints by.
+    """
+    client = type("Client", (), {})()
+    for path, function in endpoints.items():
+        owner = client
+        *parents, name = path.split(".")
+        for part in parents:
+            if not hasattr(owner, part):
+                setattr(owner, part, type(part.capitalize(), (), {})())
+            owner = getattr(owner, part)
+        setattr(owner, name, function)
+    return client
+
+
+class FakeClient:
+    """
+    Thread-safe in-memory Notion client: creates pages, appends blocks,
+    archives pages and deletes blocks, and records every call.
+
+    `failures` maps a block/page ID or an endpoint to what its calls raise:
+    an exception is raised every time, a list is used up one call at a time
+    (None lets that call through). `delay` is added to every call.
+    """
+    def __init__(self, failures=None, delay=0.0):
+        self.lock = threading.Lock()
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.calls = []     # (endpoint, target)
+        self.appends = []   # (block_id, children)
+        self.created = []   # (parent_id, title)
+        self.archived = []  # Page IDs
+        self.deleted = []   # Block IDs
+        self.pages_created = 0
+        self.blocks_created = 0
+        self.active = 0
+        self.peak = 0
+        self.closed = False
+        endpoints = make_client({"pages.create": self._create, "pages.update": self._update,
+                                 "blocks.delete": self._delete, "blocks.children.append": self._append})
+        self.pages, self.blocks = endpoints.pages, endpoints.blocks
+
+    def children_of(self, block_id):
+        """Every block appended to `block_id`, in order."""
+        return [block for parent, children in self.appends if parent == block_id for block in children]
+
+    def appended_to(self):
+        """Parent IDs of the appends, in order."""
+        return [parent for parent, _ in self.appends]
+
+    def close(self):
+        self.closed = True
+
+    def _planned(self, key):
+        planned = self.failures.get(key)
+        if isinstance(planned, list):
+            return planned.pop(0) if planned else None
+        return planned
+
+    @contextmanager
+    def _request(self, endpoint, target):
+        with self.lock:
+            self.calls.append((endpoint, target))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+            with self.lock:
+                error = self._planned(target) or self._planned(endpoint)
+            if error is not None:
+                raise error
+            yield
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def _append(self, block_id, children, after=None):
+        with self._request("blocks.children.append", block_id):
+            with self.lock:
+                self.appends.append((block_id, children))
+                first = self.blocks_created
+                self.blocks_created += len(children)
+        return {"results": [{"id": f"blk{first + i}"} for i in range(len(children))]}
+
+    def _create(self, parent, properties, children=None):
+        parent_id = next(iter(parent.values()))
+        title = properties.get("title", [{}])[0].get("text", {}).get("content")
+        with self._request("pages.create", parent_id):
+            with self.lock:
+                self.created.append((parent_id, title))
+                self.pages_created += 1
+                page_id = f"{self.pages_created:032x}"
+        if children:
+            self._append(page_id, children)
+        return {"id": page_id, "url": f"https://notion.so/{page_id}"}
+
+    def _update(self, page_id, **properties):
+        with self._request("pages.update", page_id):
+            if properties.get("archived"):
+                with self.lock:
+                    self.archived.append(page_id)
+        return dict(properties, id=page_id)
+
+    def _delete(self, block_id):
+        with self._request("blocks.delete", block_id):
+            with self.lock:
+                self.deleted.append(block_id)
+        return {"id": block_id, "archived": True}
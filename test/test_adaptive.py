@@ -0,0 +1,247 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from contextlib import ExitStack
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adaptive import (AdaptiveController, TuningStore, attach_controller, classify,
+                          OK, THROTTLED, TIMEOUT, TOO_LARGE, BATCH_STEP)
+from src.client import NotionSync
+from src.fanout import fan_out
+from fakes import FakeError, make_client
+
+
+def simulate(controller, rounds, capacity=100, max_payload=100, latency=lambda size: 0.2, timeout=10.0):
+    """
+    Simulated server: requests beyond `capacity` in flight are throttled, more
+    than `max_payload` children are rejected, and requests slower than
+    `timeout` time out. Returns the (concurrency, batch_size) used per round.
+    """
+    history = []
+    for _ in range(rounds):
+        concurrency, size = controller.concurrency, controller.batch_size
+        history.append((concurrency, size))
+        with ExitStack() as stack:
+            for n in range(concurrency):
+                stack.enter_context(controller.slot())
+            for n in range(concurrency):
+                if n >= capacity:
+                    controller.record(THROTTLED, 0.01, size)
+                elif size > max_payload:
+                    controller.record(TOO_LARGE, 0.05, size)
+                elif latency(size) > timeout:
+                    controller.record(TIMEOUT, timeout, size)
+                else:
+                    controller.record(OK, latency(size), size)
+    return history
+
+
+class TestController(unittest.TestCase):
+    def test_concurrency_converges_around_capacity(self):
+        controller = AdaptiveController(concurrency=1, max_concurrency=32)
+        history = simulate(controller, 200, capacity=6)
+        tail = [c for c, _ in history[50:]]
+        # AIMD sawtooth: climbs to one above capacity, halves, climbs again
+        self.assertEqual(max(tail), 7)
+        self.assertGreaterEqual(min(tail), 3)
+        self.assertGreater(sum(tail) / len(tail), 4)
+        self.assertEqual({b for _, b in history}, {100})
+
+    def test_healthy_server_reaches_the_cap(self):
+        controller = AdaptiveController(concurrency=1, max_concurrency=8)
+        history = simulate(controller, 40)
+        self.assertEqual(history[-1], (8, 100))
+
+    def test_batch_size_converges_below_payload_limit(self):
+        controller = AdaptiveController(concurrency=1, max_concurrency=1)
+        history = simulate(controller, 100, max_payload=30)
+        sizes = [b for _, b in history[20:]]
+        self.assertLessEqual(max(sizes), 30 + BATCH_STEP)
+        self.assertGreaterEqual(min(sizes), 15)
+        # Settles on the limit itself; only the periodic probes overshoot
+        self.assertEqual(Counter(sizes).most_common(1)[0][0], 30)
+        self.assertLess(sum(1 for b in sizes if b > 30) / len(sizes), 0.1)
+
+    def test_timeouts_shrink_batches_and_concurrency(self):
+        controller = AdaptiveController(concurrency=4, max_concurrency=4, latency_target=5.0)
+        history = simulate(controller, 60, latency=lambda size: 0.1 * size, timeout=4.0)
+        self.assertLessEqual(max(b for _, b in history[10:]), 40 + BATCH_STEP)
+        self.assertEqual(history[1][1], 50)
+
+    def test_slow_responses_stop_increases(self):
+        controller = AdaptiveController(batch_size=50, concurrency=2, latency_target=1.0)
+        history = simulate(controller, 20, latency=lambda size: 1.5)
+        self.assertEqual(set(history), {(2, 50)})
+        self.assertAlmostEqual(controller.latency, 1.5)
+
+    def test_burst_of_429s_is_one_signal(self):
+        controller = AdaptiveController(concurrency=8, max_concurrency=8)
+        simulate(controller, 1, capacity=0)
+        self.assertEqual(controller.concurrency, 4)
+
+    def test_stale_sizes_are_not_new_signals(self):
+        controller = AdaptiveController(concurrency=4, max_concurrency=4)
+        with controller.slot():
+            controller.record(TIMEOUT, 1.0, 100)
+        self.assertEqual((controller.concurrency, controller.batch_size), (2, 50))
+        # Cut at the old size before the decrease, answered after it
+        with controller.slot():
+            controller.record(TIMEOUT, 1.0, 100)
+            controller.record(THROTTLED, 0.1, 80)
+        self.assertEqual((controller.concurrency, controller.batch_size), (2, 50))
+        with controller.slot():
+            controller.record(TIMEOUT, 1.0, 50)
+        self.assertEqual((controller.concurrency, controller.batch_size), (1, 25))
+
+    def test_only_healthy_settings_are_confirmed(self):
+        controller = AdaptiveController(concurrency=2, max_concurrency=8)
+        for _ in range(4):
+            with controller.slot():
+                controller.record(TIMEOUT, 1.0, controller.batch_size)
+        self.assertEqual(controller.batch_size, 6)
+        self.assertIsNone(controller.confirmed_settings())  # Never healthy: nothing to save
+
+        simulate(controller, 2)
+        self.assertEqual(controller.confirmed_settings()["batch_size"], 16)
+        controller.restore({"batch_size": 40, "concurrency": 3})
+        with controller.slot():
+            controller.record(TIMEOUT, 1.0, 40)
+        self.assertEqual((controller.confirmed_settings()["batch_size"], controller.batch_size), (40, 20))
+
+    def test_classify(self):
+        self.assertEqual(classify(FakeError(429, "rate_limited")), THROTTLED)
+        self.assertEqual(classify(FakeError(413)), TOO_LARGE)
+        self.assertEqual(classify(FakeError(504)), TIMEOUT)
+        self.assertEqual(classify(FakeError(400, "validation_error")), "error")
+
+
+class SimulatedNotion:
+    """Thread-safe fake: 413 above `max_payload` children, 504 above `slow_payload`, 429 above `capacity` in flight."""
+    def __init__(self, capacity=3, max_payload=25, slow_payload=100):
+        self.capacity = capacity
+        self.max_payload = max_payload
+        self.slow_payload = slow_payload
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.requests = 0
+        self.pages = {}
+        self.blocks = make_client({"blocks.children.append": self.append}).blocks
+
+    def append(self, block_id, children):
+        with self.lock:
+            self.active += 1
+            self.requests += 1
+            self.peak = max(self.peak, self.active)
+            busy = self.active > self.capacity
+        try:
+            threading.Event().wait(0.002)
+            if busy:
+                with self.lock:
+                    self.throttled += 1
+                raise FakeError(429, "rate_limited", retry_after="0.01")
+            if len(children) > self.max_payload:
+                with self.lock:
+                    self.rejected += 1
+                raise FakeError(413)
+            if len(children) > self.slow_payload:
+                raise FakeError(504, retry_after="0.01")
+            with self.lock:
+                self.pages.setdefault(block_id, []).extend(children)
+            return {"results": [{"id": f"{block_id}-{i}"} for i in range(len(children))]}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class TestAdaptivePush(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def push(self, settings=None):
+        notion = SimulatedNotion()
+        syncer = NotionSync("token", None, rate_limit=0, max_retries=10, client=notion)
+        syncer.controller = AdaptiveController(max_concurrency=6)
+        if settings:
+            syncer.controller.restore(settings)
+        blocks = [{"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": str(i)}}]}}
+                  for i in range(250)]
+        targets = [f"{n:032x}" for n in range(6)]
+
+        results = fan_out(syncer, targets, blocks, "T", max_workers=6)
+        self.assertTrue(all(r.ok for r in results))
+        for target in targets:
+            self.assertEqual(notion.pages[target], blocks)
+        self.assertLessEqual(notion.peak, 6)
+        return notion, syncer.controller.settings()
+
+    def test_fan_out_adapts_and_delivers_in_order(self):
+        notion, settings = self.push()
+        self.assertEqual((settings["batch_size"], settings["ceiling"]), (25, 26))
+        self.assertLess(notion.rejected / notion.requests, 0.3)
+
+        # Warm start from the saved settings: no payload is rejected again
+        notion, _ = self.push(settings)
+        self.assertEqual(notion.rejected, 0)
+        self.assertLessEqual(notion.peak, 6)
+
+    def test_timed_out_batches_are_not_resent(self):
+        notion = SimulatedNotion(max_payload=100, slow_payload=30)
+        syncer = NotionSync("token", None, rate_limit=0, client=notion, controller=AdaptiveController())
+        blocks = [{"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": str(i)}}]}}
+                  for i in range(100)]
+        # A gateway timeout may come after the blocks were written: fail rather than resend
+        with self.assertRaises(FakeError):
+            syncer.push_blocks("page", blocks)
+        self.assertEqual(notion.requests, 1)
+        self.assertNotIn("page", notion.pages)
+        self.assertEqual(syncer.controller.batch_size, 50)  # The requests that follow are smaller
+
+    def test_queued_requests_use_the_latest_batch_size(self):
+        notion = SimulatedNotion(max_payload=100)
+        controller = AdaptiveController(concurrency=1)
+        syncer = NotionSync("token", None, rate_limit=0, client=notion, controller=controller)
+        sizes = []
+        append = notion.append
+        notion.blocks.children.append = lambda block_id, children: sizes.append(len(children)) or append(block_id, children)
+        blocks = [{"type": "paragraph", "paragraph": {"rich_text": []}} for _ in range(100)]
+
+        with controller.slot():
+            worker = threading.Thread(target=syncer.push_blocks, args=("page", blocks))
+            worker.start()
+            threading.Event().wait(0.05)  # Queued for the slot
+            with controller._cond:
+                controller.batch_size = 30
+        worker.join()
+        self.assertEqual(sizes[0], 30)  # Not the 100 it was at when the push started
+        self.assertEqual(notion.pages["page"], blocks)
+
+    def test_settings_persist_per_target(self):
+        store = TuningStore(os.path.join(self.tmp, "tuning.json"))
+        syncer = NotionSync("token", None, rate_limit=0, client=object())
+        controller = attach_controller(syncer, "page-a", store)
+        self.assertEqual((controller.batch_size, controller.concurrency), (100, 2))
+        controller.restore({"batch_size": 40, "concurrency": 5, "ceiling": 48})
+        store.put("page-a", controller.settings())
+        store.save()
+
+        store = TuningStore(os.path.join(self.tmp, "tuning.json"))
+        warm = attach_controller(syncer, "page-a", store, max_concurrency=4)
+        self.assertEqual(warm.settings(), {"batch_size": 40, "concurrency": 4, "ceiling": 48, "latency": None})
+        cold = attach_controller(syncer, "page-b", store)
+        self.assertEqual((cold.batch_size, cold.concurrency), (100, 2))
+        self.assertIs(syncer.controller, cold)
+
+
+if __name__ == '__main__':
+    unittest.main()
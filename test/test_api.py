@@ -0,0 +1,85 @@
+import io
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.api import SyncSession, parse_markdown
+from src.parser import parse_markdown_text
+from fakes import FakeClient
+
+ROOT = "r" * 32
+OTHER = "b" * 32
+
+NOTE = "# Note\n\nSome **bold** text\n\n- a\n- b\n"
+
+
+class TestParseMarkdown(unittest.TestCase):
+    def test_strings_bytes_and_streams_parse_alike(self):
+        expected = parse_markdown_text(NOTE)
+        self.assertEqual(parse_markdown(NOTE), expected)
+        self.assertEqual(parse_markdown(NOTE.encode("utf-8")), expected)
+        self.assertEqual(parse_markdown(io.StringIO(NOTE)), expected)
+        self.assertEqual(parse_markdown(line for line in NOTE.splitlines(keepends=True)), expected)
+
+
+class TestSyncSession(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.mkdtemp()
+        os.chdir(self.tmp)  # Title index lives in ./.notion_pusher
+        self.client = FakeClient()
+        self.session = SyncSession(config={"notion_token": "secret", "root_page_id": ROOT, "rate_limit": 0},
+                                   client=self.client)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def test_concurrent_publishes_share_one_client(self):
+        syncers = set()
+
+        def publish(n):
+            result = self.session.publish(f"Note {n}", target=OTHER if n % 2 else None, title=f"T{n}")
+            syncers.add(id(self.session.syncer))
+            return result
+
+        threads = [threading.Thread(target=publish, args=(n,)) for n in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(syncers), 1)
+        for page_id in (ROOT, OTHER):
+            texts = sorted(b[b["type"]]["rich_text"][0]["text"]["content"] for b in self.client.children_of(page_id))
+            self.assertEqual(len(texts), 16)  # 8 notes, each with its H1 title
+        self.assertIn("Note 15", texts)
+
+        self.session.close()
+        self.assertTrue(self.client.closed)
+
+    def test_new_page_and_errors(self):
+        result = self.session.publish(io.StringIO(NOTE), target=f"https://notion.so/Page-{OTHER}",
+                                      title="Report", new_page=True)
+        self.assertEqual(result.url, f"https://notion.so/{result.page_id}")
+        self.assertEqual(result.blocks, len(parse_markdown_text(NOTE)))
+        self.assertEqual(self.client.children_of(result.page_id), parse_markdown_text(NOTE))
+
+        with self.assertRaises(ValueError):
+            self.session.publish("![](  )\n" + "**a** b " * 60, target=OTHER)
+        self.assertEqual(self.session.publish("", target=OTHER).blocks, 0)
+        self.assertNotIn(OTHER, self.client.appended_to())
+
+    def test_missing_token(self):
+        session = SyncSession(config={"root_page_id": ROOT})
+        with self.assertRaises(ValueError):
+            session.publish("x")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import sys
+import stat
+import shutil
+import tempfile
+import threading
+import unittest
+from contextlib import nullcontext
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.daemon import SyncDaemon, make_server, send_request, default_socket_path
+
+PAGE_A = "a" * 32
+PAGE_B = "b" * 32
+
+
+class FakeSyncer:
+    def __init__(self):
+        self.pushed = []
+
+    def push_batches(self, page_id, batches, record=None):
+        self.pushed.append((page_id, [block for batch in batches for block in batch]))
+
+    def lane(self, target):
+        return nullcontext()
+
+
+@unittest.skipUnless(hasattr(__import__("socket"), "AF_UNIX"), "Unix sockets not available")
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmp, "np.sock")
+        self.syncer = FakeSyncer()
+        config = {"root_page_id": PAGE_A}
+        self.server = make_server(SyncDaemon(config, self.syncer), self.socket_path)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp)
+
+    def test_ping(self):
+        self.assertTrue(send_request({"op": "ping"}, self.socket_path)["ok"])
+
+    def test_inline_markdown_to_configured_root(self):
+        response = send_request({"op": "sync", "markdown": "# Hello\n\nWorld\n", "title": "Log"}, self.socket_path)
+        self.assertTrue(response["ok"])
+        page_id, blocks = self.syncer.pushed[0]
+        self.assertEqual(page_id, PAGE_A)
+        # Injected title + heading + paragraph
+        self.assertEqual([b["type"] for b in blocks], ["heading_1", "heading_1", "paragraph"])
+
+    def test_file_job_fans_out(self):
+        path = os.path.join(self.tmp, "note.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("- item\n")
+        response = send_request({"op": "sync", "file": path, "targets": [PAGE_A, PAGE_B]}, self.socket_path)
+        self.assertEqual(len(response["results"]), 2)
+        self.assertEqual(sorted(page for page, _ in self.syncer.pushed), [PAGE_A, PAGE_B])
+
+    def test_errors_are_reported(self):
+        response = send_request({"op": "sync", "file": os.path.join(self.tmp, "missing.md")}, self.socket_path)
+        self.assertFalse(response["ok"])
+        self.assertIn("File not found", response["error"])
+
+    def test_no_daemon_returns_none(self):
+        self.assertIsNone(send_request({"op": "ping"}, os.path.join(self.tmp, "other.sock")))
+
+    def test_second_daemon_is_refused(self):
+        with self.assertRaises(RuntimeError):
+            make_server(SyncDaemon({}, self.syncer), self.socket_path)
+
+    def test_socket_is_private(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.socket_path).st_mode), 0o600)
+
+    def test_client_in_another_directory_finds_the_daemon(self):
+        runtime_dir = os.path.join(self.tmp, "run")
+        elsewhere = os.path.join(self.tmp, "elsewhere")
+        os.makedirs(elsewhere)
+        cwd = os.getcwd()
+        with mock.patch.dict(os.environ, {"XDG_RUNTIME_DIR": runtime_dir}):
+            server = make_server(SyncDaemon({}, self.syncer))
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                os.chdir(elsewhere)
+                self.assertTrue(send_request({"op": "ping"})["ok"])
+            finally:
+                os.chdir(cwd)
+                server.shutdown()
+                server.server_close()
+            self.assertTrue(os.path.isabs(default_socket_path()))
+            self.assertEqual(stat.S_IMODE(os.stat(os.path.dirname(default_socket_path())).st_mode), 0o700)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.client import NotionSync
+from src.dirsync import SyncManifest
+from src.dbimport import SchemaCache, split_front_matter, build_properties, import_notes
+from fakes import FakeClient, FakeError, make_client
+
+DATABASE = "d" * 32
+SCHEMA = {"Name": "title", "Tags": "multi_select", "Year": "number", "Published": "date",
+          "Read": "checkbox", "Venue": "select", "Summary": "rich_text"}
+
+
+class FakeNotion(FakeClient):
+    """The shared fake client, with one database (of one data source) to create rows in."""
+    def __init__(self):
+        super().__init__()
+        self.rows = []
+        endpoints = make_client({"databases.retrieve": self._retrieve_database,
+                                 "data_sources.retrieve": self._retrieve_source})
+        self.databases, self.data_sources = endpoints.databases, endpoints.data_sources
+
+    def endpoints(self):
+        return [endpoint for endpoint, _ in self.calls]
+
+    def _retrieve_database(self, database_id):
+        with self._request("databases.retrieve", database_id):
+            return {"id": database_id, "data_sources": [{"id": "ds-1", "name": "Notes"}]}
+
+    def _retrieve_source(self, data_source_id):
+        with self._request("data_sources.retrieve", data_source_id):
+            return {"properties": {name: {"type": kind} for name, kind in SCHEMA.items()}}
+
+    def _create(self, parent, properties, children=None):
+        # Rows keep the body sent with them; later appends are recorded as usual
+        with self._request("pages.create", parent["data_source_id"]):
+            with self.lock:
+                page_id = f"row-{len(self.rows)}"
+                self.rows.append({"parent": parent, "properties": properties, "children": children or []})
+        return {"id": page_id, "url": f"https://notion.so/{page_id}"}
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split_front_matter(self):
+        meta, body = split_front_matter("---\ntitle: Attention\nyear: 2017\n---\n# Notes\n")
+        self.assertEqual(meta, {"title": "Attention", "year": 2017})
+        self.assertEqual(body, "# Notes\n")
+        self.assertEqual(split_front_matter("# No front matter\n---\n"), ({}, "# No front matter\n---\n"))
+        with self.assertRaises(ValueError):
+            split_front_matter("---\n- a list\n---\nbody")
+
+    def test_build_properties(self):
+        import datetime
+        meta = {"title": "Attention", "tags": ["nlp", "transformers"], "YEAR": "2017",
+                "published": datetime.date(2017, 6, 12), "read": "yes", "venue": "NeurIPS",
+                "unknown": 1, "summary": None}
+        properties, skipped = build_properties(meta, SCHEMA, "fallback")
+        self.assertEqual(properties["Name"], {"title": [{"text": {"content": "Attention"}}]})
+        self.assertEqual(properties["Tags"], {"multi_select": [{"name": "nlp"}, {"name": "transformers"}]})
+        self.assertEqual(properties["Year"], {"number": 2017.0})
+        self.assertEqual(properties["Published"], {"date": {"start": "2017-06-12"}})
+        self.assertEqual(properties["Read"], {"checkbox": True})
+        self.assertEqual(properties["Venue"], {"select": {"name": "NeurIPS"}})
+        self.assertEqual(sorted(skipped), ["summary", "unknown"])
+        self.assertEqual(build_properties({}, SCHEMA, "fallback")[0],
+                         {"Name": {"title": [{"text": {"content": "fallback"}}]}})
+
+
+class TestImportNotes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.notes = os.path.join(self.tmp, "notes")
+        os.makedirs(self.notes)
+        self.write("a.md", "---\ntitle: Paper A\ntags: [nlp]\n---\n# A\n\nAlpha")
+        self.write("b.md", "Plain note without front matter")
+        self.write("long.md", "---\nyear: 2020\n---\n" + "\n".join(f"- item {i}" for i in range(150)))
+        self.fake = FakeNotion()
+        self.syncer = NotionSync("token", None, rate_limit=0, client=self.fake)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, rel, text):
+        with open(os.path.join(self.notes, rel), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def run_import(self, **kwargs):
+        return import_notes(self.syncer, self.notes, DATABASE, SyncManifest(os.path.join(self.tmp, "m.json")),
+                            SchemaCache(os.path.join(self.tmp, "schema.json")), **kwargs)
+
+    def test_rows_are_created_with_their_bodies(self):
+        results = self.run_import(workers=3)
+        self.assertEqual({r.status for r in results}, {"uploaded"})
+        rows = {r["properties"]["Name"]["title"][0]["text"]["content"]: r for r in self.fake.rows}
+        self.assertEqual(sorted(rows), ["Paper A", "b", "long"])
+        self.assertTrue(all(r["parent"] == {"type": "data_source_id", "data_source_id": "ds-1"}
+                            for r in self.fake.rows))
+        self.assertEqual(rows["Paper A"]["properties"]["Tags"], {"multi_select": [{"name": "nlp"}]})
+        self.assertEqual(rows["long"]["properties"]["Year"], {"number": 2020})
+        # Short notes take one request; the long one sends its first 100 blocks with the row
+        self.assertEqual(len(rows["Paper A"]["children"]), 2)
+        self.assertEqual(len(rows["long"]["children"]), 100)
+        self.assertEqual([len(children) for _, children in self.fake.appends], [50])
+        self.assertEqual(self.fake.endpoints().count("pages.create") + self.fake.endpoints().count("blocks.children.append"), 4)
+
+    def test_schema_is_cached_and_unchanged_notes_are_skipped(self):
+        self.run_import()
+        self.fake.calls.clear()
+        results = self.run_import()
+        self.assertEqual({r.status for r in results}, {"unchanged"})
+        self.assertEqual(self.fake.endpoints(), [])
+
+        self.write("b.md", "Edited")
+        self.run_import()
+        self.assertEqual(self.fake.endpoints(), ["pages.create", "pages.update"])
+
+    def test_partial_row_is_archived(self):
+        self.fake.failures["blocks.children.append"] = FakeError(400, "validation_error")
+        results = {r.path: r for r in self.run_import(workers=1)}
+        self.assertEqual(results["long.md"].status, "failed")
+        self.assertEqual(self.fake.archived, ["row-2"])
+        self.assertEqual(results["b.md"].status, "uploaded")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.client import NotionSync
+from src.dirsync import SyncManifest, sync_directory, collect_files, format_report
+from fakes import FakeClient
+
+ROOT = "r" * 32
+
+
+class TestDirectorySync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.notes = os.path.join(self.tmp, "notes")
+        os.makedirs(os.path.join(self.notes, "papers"))
+        self.write("a.md", "# A\n\nAlpha")
+        self.write("b.md", "- one\n- two")
+        self.write("papers/c.md", "Gamma")
+        self.manifest_path = os.path.join(self.tmp, "manifest.json")
+        self.fake = FakeClient()
+        self.syncer = NotionSync("token", ROOT, rate_limit=0, client=self.fake)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write(self, rel, text):
+        with open(os.path.join(self.notes, rel), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def sync(self, **kwargs):
+        kwargs.setdefault("parse_workers", 1)
+        return sync_directory(self.syncer, self.notes, ROOT, SyncManifest(self.manifest_path), **kwargs)
+
+    def statuses(self, results):
+        return {r.path.replace(os.sep, "/"): r.status for r in results}
+
+    def test_only_changed_files_are_resent(self):
+        first = self.sync()
+        self.assertEqual(set(self.statuses(first).values()), {"uploaded"})
+        self.assertEqual(sorted(t for _, t in self.fake.created), ["a", "b", "papers/c"])
+
+        # Nothing changed: no requests at all
+        self.fake.created.clear()
+        self.assertEqual(set(self.statuses(self.sync()).values()), {"unchanged"})
+        self.assertEqual(self.fake.created, [])
+
+        # Touched but identical content is still unchanged
+        path = os.path.join(self.notes, "a.md")
+        os.utime(path, (1, 1))
+        self.assertEqual(self.statuses(self.sync())["a.md"], "unchanged")
+
+        # Edited file: new page, old page archived once the new one is complete
+        old_page = SyncManifest(self.manifest_path).files(ROOT)["b.md"]["page_id"]
+        self.write("b.md", "- one\n- two\n- three")
+        statuses = self.statuses(self.sync())
+        self.assertEqual(statuses["b.md"], "uploaded")
+        self.assertEqual(statuses["a.md"], "unchanged")
+        self.assertEqual(self.fake.archived, [old_page])
+
+    def test_prune_archives_removed_files(self):
+        self.sync()
+        page_id = SyncManifest(self.manifest_path).files(ROOT)["a.md"]["page_id"]
+        os.remove(os.path.join(self.notes, "a.md"))
+        results = self.sync(prune=True)
+        self.assertEqual(self.statuses(results)["a.md"], "pruned")
+        self.assertEqual(self.fake.archived, [page_id])
+        self.assertNotIn("a.md", SyncManifest(self.manifest_path).files(ROOT))
+
+    def test_invalid_file_fails_before_any_request(self):
+        self.write("bad.md", " ".join("**a** b" for _ in range(60)))  # 120 runs, limit is 100
+        statuses = self.statuses(self.sync())
+        self.assertEqual(statuses["bad.md"], "failed")
+        self.assertEqual(sorted(t for _, t in self.fake.created), ["a", "b", "papers/c"])
+
+    def test_process_pool_and_glob(self):
+        results = sync_directory(self.syncer, os.path.join(self.notes, "*.md"), ROOT,
+                                 SyncManifest(self.manifest_path), parse_workers=2)
+        self.assertEqual(self.statuses(results), {"a.md": "uploaded", "b.md": "uploaded"})
+        self.assertEqual(sorted(len(children) for _, children in self.fake.appends), [2, 2])
+        self.assertIn("2 uploaded, 0 unchanged, 0 failed", format_report(results, 1.0))
+
+    def test_glob_base_ignores_what_matches(self):
+        # Only papers/ matches at first; a later match elsewhere must not rename it
+        pattern = os.path.join(self.notes, "**", "c*.md")
+        self.assertEqual(collect_files(pattern), (self.notes, [os.path.join(self.notes, "papers", "c.md")]))
+        self.write("cb.md", "Top-level match")
+        base, paths = collect_files(pattern)
+        self.assertEqual(base, self.notes)
+        self.assertEqual(sorted(os.path.relpath(p, base) for p in paths), ["cb.md", os.path.join("papers", "c.md")])
+        self.assertEqual(collect_files("*.nothing")[0], ".")
+
+    def test_linked_notes_cost_no_extra_requests(self):
+        # a <-> papers/c form a cycle; b links to a by relative path
+        self.write("a.md", "See [[c]] and [[papers/c|the paper]]")
+        self.write("b.md", "Back to [A](a.md)")
+        self.write("papers/c.md", "Cited by [[A]]")
+        self.write("d.md", "Links to [[nothing]]")
+        self.sync(resolve_links=True)
+        self.assertEqual(len(self.fake.created), 4)
+        self.assertEqual(len(self.fake.appends), 4)  # One body request per note, cycle included
+        pages = {rel: entry["page_id"] for rel, entry in SyncManifest(self.manifest_path).files(ROOT).items()}
+        a = self.fake.children_of(pages["a.md"])[0]["paragraph"]["rich_text"]
+        self.assertEqual(a[1], {"type": "mention", "mention": {"type": "page", "page": {"id": pages["papers/c.md"]}}})
+        self.assertEqual(a[3]["text"], {"content": "the paper", "link": {"url": f"https://notion.so/{pages['papers/c.md']}"}})
+        b = self.fake.children_of(pages["b.md"])[0]["paragraph"]["rich_text"]
+        self.assertEqual(b[1]["text"]["link"]["url"], f"https://notion.so/{pages['a.md']}")
+
+        d = self.fake.children_of(pages["d.md"])[0]["paragraph"]["rich_text"]
+        self.assertEqual(d, [{"text": {"content": "Links to [[nothing]]"}}])
+
+        # Editing c replaces its page, so the notes linking to it (a, then b) are re-sent; d is not
+        self.write("papers/c.md", "Cited by [[A]] again")
+        statuses = self.statuses(self.sync(resolve_links=True))
+        self.assertEqual(statuses, {"a.md": "uploaded", "b.md": "uploaded", "d.md": "unchanged",
+                                    "papers/c.md": "uploaded"})
+
+
+if __name__ == '__main__':
+    unittest.main()
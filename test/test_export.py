@@ -0,0 +1,187 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.client import NotionSync
+from src.export import ExportCache, export_page, render_rich_text, is_settled
+from src.parser import parse_markdown_text
+from fakes import make_client
+
+PAGE = "a" * 32
+OLD = "2026-01-01T10:00:00.000Z"
+EDITED = "2026-01-02T10:00:00.000Z"
+
+SAMPLE = """# Weekly Notes
+
+Intro with **bold**, *italic*, `code`, [a link](https://example.com) and $E=mc^2$.
+
+- First point
+  - Nested point
+- Second point
+
+1. One
+2. Two
+
+> A quote
+
+```python
+print("hi")
+```
+
+$$
+a^2 + b^2
+$$
+
+| Name | Value |
+|---|---|
+| x | 1 |
+
+---
+
+![](https://example.com/img.png)
+"""
+
+
+class FakeNotion:
+    """Serves a block tree built from parsed blocks, two children per result page."""
+    def __init__(self, blocks):
+        self.lock = threading.Lock()
+        self.children = {}
+        self.edited = {}
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self.delay = 0.0
+        self.edited[PAGE] = OLD
+        self.children[PAGE] = self._store(blocks)
+
+    def _store(self, blocks):
+        stored = []
+        for block in blocks:
+            block_id = f"blk{len(self.edited)}"
+            body = dict(block[block["type"]])
+            nested = body.pop("children", None) or []
+            self.edited[block_id] = OLD
+            self.children[block_id] = self._store(nested)
+            stored.append({"id": block_id, "type": block["type"], block["type"]: body,
+                           "has_children": bool(nested)})
+        return stored
+
+    def _with_times(self, block):
+        return dict(block, last_edited_time=self.edited[block["id"]])
+
+    # blocks.retrieve
+    def retrieve(self, block_id):
+        self.calls.append(("retrieve", block_id))
+        return {"id": block_id, "last_edited_time": self.edited[block_id]}
+
+    # blocks.children.list
+    def list(self, block_id, page_size, start_cursor=None):
+        with self.lock:
+            self.calls.append(("list", block_id))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        start = int(start_cursor or 0)
+        items = self.children[block_id][start:start + 2]
+        with self.lock:
+            self.active -= 1
+        return {"results": [self._with_times(b) for b in items],
+                "has_more": start + 2 < len(self.children[block_id]), "next_cursor": str(start + 2)}
+
+    @property
+    def lists(self):
+        return [c for c in self.calls if c[0] == "list"]
+
+
+def make_fake_client(notion):
+    return make_client({"blocks.retrieve": notion.retrieve, "blocks.children.list": notion.list})
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.notion = FakeNotion(parse_markdown_text(SAMPLE))
+        self.syncer = NotionSync("token", PAGE, rate_limit=0, client=make_fake_client(self.notion))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip(self):
+        markdown = export_page(self.syncer, PAGE)
+        self.assertEqual(parse_markdown_text(markdown), parse_markdown_text(SAMPLE))
+
+    def test_rich_text_annotations(self):
+        rich_text = parse_markdown_text("**[bold link](https://x.y)** and `c`")[0]["paragraph"]["rich_text"]
+        self.assertEqual(render_rich_text(rich_text), "**[bold link](https://x.y)** and `c`")
+
+    def test_cache_skips_unchanged_subtrees(self):
+        cache_path = os.path.join(self.tmp, "cache.json")
+        first = export_page(self.syncer, PAGE, cache=ExportCache(cache_path))
+        self.assertGreater(len(self.notion.lists), 0)
+
+        # Unchanged page: its listing comes from the cache, but the stamps in
+        # it are old, so the blocks with children are listed again
+        parents = [b["id"] for b in self.notion.children[PAGE] if b["has_children"]]
+        self.notion.calls.clear()
+        self.assertEqual(export_page(self.syncer, PAGE, cache=ExportCache(cache_path)), first)
+        self.assertEqual(sorted(c[1] for c in self.notion.lists), sorted(parents))
+
+        # A nested edit that left every stamp alone is still picked up
+        nested = self.notion.children[parents[0]][0]["bulleted_list_item"]["rich_text"][0]["text"]
+        nested["content"] = "Changed"
+        self.assertIn("  - Changed", export_page(self.syncer, PAGE, cache=ExportCache(cache_path)))
+
+        # Edit the page: its fresh listing shows which subtrees changed
+        nested["content"] = "Changed again"
+        self.notion.edited[parents[0]] = EDITED
+        self.notion.edited[PAGE] = EDITED
+        self.notion.calls.clear()
+        markdown = export_page(self.syncer, PAGE, cache=ExportCache(cache_path))
+        self.assertIn("  - Changed again", markdown)
+        self.assertEqual(sorted({c[1] for c in self.notion.lists}), sorted([PAGE, parents[0]]))
+
+    def test_recent_stamps_are_not_cached(self):
+        # Stamps have minute granularity: an edit later in the same minute keeps the stamp
+        self.assertFalse(is_settled("2026-01-01T10:00:00.000Z", now=1767261630.0))  # 10:00:30
+        self.assertTrue(is_settled("2026-01-01T10:00:00.000Z", now=1767261720.0))   # 10:02:00
+        self.assertFalse(is_settled(None))
+
+        now = time.strftime("%Y-%m-%dT%H:%M:00.000Z", time.gmtime())
+        for block_id in self.notion.edited:
+            self.notion.edited[block_id] = now
+        cache = ExportCache(os.path.join(self.tmp, "cache.json"))
+        export_page(self.syncer, PAGE, cache=cache)
+        self.assertEqual(cache.entries, {})
+
+    def test_subpages_are_not_listed(self):
+        self.notion = FakeNotion(parse_markdown_text("Intro\n\n- item\n  - nested\n"))
+        self.notion.children[PAGE].append({"id": "sub", "type": "child_page", "child_page": {"title": "Sub"},
+                                           "has_children": True})
+        self.notion.edited["sub"] = OLD
+        self.notion.children["sub"] = self.notion._store(parse_markdown_text("- deep\n  - deeper\n"))
+        syncer = NotionSync("token", PAGE, rate_limit=0, client=make_fake_client(self.notion))
+        markdown = export_page(syncer, PAGE)
+        self.assertIn("[Sub](sub)", markdown)
+        self.assertNotIn("deep", markdown)
+        # The page (two result pages) and the list item, nothing below the subpage
+        self.assertEqual([c[1] for c in self.notion.lists], [PAGE, PAGE, "blk2"])
+
+    def test_siblings_are_fetched_concurrently_under_cap(self):
+        blocks = parse_markdown_text("".join(f"- item {i}\n  - child {i}\n" for i in range(8)))
+        self.notion = FakeNotion(blocks)
+        self.notion.delay = 0.02
+        syncer = NotionSync("token", PAGE, rate_limit=0, client=make_fake_client(self.notion))
+        markdown = export_page(syncer, PAGE, max_workers=3)
+        self.assertEqual(self.notion.peak, 3)
+        self.assertIn("  - child 7", markdown)
+
+
+if __name__ == '__main__':
+    unittest.main()
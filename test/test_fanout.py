@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.client import NotionSync, is_retryable
+from src.fanout import fan_out, format_summary
+from src.utils import load_targets_file
+from fakes import FakeClient, FakeError, make_blocks
+
+PAGE_A = "a" * 32
+PAGE_B = "b" * 32
+PAGE_C = "c" * 32
+
+
+class TestFanOut(unittest.TestCase):
+    def test_batches_are_shared_between_targets(self):
+        client = FakeClient()
+        syncer = NotionSync(token="x", root_page_id=PAGE_A, rate_limit=0, client=client)
+        results = fan_out(syncer, [PAGE_A, PAGE_B, PAGE_C], make_blocks(150), "T")
+
+        self.assertTrue(all(r.ok and r.batches == 2 for r in results))
+        self.assertEqual(len(client.appends), 6)
+        first_batches = [children for _, children in client.appends if len(children) == 100]
+        # Parsed and chunked once: every target receives the very same batch object
+        self.assertTrue(all(batch is first_batches[0] for batch in first_batches))
+
+    def test_transient_failure_is_retried_per_target(self):
+        client = FakeClient(failures={PAGE_B: [FakeError(429), FakeError(429)]})
+        syncer = NotionSync(token="x", root_page_id=PAGE_A, rate_limit=0, client=client)
+        results = fan_out(syncer, [PAGE_A, PAGE_B], make_blocks(3), "T")
+        self.assertTrue(all(r.ok for r in results))
+
+    def test_ambiguous_failure_is_not_resent(self):
+        # A 500 may come after the blocks were written: resending could duplicate them
+        client = FakeClient(failures={PAGE_B: [FakeError(500)]})
+        syncer = NotionSync(token="x", root_page_id=PAGE_A, rate_limit=0, client=client)
+        results = fan_out(syncer, [PAGE_A, PAGE_B], make_blocks(3), "T")
+        self.assertEqual([(r.ok, r.status) for r in results], [(True, None), (False, 500)])
+        self.assertEqual(client.children_of(PAGE_B), [])
+
+        self.assertTrue(is_retryable(FakeError(503)))
+        self.assertFalse(is_retryable(FakeError(504)))
+        self.assertTrue(is_retryable(FakeError(504), idempotent=True))
+        self.assertFalse(is_retryable(FakeError(404), idempotent=True))
+
+    def test_permanent_failure_is_isolated(self):
+        client = FakeClient(failures={PAGE_B: FakeError(404)})
+        syncer = NotionSync(token="x", root_page_id=PAGE_A, rate_limit=0, client=client)
+        results = fan_out(syncer, [PAGE_A, PAGE_B, PAGE_C], make_blocks(3), "T")
+
+        self.assertEqual([r.ok for r in results], [True, False, True])
+        self.assertIn("404", results[1].error)
+        summary = format_summary(results)
+        self.assertIn("FAILED", summary)
+        self.assertIn("2/3 targets succeeded", summary)
+
+    def test_targets_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+            f.write(f"# team pages\n{PAGE_A}\n\nhttps://www.notion.so/Digest-{PAGE_B}?pvs=4\n{PAGE_A}\n")
+        try:
+            targets = load_targets_file(f.name)
+        finally:
+            os.remove(f.name)
+        # Duplicates are dropped when the targets are resolved (see resolver.resolve_targets)
+        self.assertEqual(targets, [PAGE_A, f"https://www.notion.so/Digest-{PAGE_B}?pvs=4", PAGE_A])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parser import parse_markdown_text, split_large_tables
+from src.client import NotionSync, chunk_blocks, split_overflow
+from fakes import FakeClient
+
+PAGE = "a" * 32
+
+
+def make_table(rows, cols=3):
+    lines = ["| " + " | ".join(f"h{c}" for c in range(cols)) + " |",
+             "|" + "---|" * cols]
+    for r in range(rows):
+        lines.append("| " + " | ".join(f"r{r}c{c}" for c in range(cols)) + " |")
+    return "\n".join(lines) + "\n"
+
+
+class TestLargeTables(unittest.TestCase):
+    def test_parse_10k_rows(self):
+        blocks = parse_markdown_text(make_table(10000))
+        self.assertEqual(len(blocks), 1)
+        rows = blocks[0]["table"]["children"]
+        self.assertEqual(len(rows), 10001)
+        self.assertEqual(rows[-1]["table_row"]["cells"][2][0]["text"]["content"], "r9999c2")
+
+    def test_split_repeats_header(self):
+        blocks = parse_markdown_text(make_table(250))
+        tables = split_large_tables(blocks)
+        self.assertEqual(len(tables), 3)
+        header = blocks[0]["table"]["children"][0]
+        for table in tables:
+            self.assertIs(table["table"]["children"][0], header)
+            self.assertLessEqual(len(table["table"]["children"]), 100)
+        self.assertEqual(sum(len(t["table"]["children"]) - 1 for t in tables), 250)
+        # The original block is left untouched
+        self.assertEqual(len(blocks[0]["table"]["children"]), 251)
+
+    def test_small_tables_are_reused(self):
+        blocks = parse_markdown_text(make_table(10))
+        self.assertIs(split_large_tables(blocks)[0], blocks[0])
+
+    def test_overflow_rows_follow_the_table(self):
+        blocks = parse_markdown_text("Intro\n\n" + make_table(250))
+        client = FakeClient()
+        syncer = NotionSync("token", PAGE, rate_limit=0, client=client)
+        syncer.push_blocks(PAGE, blocks)
+
+        calls = client.appends
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(calls[0][0], PAGE)
+        self.assertEqual(len(calls[0][1][1]["table"]["children"]), 100)
+        # Remaining 151 rows go to the created table block
+        self.assertEqual([c[0] for c in calls[1:]], ["blk1", "blk1"])
+        self.assertEqual([len(c[1]) for c in calls[1:]], [100, 51])
+        self.assertEqual(len(blocks[1]["table"]["children"]), 251)
+
+    def test_split_overflow_keeps_batch_identity(self):
+        batch = parse_markdown_text(make_table(5))
+        request, overflow = split_overflow(batch)
+        self.assertIs(request, batch)
+        self.assertEqual(overflow, {})
+
+    def test_chunks_respect_element_limit(self):
+        tables = split_large_tables(parse_markdown_text(make_table(2000)))
+        batches = chunk_blocks(tables)
+        self.assertGreater(len(batches), 1)
+        for batch in batches:
+            self.assertLessEqual(sum(1 + len(t["table"]["children"]) for t in batch), 1000)
+        self.assertEqual(sum(len(b) for b in batches), len(tables))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parser import parse_markdown_text
+from src.links import LinkResolver, rewrite_links
+
+PAGES = {
+    "index.md": ("id-index", "https://notion.so/index"),
+    "papers/attention.md": ("id-att", None),
+    "papers/bert.md": ("id-bert", "https://notion.so/bert"),
+    "drafts/bert.md": ("id-draft", "https://notion.so/draft"),
+}
+
+
+class TestLinks(unittest.TestCase):
+    def setUp(self):
+        self.resolver = LinkResolver(PAGES)
+
+    def test_resolve_names_and_paths(self):
+        self.assertEqual(self.resolver.resolve_name("Attention"), "papers/attention.md")
+        self.assertEqual(self.resolver.resolve_name("papers/bert"), "papers/bert.md")
+        self.assertIsNone(self.resolver.resolve_name("bert"))  # Ambiguous file name
+        self.assertEqual(self.resolver.resolve_href("papers/bert.md", "attention.md#intro"), "papers/attention.md")
+        self.assertEqual(self.resolver.resolve_href("papers/bert.md", "../index.md"), "index.md")
+        self.assertIsNone(self.resolver.resolve_href("index.md", "https://example.com/a.md"))
+        self.assertIsNone(self.resolver.resolve_href("index.md", "missing.md"))
+
+    def test_rewrite_keeps_formatting_and_code(self):
+        blocks = parse_markdown_text(
+            "**See [[attention]]** and [[papers/bert#Results|results]], `[[index]]`, [[nope]]\n\n"
+            "| a |\n|---|\n| [[index]] |\n"
+        )
+        linked, unresolved = rewrite_links(blocks, "index.md", self.resolver)
+        self.assertEqual(linked, {"papers/attention.md", "papers/bert.md", "index.md"})
+        self.assertEqual(unresolved, ["nope"])
+
+        rich_text = blocks[0]["paragraph"]["rich_text"]
+        self.assertEqual(rich_text[1], {"type": "mention", "mention": {"type": "page", "page": {"id": "id-att"}},
+                                        "annotations": {"bold": True}})
+        self.assertEqual(rich_text[3]["text"], {"content": "results", "link": {"url": "https://notion.so/bert"}})
+        self.assertEqual(rich_text[5]["text"]["content"], "[[index]]")  # Inline code is left alone
+        self.assertEqual(rich_text[6]["text"]["content"], ", [[nope]]")
+        cell = blocks[1]["table"]["children"][1]["table_row"]["cells"][0]
+        self.assertEqual(cell, [{"type": "mention", "mention": {"type": "page", "page": {"id": "id-index"}}}])
+
+
+if __name__ == '__main__':
+    unittest.main()
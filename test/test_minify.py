@@ -0,0 +1,47 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.minify import coalesce_rich_text, minify_blocks
+from src.parser import parse_markdown_text
+
+
+def run(content, link=None, **annotations):
+    text = {"content": content, "link": {"url": link} if link else None}
+    return {"type": "text", "text": text, "annotations": dict({"bold": False, "code": False}, **annotations)}
+
+
+class TestMinify(unittest.TestCase):
+    def test_adjacent_identical_runs_are_merged(self):
+        rich_text = [run("a"), run("b"), run("c", bold=True), run("d", bold=True),
+                     run("e", link="https://x.org", bold=True), run(""), run("f")]
+        self.assertEqual(coalesce_rich_text(rich_text), [
+            {"text": {"content": "ab"}},
+            {"text": {"content": "cd"}, "annotations": {"bold": True}},
+            {"text": {"content": "e", "link": {"url": "https://x.org"}}, "annotations": {"bold": True}},
+            {"text": {"content": "f"}},
+        ])
+
+    def test_merges_stay_under_the_text_limit_and_skip_non_text(self):
+        equation = {"type": "equation", "equation": {"expression": "x"}}
+        merged = coalesce_rich_text([run("a" * 1500), run("b" * 600), equation, run("c"), run("d")])
+        self.assertEqual([len(item["text"]["content"]) for item in merged if "text" in item], [1500, 600, 2])
+        self.assertEqual(merged[2], equation)
+
+    def test_blocks_drop_default_keys(self):
+        blocks = parse_markdown_text("Inline ![fig](f.png) image\n\n| a | b |\n|---|---|\n| **1** | 2 |\n")
+        self.assertEqual(blocks[0], {"type": "paragraph",
+                                     "paragraph": {"rich_text": [{"text": {"content": "Inline ![fig](f.png) image"}}]}})
+        table = blocks[1]
+        self.assertNotIn("object", table)
+        self.assertEqual(set(table["table"]), {"table_width", "children"})
+        self.assertEqual(table["table"]["children"][1]["table_row"]["cells"],
+                         [[{"text": {"content": "1"}, "annotations": {"bold": True}}], [{"text": {"content": "2"}}]])
+        # Already minified blocks are left unchanged
+        self.assertEqual(minify_blocks([dict(table)]), [table])
+
+
+if __name__ == '__main__':
+    unittest.main()
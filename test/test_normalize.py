@@ -0,0 +1,85 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.normalize import Normalizer, NormalizeRule, NoiseReport
+from src.parser import parse_markdown_text
+from src.stream import IncrementalParser
+
+NOISY = """# Title​
+Result 1111 is final
+>
+```python
+x = 1111
+>
+```
+| 2222 | b |
+"""
+
+
+class TestNormalizer(unittest.TestCase):
+    def test_builtin_rules_outside_protected_regions(self):
+        report = NoiseReport()
+        text = Normalizer().normalize(NOISY, report)
+        self.assertIn("Result  is final", text)
+        self.assertIn("\n\n```python\nx = 1111\n>\n```\n", text)  # Code untouched
+        self.assertIn("| 2222 | b |", text)  # Table cells untouched
+        self.assertEqual(report.counts["digit_noise"], 1)
+        self.assertEqual(report.counts["empty_quote"], 1)
+        self.assertEqual(report.counts["invisible_chars"], 1)
+
+    def test_fullwidth_table_rows(self):
+        blocks = parse_markdown_text("名称 ｜ 值\n｜---｜---｜\nA ｜ 1\n")
+        self.assertEqual(len(blocks), 1)
+        rows = blocks[0]["table"]["children"]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["table_row"]["cells"][0][0]["text"]["content"], "名称")
+        self.assertEqual(rows[1]["table_row"]["cells"][1][0]["text"]["content"], "1")
+
+    def test_unclosed_fence_runs_to_end(self):
+        text = Normalizer().normalize("```\n1111\n> \n")
+        self.assertEqual(text, "```\n1111\n> \n")
+
+    def test_report_is_aggregated(self):
+        doc = "\n".join(f"line {i} 3333" for i in range(50))
+        with self.assertLogs("src.normalize", level="INFO") as logs:
+            Normalizer().normalize(doc)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("digit_noise x50", logs.output[0])
+
+    def test_custom_rules(self):
+        normalizer = Normalizer()
+        normalizer.add_rule(NormalizeRule("citation", r'\[citation needed\]'))
+        normalizer.add_rule(NormalizeRule("repeated_word", r'\b(?P<word>\w+) (?P=word)\b', r'\g<word>'))
+        text = normalizer.normalize("Fact [citation needed].\nthe the cat\n```\n[citation needed]\n```\n")
+        self.assertEqual(text, "Fact .\nthe cat\n```\n[citation needed]\n```\n")
+
+    def test_custom_translation(self):
+        normalizer = Normalizer(translation={0x200B: None, 0xA0: " "})
+        self.assertEqual(normalizer.normalize("a\u00a0b\u200b"), "a b")
+
+    def test_invalid_rule_is_rejected(self):
+        normalizer = Normalizer()
+        with self.assertRaises(ValueError):
+            normalizer.add_rule(NormalizeRule("broken", r'(unclosed'))
+        self.assertEqual(len(normalizer.rules), 3)
+        self.assertEqual(normalizer.normalize("a 1111"), "a ")
+
+    def test_stream_matches_whole_buffer(self):
+        parser = IncrementalParser()
+        blocks = []
+        for line in NOISY.splitlines(keepends=True):
+            blocks.extend(parser.feed(line))
+        blocks.extend(parser.close())
+        self.assertEqual(blocks, parse_markdown_text(NOISY))
+
+    def test_only_newlines_end_lines(self):
+        # Form feeds, NEL and line separators stay inside the paragraph, as with readlines()
+        blocks = parse_markdown_text("alpha\x0cbeta\x85gamma\u2028delta\n# Heading\n")
+        self.assertEqual([b["type"] for b in blocks], ["paragraph", "heading_1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parser import parse_markdown_text
+from src.planner import plan_push, count_text_splits, estimate_seconds, format_plan, Plan, PlannedRequest
+from src.validate import validate_blocks
+
+
+def make_doc(rows=250, items=150, code_chars=4500):
+    lines = ["| a | b |", "|---|---|"] + [f"| r{i} | v{i} |" for i in range(rows)]
+    lines += ["", "```", "x" * code_chars, "```", ""]
+    lines += [f"- item {i}" for i in range(items)]
+    return "\n".join(lines) + "\n"
+
+
+class TestPlanner(unittest.TestCase):
+    def test_counts_requests_and_continuations(self):
+        blocks = parse_markdown_text(make_doc())  # 1 table + 1 code + 150 items
+        plan = plan_push(blocks, targets=2, new_page=True, rate_limit=3)
+        summary = plan.to_dict()
+        self.assertEqual(summary["pages_create"], 2)
+        self.assertEqual(summary["appends"], 4)        # 152 blocks -> 2 batches per target
+        self.assertEqual(summary["continuations"], 4)  # 151 extra rows -> 2 follow-ups per target
+        self.assertEqual(summary["rich_text_splits"], 4)  # 4500 chars -> 3 runs, per target
+        self.assertTrue(all(r["bytes"] > 0 for r in summary["requests"]))
+        # Continuations go to the created table, appends to the created page
+        parents = {r.parent for r in plan.requests if r.continuation}
+        self.assertTrue(all(p.startswith("planned-block") for p in parents))
+
+    def test_plan_matches_a_real_push_shape(self):
+        blocks = parse_markdown_text(make_doc(rows=50, items=10, code_chars=10))
+        plan = plan_push(blocks)
+        self.assertEqual([(r.endpoint, r.blocks) for r in plan.requests], [("blocks.children.append", 12)])
+
+    def test_splits_counted_before_validation(self):
+        blocks = parse_markdown_text("x" * 5000 + "\n\n```\n" + "y" * 4500 + "\n```\n")
+        splits = count_text_splits(blocks)
+        validate_blocks(blocks)  # Splits the long runs in place, as main does before planning
+        self.assertEqual((splits, count_text_splits(blocks)), (4, 0))
+        self.assertEqual(plan_push(blocks, targets=2, text_splits=splits).rich_text_splits, 8)
+
+    def test_estimate_is_bounded_by_rate_limit_or_latency(self):
+        plan = Plan(targets=1, requests=[PlannedRequest("blocks.children.append", "p")] * 31)
+        self.assertAlmostEqual(estimate_seconds(plan, rate_limit=3, latency=0.1), 10.1)
+        self.assertAlmostEqual(estimate_seconds(plan, rate_limit=0, latency=0.1), 3.1)
+        self.assertEqual(estimate_seconds(Plan(targets=1), rate_limit=3), 0.0)
+
+    def test_format_plan(self):
+        plan = plan_push(parse_markdown_text(make_doc(items=0)), rate_limit=3)
+        text = format_plan(plan, 3, max_rows=2)
+        self.assertIn("(+2 continuation)", text)
+        self.assertIn("1 more request(s)", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.resolver import TitleIndex, resolve_targets, invalidate_missing
+
+
+def make_page(title, n):
+    page_id = f"{n:032x}"
+    return {"id": f"{page_id[:8]}-{page_id[8:12]}-{page_id[12:16]}-{page_id[16:20]}-{page_id[20:]}",
+            "properties": {"Name": {"type": "title", "title": [{"plain_text": title}]}}}
+
+
+class FakeSearchSyncer:
+    """Serves search results two per page."""
+    def __init__(self, titles):
+        self.pages = [make_page(title, n + 1) for n, title in enumerate(titles)]
+        self.calls = 0
+
+    def _call(self, endpoint, query, page_size, start_cursor, filter):
+        self.calls += 1
+        start = int(start_cursor or 0)
+        end = start + 2
+        return {"results": self.pages[start:end], "has_more": end < len(self.pages), "next_cursor": str(end)}
+
+
+class TestResolver(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "titles.json")
+        self.syncer = FakeSearchSyncer(["Inbox", "Weekly Digest", "Reading List", "Team Notes", "Archive"])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_cold_lookup_pages_until_match_then_uses_cache(self):
+        index = TitleIndex(self.path)
+        page_ids = resolve_targets(["reading  list"], index, lambda: self.syncer)
+        self.assertEqual(page_ids, [f"{3:032x}"])
+        self.assertEqual(self.syncer.calls, 2)  # Stopped before the third result page
+
+        # A new process finds it (and titles seen on the way) without the network
+        index = TitleIndex(self.path)
+        page_ids = resolve_targets(["Reading List", "Inbox"], index, lambda: self.fail("network used"))
+        self.assertEqual(page_ids, [f"{3:032x}", f"{1:032x}"])
+
+    def test_ids_and_urls_skip_search(self):
+        index = TitleIndex(self.path)
+        page_ids = resolve_targets(["a" * 32, "https://www.notion.so/X-" + "a" * 32], index,
+                                   lambda: self.fail("network used"))
+        self.assertEqual(page_ids, ["a" * 32])
+
+    def test_ttl_expiry(self):
+        index = TitleIndex(self.path, ttl=-1)
+        resolve_targets(["Inbox"], index, lambda: self.syncer)
+        resolve_targets(["Inbox"], index, lambda: self.syncer)
+        self.assertEqual(self.syncer.calls, 2)
+
+    def test_unknown_title(self):
+        index = TitleIndex(self.path)
+        with self.assertRaises(ValueError):
+            resolve_targets(["Nope"], index, lambda: self.syncer)
+        self.assertEqual(self.syncer.calls, 3)
+
+    def test_invalidate_missing(self):
+        index = TitleIndex(self.path)
+        resolve_targets(["Inbox"], index, lambda: self.syncer)
+        invalidate_missing(index, ["Inbox"], [f"{1:032x}"])
+        self.assertIsNone(TitleIndex(self.path).get("Inbox"))
+
+    def test_concurrent_writers(self):
+        # One shared index and a second instance of the same file, saved from many threads
+        shared, other = TitleIndex(self.path), TitleIndex(self.path)
+
+        def work(n):
+            for i in range(50):
+                index = shared if n % 2 else other
+                index.put(f"Page {n}-{i}", f"{i:032x}")
+                index.save()
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(shared.entries), 150)
+        self.assertEqual(os.listdir(self.tmp), ["titles.json"])  # No temporary files left behind
+        self.assertEqual(len(TitleIndex(self.path).entries), 150)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import os
+import sys
+import shutil
+import tempfile
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.client import NotionSync
+from src.parser import parse_markdown_text
+from src.sections import PageIndex, insert_under, find_section, load_page_index
+from fakes import FakeError, make_client
+
+PAGE = "a" * 32
+
+PAGE_MARKDOWN = """# Project
+
+Intro
+
+## Results
+
+First result
+
+## Ideas
+"""
+
+
+class FakeNotion:
+    """
+    One page of top-level blocks; appends honor `after` and bump last_edited_time
+    (a minute per edit, long settled unless `recent`). Appends to blocks in
+    `rejected` fail with a 400.
+    """
+    def __init__(self, blocks):
+        self.children = {PAGE: []}
+        self.count = 0
+        self.edits = 0
+        self.calls = []
+        self.recent = False
+        self.rejected = set()
+        self._insert(PAGE, blocks, None)
+
+    def _insert(self, parent, blocks, after):
+        created = []
+        for block in blocks:
+            self.count += 1
+            body = {k: v for k, v in block[block["type"]].items() if k != "children"}
+            for item in body.get("rich_text", []):
+                item["plain_text"] = item.get("text", {}).get("content", "")
+            created.append({"id": f"blk{self.count}", "type": block["type"], block["type"]: body})
+        siblings = self.children.setdefault(parent, [])
+        position = len(siblings) if after is None else [b["id"] for b in siblings].index(after) + 1
+        siblings[position:position] = created
+        self.edits += 1
+        return created
+
+    def text(self, parent=PAGE):
+        return [b[b["type"]]["rich_text"][0]["plain_text"] for b in self.children[parent]]
+
+    # blocks.retrieve
+    def retrieve(self, block_id):
+        self.calls.append("retrieve")
+        if self.recent:
+            return {"id": block_id, "last_edited_time": time.strftime("%Y-%m-%dT%H:%M:00.000Z", time.gmtime())}
+        return {"id": block_id, "last_edited_time": f"2026-01-01T10:{self.edits:02d}:00.000Z"}
+
+    # blocks.children.list
+    def list(self, block_id, page_size, start_cursor=None):
+        self.calls.append("list")
+        return {"results": self.children.get(block_id, []), "has_more": False, "next_cursor": None}
+
+    # blocks.children.append
+    def append(self, block_id, children, after=None):
+        self.calls.append("append")
+        if block_id in self.rejected:
+            raise FakeError(400, "validation_error")
+        if after is not None and after not in [b["id"] for b in self.children.get(block_id, [])]:
+            raise FakeError(400)
+        return {"results": self._insert(block_id, children, after)}
+
+
+def make_fake_client(notion):
+    return make_client({"blocks.retrieve": notion.retrieve, "blocks.children.list": notion.list,
+                        "blocks.children.append": notion.append})
+
+
+class TestSections(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.tmp, "page_index.json")
+        self.notion = FakeNotion(parse_markdown_text(PAGE_MARKDOWN))
+        self.syncer = NotionSync("token", PAGE, rate_limit=0, client=make_fake_client(self.notion))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def insert(self, markdown, heading="Results"):
+        return insert_under(self.syncer, PAGE, heading, parse_markdown_text(markdown), PageIndex(self.index_path))
+
+    def test_inserts_at_end_of_section_and_reuses_index(self):
+        index = PageIndex(self.index_path)
+        # A failed lookup sends nothing, but the listing stays in the index
+        with self.assertRaises(ValueError):
+            insert_under(self.syncer, PAGE, "Conclusion", parse_markdown_text("x"), index)
+        self.assertEqual(self.notion.calls, ["retrieve", "list"])
+
+        # Unchanged page: the cached index is used, nothing is listed
+        self.notion.calls.clear()
+        self.insert("Second result")
+        self.assertEqual(self.notion.text(), ["Project", "Intro", "Results", "First result", "Second result", "Ideas"])
+        self.assertEqual(self.notion.calls, ["retrieve", "append"])
+
+        # Our own insertion edited the page: the next one lists it again
+        self.notion.calls.clear()
+        self.insert("Third result\n\n### Detail\n\nMore", heading="## results")
+        self.assertEqual(self.notion.text(), ["Project", "Intro", "Results", "First result", "Second result",
+                                              "Third result", "Detail", "More", "Ideas"])
+        self.assertEqual(self.notion.calls, ["retrieve", "list", "append"])
+
+    def test_recent_stamps_are_not_trusted(self):
+        # Someone else may still edit the page within the same minute
+        self.notion.recent = True
+        index = PageIndex(self.index_path)
+        load_page_index(self.syncer, PAGE, index)
+        self.assertEqual(index.entries, {})
+        self.notion.calls.clear()
+        self.insert("Second result")
+        self.assertEqual(self.notion.calls, ["retrieve", "list", "append"])
+
+    def test_batches_stay_in_order(self):
+        self.insert("".join(f"p{i}\n\n" for i in range(150)))
+        text = self.notion.text()
+        self.assertEqual(text[4:154], [f"p{i}" for i in range(150)])
+        self.assertEqual(text[-1], "Ideas")
+
+    def test_stale_anchor_is_relisted_once(self):
+        index = PageIndex(self.index_path)
+        load_page_index(self.syncer, PAGE, index)
+        # Someone removed our anchor without the timestamp moving
+        self.notion.children[PAGE] = [b for b in self.notion.children[PAGE] if b["id"] != "blk4"]
+        self.notion.calls.clear()
+        insert_under(self.syncer, PAGE, "Results", parse_markdown_text("Again"), index)
+        self.assertEqual(self.notion.calls, ["retrieve", "append", "retrieve", "list", "append"])
+        self.assertEqual(self.notion.text(), ["Project", "Intro", "Results", "Again", "Ideas"])
+
+    def test_partly_written_batch_is_not_resent(self):
+        index = PageIndex(self.index_path)
+        load_page_index(self.syncer, PAGE, index)
+        table = "| n |\n|---|\n" + "".join(f"| {i} |\n" for i in range(150))
+        # The table is written, then its continuation rows are rejected
+        self.notion.rejected.add("blk6")
+        self.notion.calls.clear()
+        with self.assertRaises(FakeError):
+            insert_under(self.syncer, PAGE, "Results", parse_markdown_text(table), index)
+        self.assertEqual(self.notion.calls, ["retrieve", "append", "append"])
+        self.assertEqual([b["type"] for b in self.notion.children[PAGE]].count("table"), 1)
+        self.assertNotIn(PAGE, PageIndex(self.index_path).entries)
+
+    def test_unknown_heading_sends_nothing(self):
+        with self.assertRaises(ValueError) as ctx:
+            self.insert("x", heading="Conclusion")
+        self.assertIn("'Results'", str(ctx.exception))
+        self.assertNotIn("append", self.notion.calls)
+
+    def test_find_section(self):
+        entries = [{"id": "1", "type": "heading_1", "text": "A"}, {"id": "2", "type": "paragraph"},
+                   {"id": "3", "type": "heading_2", "text": "B"}, {"id": "4", "type": "heading_3", "text": "C"},
+                   {"id": "5", "type": "paragraph"}, {"id": "6", "type": "heading_2", "text": "D"}]
+        self.assertEqual(find_section(entries, "A"), (0, 5))
+        self.assertEqual(find_section(entries, "B"), (2, 4))
+        self.assertEqual(find_section(entries, "D"), (5, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
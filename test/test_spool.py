@@ -0,0 +1,113 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.adaptive import AdaptiveController
+from src.client import NotionSync
+from src.spool import Spool, drain
+from fakes import FakeClient, FakeError, make_blocks
+
+PAGE_A = "a" * 32
+PAGE_B = "b" * 32
+
+
+def make_syncer(fail_after=None, status=503):
+    """A syncer (no retries) whose appends fail with `status` after the first `fail_after`."""
+    failures = {}
+    if fail_after is not None:
+        failures["blocks.children.append"] = [None] * fail_after + [FakeError(status)] * 10
+    client = FakeClient(failures)
+    return NotionSync("token", None, rate_limit=0, max_retries=0, client=client), client
+
+
+class TestSpool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.spool = Spool(os.path.join(self.tmp, "spool.db"))
+
+    def tearDown(self):
+        self.spool.close()
+        shutil.rmtree(self.tmp)
+
+    def test_jobs_for_same_target_share_batches(self):
+        for tag in "abc":
+            self.spool.enqueue(PAGE_A, make_blocks(30, tag))
+        syncer, client = make_syncer()
+        drain(syncer, self.spool, once=True)
+
+        # 90 blocks from three jobs fit into a single request, in enqueue order
+        self.assertEqual(len(client.appends), 1)
+        contents = [b["paragraph"]["rich_text"][0]["text"]["content"] for b in client.appends[0][1]]
+        self.assertEqual(contents[0], "a0")
+        self.assertEqual(contents[-1], "c29")
+        self.assertEqual(self.spool.stats(), {"done": 3})
+
+    def test_priority_order(self):
+        self.spool.enqueue(PAGE_A, make_blocks(1), priority=0)
+        self.spool.enqueue(PAGE_B, make_blocks(1), priority=5)
+        syncer, client = make_syncer()
+        drain(syncer, self.spool, once=True)
+        self.assertEqual(client.appended_to(), [PAGE_B, PAGE_A])
+
+    def test_partial_failure_keeps_only_unsent_blocks(self):
+        self.spool.enqueue(PAGE_A, make_blocks(80, "a"))
+        self.spool.enqueue(PAGE_A, make_blocks(80, "b"))
+        drain(make_syncer(fail_after=1)[0], self.spool, once=True)
+
+        # First batch (a0..a79 + b0..b19) went out; the second job keeps b20..b79
+        self.assertEqual(self.spool.stats(), {"done": 1, "pending": 1})
+        job = self.spool.claim_group(now=float("inf"))[0]
+        self.assertEqual(len(job.blocks), 60)
+        self.assertEqual(job.blocks[0]["paragraph"]["rich_text"][0]["text"]["content"], "b20")
+
+    def test_pieces_written_before_a_failure_are_not_resent(self):
+        self.spool.enqueue(PAGE_A, make_blocks(80, "a"))
+        syncer, client = make_syncer(fail_after=1, status=504)
+        syncer.controller = AdaptiveController(batch_size=30)
+        drain(syncer, self.spool, once=True)
+
+        # The batch went out in pieces of 30 and the second one timed out: the job keeps a30..a79
+        self.assertEqual(self.spool.stats(), {"pending": 1})
+        job = self.spool.claim_group(now=float("inf"))[0]
+        self.assertEqual(len(job.blocks), 50)
+        self.assertEqual(job.blocks[0]["paragraph"]["rich_text"][0]["text"]["content"], "a30")
+
+    def test_server_errors_and_access_errors_are_retried(self):
+        for status in (500, 504, 401, 403, 404):
+            self.spool.enqueue(PAGE_A, make_blocks(3))
+            drain(make_syncer(fail_after=0, status=status)[0], self.spool, once=True)
+            self.assertEqual(self.spool.stats(), {"pending": 1}, status)
+            self.spool.conn.execute("DELETE FROM jobs")
+
+        self.spool.enqueue(PAGE_A, make_blocks(3), title="Digest", new_page=True)
+        client = FakeClient({"pages.create": FakeError(502)})
+        drain(NotionSync("token", None, rate_limit=0, max_retries=0, client=client), self.spool, once=True)
+        self.assertEqual(self.spool.stats(), {"pending": 1})
+
+    def test_new_page_is_not_recreated_on_retry(self):
+        self.spool.enqueue(PAGE_A, make_blocks(3), title="Digest", new_page=True)
+        syncer, client = make_syncer(fail_after=0)
+        drain(syncer, self.spool, once=True)
+
+        job = self.spool.claim_group(now=float("inf"))[0]
+        self.assertFalse(job.new_page)
+        self.assertEqual(job.target, f"{1:032x}")
+        self.assertEqual(client.created, [(PAGE_A, "Digest")])
+
+    def test_permanent_error_is_dead_lettered(self):
+        self.spool.enqueue(PAGE_A, make_blocks(3))
+        drain(make_syncer(fail_after=0, status=400)[0], self.spool, once=True)
+        self.assertEqual(self.spool.stats(), {"dead": 1})
+        self.assertIn("400", self.spool.dead_letters()[0]["error"])
+
+        self.assertEqual(self.spool.retry_dead(), 1)
+        drain(make_syncer()[0], self.spool, once=True)
+        self.assertEqual(self.spool.stats(), {"done": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
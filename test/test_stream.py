@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.client import NotionSync
+from src.parser import parse_markdown_text
+from src.stream import IncrementalParser, StreamPublisher, stream_to_page
+from fakes import FakeClient
+
+SAMPLE = """# Title
+
+Intro paragraph with **bold** and $x$.
+
+- item one
+  - nested item
+description under the list
+1. numbered
+
+```python
+def f():
+    return 1
+```
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+$$
+E = mc^2
+$$
+
+> quoted
+---
+Final words
+"""
+
+
+def make_syncer():
+    client = FakeClient()
+    return NotionSync("token", "page", rate_limit=0, client=client), client
+
+
+def stream_blocks(text):
+    """Feeds `text` line by line and nests the streamed children under their parents."""
+    parser = IncrementalParser()
+    blocks = []
+    for line in text.splitlines(keepends=True):
+        blocks.extend(parser.feed(line))
+        children = parser.take_children()
+        if children:
+            parent = blocks[-1][blocks[-1]["type"]]
+            parent.setdefault("children", []).extend(children)
+    blocks.extend(parser.close())
+    return blocks
+
+
+class TestIncrementalParser(unittest.TestCase):
+    def test_streamed_blocks_match_full_parse(self):
+        self.assertEqual(stream_blocks(SAMPLE), parse_markdown_text(SAMPLE))
+
+    def test_blocks_are_released_once_closed(self):
+        parser = IncrementalParser()
+        self.assertEqual([b["type"] for b in parser.feed("First paragraph\n")], ["paragraph"])
+        self.assertEqual(parser.feed("| a | b |\n"), [])
+        self.assertEqual(parser.feed("| 1 | 2 |\n"), [])
+        released = parser.feed("# Next\n")
+        self.assertEqual([b["type"] for b in released], ["table", "heading_1"])
+
+    def test_open_fence_holds_blocks(self):
+        parser = IncrementalParser()
+        self.assertEqual(len(parser.feed("Before\n")), 1)
+        self.assertEqual(parser.feed("```\n"), [])
+        self.assertEqual(parser.feed("# not a heading\n"), [])
+        released = parser.feed("```\n")
+        self.assertEqual([b["type"] for b in released], ["code"])
+        self.assertEqual(released[0]["code"]["rich_text"][0]["text"]["content"], "# not a heading")
+
+    def test_paragraphs_keep_nesting_under_open_list(self):
+        parser = IncrementalParser()
+        self.assertEqual([b["type"] for b in parser.feed("- item\n")], ["bulleted_list_item"])
+        self.assertEqual(parser.feed("detail\n"), [])
+        self.assertEqual(parser.feed("\n"), [])
+        self.assertEqual(parser.feed("  - nested\n"), [])
+        self.assertEqual([b["type"] for b in parser.take_children()], ["paragraph", "bulleted_list_item"])
+        self.assertEqual([b["type"] for b in parser.feed("## Section\n")], ["heading_2"])
+        self.assertEqual(parser.take_children(), [])
+
+    def test_long_input_is_linear(self):
+        table = "| a | b |\n|---|---|\n" + "| 1 | 2 |\n" * 2000
+        prose = "- item\n" + "more words\n" * 2000
+        for text in (table, prose):
+            start = time.monotonic()
+            self.assertEqual(stream_blocks(text), parse_markdown_text(text))
+            self.assertLess(time.monotonic() - start, 2)
+
+
+class TestStreamPublisher(unittest.TestCase):
+    def test_size_threshold(self):
+        syncer, client = make_syncer()
+        publisher = StreamPublisher(syncer, "page", max_latency=60, max_blocks=3)
+        publisher.add([{"type": "divider", "divider": {}}] * 7)
+        self.assertEqual([len(batch) for _, batch in client.appends], [3, 3])
+        publisher.flush()
+        self.assertEqual([len(batch) for _, batch in client.appends], [3, 3, 1])
+
+    def test_latency_threshold(self):
+        syncer, client = make_syncer()
+        publisher = StreamPublisher(syncer, "page", max_latency=0.01, max_blocks=50)
+        publisher.add([{"type": "divider", "divider": {}}])
+        publisher.poll()
+        self.assertEqual(client.appends, [])
+        time.sleep(0.02)
+        publisher.poll()
+        self.assertEqual(len(client.appends), 1)
+
+    def test_stream_to_page(self):
+        syncer, client = make_syncer()
+        publisher = StreamPublisher(syncer, "page", max_latency=60, max_blocks=100)
+        count = stream_to_page(iter(SAMPLE.splitlines(keepends=True)), publisher,
+                               prefix_blocks=[{"type": "divider", "divider": {}}])
+        self.assertEqual(count, len(parse_markdown_text(SAMPLE)) + 1)
+        self.assertEqual(len(client.appends), 1)
+        self.assertEqual(client.appends[0][1][1:], parse_markdown_text(SAMPLE))
+
+    def test_children_of_a_sent_block_go_to_it(self):
+        syncer, client = make_syncer()
+        publisher = StreamPublisher(syncer, "page", max_latency=60, max_blocks=2)
+        lines = ["- item\n", "- last item\n"] + ["detail\n"] * 5 + ["# End\n"]
+        count = stream_to_page(iter(lines), publisher)
+        self.assertEqual(count, 3)
+        self.assertEqual(client.appended_to(), ["page", "blk1", "blk1", "blk1", "page"])
+        self.assertEqual([len(batch) for _, batch in client.appends], [2, 2, 2, 1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.client import NotionSync
+from src.fanout import fan_out
+from src.tokens import TokenLane, TokenPool, build_pool
+from src.utils import get_tokens
+from fakes import FakeClient, FakeError, make_blocks
+
+PAGE_A = "a" * 32
+PAGE_B = "b" * 32
+TARGETS = [f"{n:032x}" for n in range(8)]
+
+
+def integration(revoked=False, denied=()):
+    """One integration: appends succeed unless the token is revoked or the page isn't shared."""
+    failures = {page: FakeError(403) for page in denied}
+    if revoked:
+        failures["blocks.children.append"] = FakeError(401)
+    return FakeClient(failures)
+
+
+def make_syncer(*clients, targets=None, rate_limit=0):
+    lanes = [TokenLane(f"token {n}", client, rate_limit=rate_limit, targets=(targets or {}).get(n))
+             for n, client in enumerate(clients, start=1)]
+    return NotionSync("unused", None, pool=TokenPool(lanes))
+
+
+class TestGetTokens(unittest.TestCase):
+    def test_pool_entries(self):
+        config = {"notion_token": "ntn_single", "notion_tokens": [
+            "ntn_first",
+            {"token": "ntn_second", "name": "archive", "rate_limit": 5,
+             "targets": [f"https://www.notion.so/Page-{PAGE_A}", PAGE_B]},
+        ]}
+        tokens = get_tokens(config)
+        self.assertEqual(tokens[0], {"token": "ntn_first", "name": "token 1", "targets": None})
+        self.assertEqual(tokens[1], {"token": "ntn_second", "name": "archive", "rate_limit": 5.0,
+                                     "targets": [PAGE_A, PAGE_B]})
+
+        pool = build_pool(tokens, rate_limit=3, client_factory=lambda token: token)
+        self.assertEqual([(l.client, l.limiter.rate) for l in pool.lanes], [("ntn_first", 3), ("ntn_second", 5.0)])
+
+    def test_single_token_and_errors(self):
+        self.assertEqual(get_tokens({"notion_token": "ntn_x"}), [{"token": "ntn_x", "name": "notion_token"}])
+        self.assertEqual(get_tokens({"notion_token": "ntn_YOUR_TOKEN_HERE"}), [])
+        with self.assertRaises(ValueError):
+            get_tokens({"notion_tokens": [{"token": "ntn_YOUR_FIRST_TOKEN"}]})
+        with self.assertRaises(ValueError):
+            get_tokens({"notion_tokens": [{"token": "ntn_x", "targets": ["not a page"]}]})
+
+
+class TestTokenPool(unittest.TestCase):
+    def test_targets_are_spread_over_tokens(self):
+        first, second = integration(), integration()
+        results = fan_out(make_syncer(first, second), TARGETS, make_blocks(150), "T", max_workers=4)
+        self.assertTrue(all(r.ok for r in results))
+        # Every target is pushed by one token, and both tokens get their share
+        self.assertEqual(sorted(first.appended_to() + second.appended_to()), sorted(TARGETS * 2))
+        self.assertTrue(first.appended_to() and second.appended_to())
+        self.assertFalse(set(first.appended_to()) & set(second.appended_to()))
+
+    def test_targets_go_to_the_tokens_listed_for_them(self):
+        first, second, spare = integration(), integration(), integration()
+        syncer = make_syncer(first, second, spare, targets={1: [PAGE_A], 2: [PAGE_B]})
+        fan_out(syncer, [PAGE_A, PAGE_B, TARGETS[0]], make_blocks(3), "T", max_workers=3)
+        self.assertEqual((first.appended_to(), second.appended_to(), spare.appended_to()), ([PAGE_A], [PAGE_B], [TARGETS[0]]))
+
+    def test_failover_on_401_and_403(self):
+        revoked, limited, working = integration(revoked=True), integration(denied={PAGE_B}), integration()
+        syncer = make_syncer(revoked, limited, working)
+        results = fan_out(syncer, [PAGE_A, PAGE_B] + TARGETS, make_blocks(3), "T", max_workers=4)
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(revoked.appended_to(), [])
+        self.assertNotIn(PAGE_B, limited.appended_to())
+        self.assertIn(PAGE_B, working.appended_to())
+        self.assertTrue(syncer.pool.lanes[0].disabled)
+        self.assertEqual([lane.users for lane in syncer.pool.lanes], [0, 0, 0])
+
+        limited, working = integration(denied={PAGE_B}), integration()
+        syncer = make_syncer(limited, working)
+        with syncer.lane(PAGE_B):
+            syncer.push_blocks(PAGE_B, make_blocks(150))
+        self.assertEqual(working.appended_to(), [PAGE_B, PAGE_B])
+        self.assertEqual(syncer.pool.lanes[0].denied, {PAGE_B})
+        # Other pages still use the token
+        syncer.push_blocks(PAGE_A, make_blocks(1))
+        self.assertEqual(limited.appended_to(), [PAGE_A])
+
+    def test_no_token_left(self):
+        syncer = make_syncer(integration(denied={PAGE_A}))
+        results = fan_out(syncer, [PAGE_A], make_blocks(3), "T")
+        self.assertEqual(results[0].status, 403)
+
+    def test_each_token_has_its_own_rate_budget(self):
+        def elapsed(*clients):
+            syncer = make_syncer(*clients, rate_limit=20)
+            start = time.monotonic()
+            fan_out(syncer, TARGETS * 2, make_blocks(3), "T", max_workers=4)
+            return time.monotonic() - start
+
+        single = elapsed(integration())
+        pooled = elapsed(integration(), integration())
+        self.assertGreater(single, 0.7)  # 16 requests at 20/s
+        self.assertLess(pooled, single * 0.7)
+
+
+if __name__ == '__main__':
+    unittest.main()
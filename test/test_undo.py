@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.client import NotionSync, chunk_blocks
+from src.fanout import fan_out
+from src.undo import SyncRecord, SyncLog, undo_sync, MAX_SYNCS
+from fakes import FakeClient, FakeError, make_blocks
+
+PAGE_A = "a" * 32
+PAGE_B = "b" * 32
+
+
+class TestSyncRecord(unittest.TestCase):
+    def test_only_top_level_items_are_recorded(self):
+        client = FakeClient()
+        syncer = NotionSync(token="x", root_page_id=PAGE_A, rate_limit=0, client=client)
+        record = SyncRecord()
+        results = fan_out(syncer, [PAGE_A, PAGE_B], make_blocks(150), "T", new_page=True, record=record)
+        self.assertTrue(all(r.ok for r in results))
+        # Blocks inside the new pages go with them
+        self.assertEqual(sorted(item["parent"] for item in record.items), [PAGE_A, PAGE_B])
+        self.assertTrue(all(item["page"] for item in record.items))
+
+        record = SyncRecord()
+        syncer.push_blocks(PAGE_A, make_blocks(150), record=record)
+        self.assertEqual(len(record), 150)
+        restored = SyncRecord.from_dict(record.to_dict())
+        self.assertEqual((restored.sync_id, restored.items), (record.sync_id, record.items))
+
+    def test_partial_push_is_recorded(self):
+        client = FakeClient({"blocks.children.append": [None, FakeError(400, "validation_error")]})
+        syncer = NotionSync(token="x", root_page_id=PAGE_A, rate_limit=0, client=client)
+        record = SyncRecord()
+        with self.assertRaises(FakeError):
+            syncer.push_batches(PAGE_A, chunk_blocks(make_blocks(250)), record=record)
+        self.assertEqual(len(record), 100)
+
+
+class TestUndo(unittest.TestCase):
+    def test_concurrent_archive(self):
+        client = FakeClient({"gone": FakeError(404, "object_not_found"), "locked": FakeError(403, "restricted_resource")},
+                            delay=0.01)
+        syncer = NotionSync(token="x", root_page_id=PAGE_A, rate_limit=0, client=client)
+        record = SyncRecord()
+        record.add_page("new-page", PAGE_B)
+        record.add_blocks(PAGE_A, [{"id": f"blk{i}"} for i in range(40)] + [{"id": "gone"}, {"id": "locked"}])
+
+        start = time.monotonic()
+        archived, failed = undo_sync(syncer, record, workers=8)
+        self.assertLess(time.monotonic() - start, 0.3)  # 42 deletes of 10ms, 8 at a time
+        self.assertEqual(client.peak, 8)
+        self.assertEqual(client.archived, ["new-page"])
+        self.assertEqual(len(client.deleted), 40)
+        self.assertIn("gone", archived)  # Already deleted by hand
+        self.assertEqual(list(failed), ["locked"])
+        self.assertEqual([item["id"] for item in record.items], ["locked"])
+
+
+class TestSyncLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "sync_log.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_lookup_and_persistence(self):
+        sync_log = SyncLog(self.path)
+        with self.assertRaises(ValueError):
+            sync_log.get()
+        for n in range(MAX_SYNCS + 5):
+            record = SyncRecord(f"note{n}.md", sync_id=f"20260101-0000{n:02d}-ab{n:02d}")
+            record.add_blocks(PAGE_A, [{"id": f"blk{n}"}])
+            sync_log.put(record)
+        sync_log.save()
+
+        sync_log = SyncLog(self.path)
+        self.assertEqual(len(sync_log.entries), MAX_SYNCS)
+        self.assertEqual(sync_log.get().description, f"note{MAX_SYNCS + 4}.md")
+        self.assertEqual(sync_log.get("20260101-000010").description, "note10.md")
+        with self.assertRaises(ValueError):
+            sync_log.get("20260101-00001")  # Ambiguous prefix
+        with self.assertRaises(ValueError):
+            sync_log.get("20260101-000001")  # Dropped from the log
+        sync_log.remove(sync_log.get().sync_id)
+        self.assertEqual(sync_log.get().description, f"note{MAX_SYNCS + 3}.md")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parser import parse_markdown_text
+from src.validate import validate_blocks, equation_problem
+
+
+class TestValidate(unittest.TestCase):
+    def test_repairs(self):
+        blocks = parse_markdown_text(
+            "![](  )\n\n"
+            "![fig](figures/loss.png)\n\n"
+            "```py\nprint(1)\n```\n\n"
+            "```vue\n<template/>\n```\n\n"
+            "$$\n\\frac{a}{b\n$$\n\n"
+            "See [the notes](notes.md) and $x^{2$ here\n\n"
+            "```\n" + "x" * 4500 + "\n```\n"
+        )
+        report = validate_blocks(blocks)
+        self.assertEqual(report.errors, [])
+        kinds = sorted(issue.kind for issue in report.issues)
+        self.assertEqual(kinds, ["code_language", "code_language", "equation", "image_url", "image_url",
+                                 "inline_equation", "link_url", "text_length"])
+
+        self.assertEqual(blocks[0], {"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": "figures/loss.png"}}]}})
+        self.assertEqual([b["code"]["language"] for b in blocks if b["type"] == "code"],
+                         ["python", "plain text", "latex", "plain text"])
+        self.assertEqual(blocks[3]["code"]["rich_text"], [{"text": {"content": "\\frac{a}{b"}}])
+        runs = blocks[4]["paragraph"]["rich_text"]
+        self.assertEqual(runs[1], {"text": {"content": "the notes"}})
+        self.assertEqual(runs[3], {"text": {"content": "x^{2"}, "annotations": {"code": True}})
+        self.assertEqual([len(r["text"]["content"]) for r in blocks[5]["code"]["rich_text"]], [2000, 2000, 500])
+
+    def test_unrepairable_problems_are_all_reported(self):
+        deep = {"type": "bulleted_list_item", "bulleted_list_item": {"rich_text": [], "children": [
+            {"type": "bulleted_list_item", "bulleted_list_item": {"rich_text": [], "children": [
+                {"type": "bulleted_list_item", "bulleted_list_item": {"rich_text": [], "children": [
+                    {"type": "paragraph", "paragraph": {"rich_text": []}}]}}]}}]}}
+        many_runs = {"type": "paragraph", "paragraph": {"rich_text": [
+            {"text": {"content": "a"}, "annotations": {"bold": n % 2 == 0}} for n in range(150)]}}
+        image = {"type": "image", "image": {"type": "external", "external": {"url": ""}}}
+        report = validate_blocks([deep, many_runs, image], repair=False)
+        self.assertEqual([(e.location, e.kind) for e in report.errors],
+                         [("block 1 > child 1 > child 1", "nesting"), ("block 2", "rich_text_items"),
+                          ("block 3", "image_url")])
+        self.assertIn("3 error(s)", report.summary())
+
+    def test_equation_nesting(self):
+        self.assertIsNone(equation_problem(r"\left( \begin{matrix} a \\ b \end{matrix} \right) \{x\}"))
+        self.assertEqual(equation_problem(r"a}"), "unbalanced '}'")
+        self.assertIn("never closed", equation_problem(r"\begin{cases} x"))
+        self.assertIn("without matching \\right", equation_problem(r"\left( x"))
+
+
+if __name__ == '__main__':
+    unittest.main()